@@ -0,0 +1,219 @@
+#!/usr/bin/python3
+# encoding: utf-8
+# @author: sunhao
+# @contact: smartadpole@163.com
+# @file: archive_reparse.py
+# @time: 2026/10/19 19:30
+# @function: Re-parse archived list pages on all cores and store the results.
+
+import os
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import loger
+from page_archive import PageArchive, DEFAULT_ARCHIVE_DIR, replay_page
+from database.data_storage import DataStorage, DEFAULT_DB_CONFIG, SQL_STORAGE_TYPES
+
+DEFAULT_CHUNK_PAGES = 20
+DEFAULT_BATCH_ROWS = 2000
+PROGRESS_INTERVAL = 10
+# Chunks queued per worker, bounds the parsed rows waiting in memory
+IN_FLIGHT_PER_WORKER = 2
+
+def _init_worker():
+    # Failed cards are counted in the result, one error line per card would bury the progress
+    loger.set_module_level('boss_parser', 'CRITICAL')
+
+def reparse_chunk(entries):
+    """
+    Read and parse a chunk of archived pages, runs in a worker process
+
+    Args:
+        entries (list): Archive entries
+
+    Returns:
+        dict: rows (parsed job dicts), pages, empty_pages, unreadable_pages and cards
+    """
+    result = {'rows': [], 'pages': 0, 'empty_pages': 0, 'unreadable_pages': 0, 'cards': 0}
+    for entry in entries:
+        try:
+            page_source = PageArchive.read(entry)
+        except Exception as e:
+            result['unreadable_pages'] += 1
+            print(f"Error reading archived page {entry['path']}: {str(e)}", level="WARNING")
+            continue
+        n_cards, items, _ = replay_page(entry, page_source)
+        result['pages'] += 1
+        result['empty_pages'] += n_cards == 0
+        result['cards'] += n_cards
+        result['rows'].extend(items)
+    return result
+
+def iter_chunks(entries, size):
+    """Group an entry iterator into lists of up to size entries"""
+    chunk = []
+    for entry in entries:
+        chunk.append(entry)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def delete_reparsed(storage, targets):
+    """
+    Delete stored listings that the re-parse replaces
+
+    Args:
+        storage (DataStorage): MySQL or SQLite storage
+        targets (set): (create_time, category, sub_category) of the archived pages
+
+    Returns:
+        int: Number of deleted rows
+    """
+    deleted = 0
+    for create_time, category, sub_category in sorted(targets):
+        deleted += storage.delete_data(
+            "DELETE FROM job_info WHERE create_time = %s AND category = %s AND sub_category = %s",
+            (create_time, category, sub_category)) or 0
+    return deleted
+
+def reparse_archive(archive, storage, workers=None, chunk_pages=DEFAULT_CHUNK_PAGES, batch_rows=DEFAULT_BATCH_ROWS,
+                    start_date=None, end_date=None, category=None, replace=False):
+    """
+    Parse archived pages in a process pool and stream the jobs into storage
+
+    Workers read and parse chunks of pages with the HTML extractor; the
+    parent writes the rows through save_data in batch_rows batches. At most
+    IN_FLIGHT_PER_WORKER chunks per worker are queued or waiting to be
+    stored, so memory stays flat however large the archive is.
+
+    Args:
+        archive (PageArchive): Archive to re-parse
+        storage (DataStorage): Destination storage
+        workers (int): Worker processes, all cores if None
+        chunk_pages (int): Pages handed to a worker at a time
+        batch_rows (int): Rows per save_data call
+        start_date (str): First capture day (YYYY-MM-DD), inclusive
+        end_date (str): Last capture day (YYYY-MM-DD), inclusive
+        category (str): Only pages of this primary category
+        replace (bool): First delete the stored listings of the archived days and
+            categories (MySQL/SQLite), so the backfill does not duplicate them
+
+    Returns:
+        dict: Page, card and row counts, deleted rows and throughput
+    """
+    if replace and storage.storage_type not in SQL_STORAGE_TYPES:
+        raise ValueError("Replacing stored listings is only supported for MySQL and SQLite storage")
+    workers = workers or os.cpu_count() or 1
+
+    # A pass over the manifests only, gives the total for progress and the listings to replace
+    total, targets = 0, set()
+    for entry in archive.entries(start_date, end_date, category):
+        total += 1
+        targets.add((entry['date'], entry['category'], entry['sub_category']))
+    print(f"Re-parsing {total} archived pages with {workers} workers")
+
+    deleted = 0
+    if replace and targets:
+        deleted = delete_reparsed(storage, targets)
+        print(f"Deleted {deleted} stored listings of {len(targets)} archived day/category pairs")
+
+    summary = {'pages': 0, 'empty_pages': 0, 'unreadable_pages': 0, 'cards': 0, 'rows': 0}
+    buffer = []
+    start = last_report = time.perf_counter()
+
+    def collect(future):
+        nonlocal buffer, last_report
+        result = future.result()
+        for key in ('pages', 'empty_pages', 'unreadable_pages', 'cards'):
+            summary[key] += result[key]
+        buffer.extend(result['rows'])
+        while len(buffer) >= batch_rows:
+            storage.save_data(buffer[:batch_rows])
+            summary['rows'] += batch_rows
+            buffer = buffer[batch_rows:]
+        now = time.perf_counter()
+        if now - last_report >= PROGRESS_INTERVAL:
+            last_report = now
+            done = summary['pages'] + summary['unreadable_pages']
+            rate = done / (now - start)
+            eta = (total - done) / rate if rate > 0 else 0
+            print(f"Progress {done}/{total} pages, {summary['rows']} rows stored, "
+                  f"{rate:.1f} pages/s, ETA {eta:.0f}s")
+
+    # Spawned workers do not inherit the logger threads or database connections of this process
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as pool:
+        pending = set()
+        for chunk in iter_chunks(archive.entries(start_date, end_date, category), chunk_pages):
+            pending.add(pool.submit(reparse_chunk, chunk))
+            if len(pending) >= workers * IN_FLIGHT_PER_WORKER:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    collect(future)
+        for future in list(pending):
+            collect(future)
+    if buffer:
+        storage.save_data(buffer)
+        summary['rows'] += len(buffer)
+
+    if replace:
+        # Replaced listings may leave descriptions unreferenced
+        storage.prune_descriptions()
+    elapsed = time.perf_counter() - start
+    summary.update({
+        'deleted_rows': deleted,
+        'workers': workers,
+        'elapsed_s': round(elapsed, 3),
+        'pages_per_s': round(summary['pages'] / elapsed, 1) if elapsed > 0 else None,
+        'rows_per_s': round(summary['rows'] / elapsed, 1) if elapsed > 0 else None,
+    })
+    return summary
+
+def parse_arguments():
+    """
+    Parse command line arguments
+
+    Returns:
+        argparse.Namespace: Parsed arguments
+    """
+    parser = argparse.ArgumentParser(description='Re-parse archived list pages into storage on all cores')
+    parser.add_argument('--archive-dir', type=str, default=os.path.join('result', DEFAULT_ARCHIVE_DIR),
+                        help='Archive written by boss_selenium.py --archive-pages')
+    parser.add_argument('--storage', type=str, default='sqlite', choices=['mysql', 'sqlite', 'csv'],
+                        help='Storage backend receiving the parsed listings')
+    parser.add_argument('--output-dir', type=str, default='result',
+                        help='Directory of the SQLite database or CSV files')
+    parser.add_argument('--csv-codec', type=str, default='none', choices=['none', 'gzip', 'zstd'],
+                        help='Compression of CSV output')
+    parser.add_argument('--start-date', type=str, default=None, help='First capture day (YYYY-MM-DD)')
+    parser.add_argument('--end-date', type=str, default=None, help='Last capture day (YYYY-MM-DD)')
+    parser.add_argument('--category', type=str, default=None, help='Only re-parse this primary category')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes, default all cores')
+    parser.add_argument('--chunk-pages', type=int, default=DEFAULT_CHUNK_PAGES,
+                        help='Pages handed to a worker at a time')
+    parser.add_argument('--batch-rows', type=int, default=DEFAULT_BATCH_ROWS, help='Rows per storage write')
+    parser.add_argument('--replace', action='store_true',
+                        help='Delete stored listings of the archived days and categories first (MySQL/SQLite)')
+    return parser.parse_args()
+
+def main():
+    args = parse_arguments()
+    # One success line per batch would bury the progress lines
+    loger.set_module_level('database', 'WARNING')
+    db_config = DEFAULT_DB_CONFIG if args.storage == 'mysql' else None
+    storage = DataStorage(args.output_dir, args.storage, db_config, csv_codec=args.csv_codec)
+    try:
+        summary = reparse_archive(PageArchive(args.archive_dir), storage, args.workers, args.chunk_pages,
+                                  args.batch_rows, args.start_date, args.end_date, args.category, args.replace)
+    finally:
+        storage.close()
+    print(f"Re-parsed {summary['pages']} pages ({summary['unreadable_pages']} unreadable, "
+          f"{summary['empty_pages']} without job cards): {summary['rows']}/{summary['cards']} job cards stored "
+          f"in {summary['elapsed_s']}s, {summary['pages_per_s']} pages/s with {summary['workers']} workers")
+    return summary
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+#!/usr/bin/python3
+# encoding: utf-8
+# @author: sunhao
+# @contact: smartadpole@163.com
+# @file: __init__.py
+# @time: 2026/10/19 17:30
+# @function: Offline benchmarks of the crawler and storage backends.
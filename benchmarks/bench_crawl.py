@@ -0,0 +1,245 @@
+#!/usr/bin/python3
+# encoding: utf-8
+# @author: sunhao
+# @contact: smartadpole@163.com
+# @file: bench_crawl.py
+# @time: 2026/10/19 17:30
+# @function: End-to-end crawler benchmark against the local fixture site.
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+import loger
+from crawl_stats import CrawlStats, percentile
+from benchmarks.fixture_site import SyntheticSite, FixtureServer
+
+class NullStorage:
+    """Storage that only counts rows, isolating the crawler from backend cost"""
+    storage_type = 'none'
+
+    def __init__(self):
+        self.rows = 0
+
+    def save_data(self, data_rows):
+        self.rows += len(data_rows)
+
+    def save_company_info(self, company_info):
+        pass
+
+    def save_job_listings(self, job_listings, company_name):
+        self.rows += len(job_listings)
+
+    def close(self):
+        pass
+
+class TimedBrowser:
+    def __init__(self, browser):
+        """
+        Proxy timing the navigations issued through the driver
+
+        Clicks that navigate are timed by the crawler stats instead.
+
+        Args:
+            browser (webdriver): Wrapped browser
+        """
+        self._browser = browser
+        self.latencies = []
+
+    def _timed(self, method, *args):
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+
+    def get(self, url):
+        return self._timed(self._browser.get, url)
+
+    def back(self):
+        return self._timed(self._browser.back)
+
+    def __getattr__(self, name):
+        return getattr(self._browser, name)
+
+def max_rss_mb():
+    """
+    Peak resident set size of this process and of its reaped children
+
+    Returns:
+        tuple: (self MB, children MB), None where unavailable
+    """
+    if resource is None:
+        return None, None
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return (round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1),
+            round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale, 1))
+
+def latency_summary(values):
+    """Count, mean, p50, p95 and max of latencies in milliseconds"""
+    values = sorted(values)
+    if not values:
+        return {'count': 0}
+    return {
+        'count': len(values),
+        'mean_ms': round(sum(values) / len(values) * 1000, 1),
+        'p50_ms': round(percentile(values, 50) * 1000, 1),
+        'p95_ms': round(percentile(values, 95) * 1000, 1),
+        'max_ms': round(values[-1] * 1000, 1),
+    }
+
+def make_storage(kind, work_dir):
+    """
+    Storage used by the job crawl
+
+    Args:
+        kind (str): 'none', 'csv' or 'sqlite'
+        work_dir (str): Temporary output directory
+
+    Returns:
+        Storage instance with save_data/close
+    """
+    if kind == 'none':
+        return NullStorage()
+    from database.data_storage import DataStorage
+    return DataStorage(work_dir, kind)
+
+def bench_jobs(browser, server, storage, work_dir):
+    """
+    Run scrape_job_listings once over the fixture site
+
+    Returns:
+        dict: Jobs, throughput, page latency and Python heap peak
+    """
+    from boss_selenium import scrape_job_listings
+
+    stats = CrawlStats(metrics=None)
+    served_before = server.pages_served
+    tracemalloc.start()
+    start = time.perf_counter()
+    scrape_job_listings(browser, storage, os.path.join(work_dir, 'jobs.csv'), stats,
+                        base_url=server.base_url, scroll_delay=(0, 0))
+    elapsed = time.perf_counter() - start
+    _, heap_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    summary = stats.summary()
+    page_load = summary['stages'].get('page_load', {})
+    return {
+        'jobs': summary['jobs'],
+        'expected_jobs': server.site.total_jobs,
+        'elapsed_s': round(elapsed, 3),
+        'jobs_per_s': round(summary['jobs'] / elapsed, 2) if elapsed > 0 else 0.0,
+        'pages': server.pages_served - served_before,
+        'page_load_ms': {key.replace('_s', '_ms'): round(value * 1000, 1) if isinstance(value, float) else value
+                         for key, value in page_load.items()},
+        'stages': summary['stages'],
+        'errors': summary['errors'],
+        'python_heap_peak_mb': round(heap_peak / 1024 / 1024, 1),
+    }
+
+def bench_company(browser, server, company):
+    """
+    Run scrape_company_info once over the fixture site
+
+    Returns:
+        dict: Jobs, throughput, navigation latency and Python heap peak
+    """
+    from company_crawler import scrape_company_info
+
+    storage = NullStorage()
+    timed = TimedBrowser(browser)
+    served_before = server.pages_served
+    tracemalloc.start()
+    start = time.perf_counter()
+    scrape_company_info(timed, company, storage, base_url=server.base_url,
+                        page_delay=0, detail_delay=0, back_delay=0)
+    elapsed = time.perf_counter() - start
+    _, heap_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'jobs': storage.rows,
+        'expected_jobs': server.site.jobs_per_page,
+        'elapsed_s': round(elapsed, 3),
+        'jobs_per_s': round(storage.rows / elapsed, 2) if elapsed > 0 else 0.0,
+        'pages': server.pages_served - served_before,
+        'navigation_ms': latency_summary(timed.latencies),
+        'python_heap_peak_mb': round(heap_peak / 1024 / 1024, 1),
+    }
+
+def parse_arguments():
+    """
+    Parse command line arguments
+
+    Returns:
+        argparse.Namespace: Parsed arguments
+    """
+    parser = argparse.ArgumentParser(description='Benchmark the crawlers against a local fixture site')
+    parser.add_argument('--target', type=str, default='all', choices=['jobs', 'company', 'all'],
+                        help='Crawler to benchmark')
+    parser.add_argument('--driver-type', type=str, default=None, choices=['chrome', 'edge', 'firefox'],
+                        help='Browser to drive (default: first available)')
+    parser.add_argument('--show-browser', action='store_true',
+                        help='Run the browser with a window instead of headless')
+    parser.add_argument('--categories', type=int, default=4, help='Categories on the homepage')
+    parser.add_argument('--sub-categories', type=int, default=5, help='List pages per category')
+    parser.add_argument('--jobs-per-page', type=int, default=30, help='Job cards per page')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response')
+    parser.add_argument('--pages-dir', type=str, default=None,
+                        help='Recorded pages served instead of synthetic ones where present')
+    parser.add_argument('--storage', type=str, default='none', choices=['none', 'csv', 'sqlite'],
+                        help='Storage of the job crawl, none to measure the crawler alone')
+    parser.add_argument('--company', type=str, default='示例科技', help='Company searched by the company crawl')
+    parser.add_argument('--output', type=str, default=None, help='Write the results as JSON to this file')
+    return parser.parse_args()
+
+def main():
+    from browser_manager import get_browser
+
+    args = parse_arguments()
+    site = SyntheticSite(args.categories, args.sub_categories, args.jobs_per_page)
+    results = {'config': vars(args)}
+    browser = None
+    with tempfile.TemporaryDirectory(prefix='bench_crawl_') as work_dir, \
+            FixtureServer(site, latency=args.latency, pages_dir=args.pages_dir) as server:
+        try:
+            browser = get_browser(args.driver_type, headless=not args.show_browser)
+            if browser is None:
+                raise RuntimeError("No browser could be started")
+            if args.target in ('jobs', 'all'):
+                storage = make_storage(args.storage, work_dir)
+                try:
+                    results['jobs'] = bench_jobs(browser, server, storage, work_dir)
+                finally:
+                    storage.close()
+            if args.target in ('company', 'all'):
+                results['company'] = bench_company(browser, server, args.company)
+        finally:
+            if browser is not None:
+                browser.quit()
+    results['max_rss_mb'], results['children_max_rss_mb'] = max_rss_mb()
+
+    for name in ('jobs', 'company'):
+        if name in results:
+            r = results[name]
+            print(f"{name}: {r['jobs']}/{r['expected_jobs']} jobs in {r['elapsed_s']:.2f}s "
+                  f"= {r['jobs_per_s']} jobs/s over {r['pages']} pages, heap peak {r['python_heap_peak_mb']} MB")
+    print(f"Max RSS: {results['max_rss_mb']} MB (browser/driver children: {results['children_max_rss_mb']} MB)")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Results written to {args.output}")
+    return results
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/python3
+# encoding: utf-8
+# @author: sunhao
+# @contact: smartadpole@163.com
+# @file: bench_parser.py
+# @time: 2026/10/19 19:00
+# @function: Browser-free benchmark and profile of the job list parsers.
+
+import io
+import json
+import time
+import pstats
+import argparse
+import cProfile
+from collections import Counter
+import loger
+from boss_parser import parse_job_listings, parse_job_listings_html
+from benchmarks.fixture_site import SyntheticSite
+from benchmarks.fake_webdriver import FakeWebDriver, site_loader
+
+MODES = ('webdriver', 'html')
+
+def load_pages(pages, jobs_per_page, seed=0, archive_dir=None):
+    """
+    Pages to parse
+
+    Args:
+        pages (int): Number of synthetic list pages, or the maximum read from the archive
+        jobs_per_page (int): Job cards per synthetic page
+        seed (int): Random seed of the synthetic pages
+        archive_dir (str): Read pages from this page archive instead
+
+    Returns:
+        list: (category, sub_category, page_source) tuples
+    """
+    if archive_dir:
+        from page_archive import PageArchive
+
+        archive = PageArchive(archive_dir)
+        loaded = []
+        for entry in archive.entries():
+            loaded.append((entry['category'], entry['sub_category'], archive.read(entry)))
+            if len(loaded) >= pages:
+                break
+        return loaded
+    site = SyntheticSite(categories=1, sub_categories=pages, jobs_per_page=jobs_per_page, seed=seed)
+    return [(site.categories[0], f"{site.categories[0]}-{i}", site.list_page(0, i)) for i in range(pages)]
+
+def bench_mode(mode, pages, latency=0.0, profile=False):
+    """
+    Parse all pages with one extractor
+
+    Args:
+        mode (str): 'webdriver' runs parse_job_listings on FakeWebDriver, 'html' runs parse_job_listings_html;
+            webdriver timings exclude building the DOM, which a real browser has already done
+        pages (list): (category, sub_category, page_source) tuples
+        latency (float): Simulated seconds per driver call in webdriver mode
+        profile (bool): Collect a cProfile of the parse calls
+
+    Returns:
+        tuple: (result dict, pstats.Stats or None)
+    """
+    profiler = cProfile.Profile() if profile else None
+    drivers = []
+    if mode == 'webdriver':
+        drivers = [FakeWebDriver(page_source=source, url=f"http://fixture/list/{i}", latency=latency)
+                   for i, (_, _, source) in enumerate(pages)]
+    jobs, elapsed = 0, 0.0
+    for i, (category, sub_category, source) in enumerate(pages):
+        start = time.perf_counter()
+        if profiler:
+            profiler.enable()
+        if mode == 'webdriver':
+            items = parse_job_listings(drivers[i], category, sub_category)
+        else:
+            items = parse_job_listings_html(source, category, sub_category)
+        if profiler:
+            profiler.disable()
+        elapsed += time.perf_counter() - start
+        jobs += len(items)
+    calls = Counter()
+    for driver in drivers:
+        calls.update(driver.calls)
+    result = {
+        'mode': mode,
+        'latency_ms': latency * 1000 if mode == 'webdriver' else None,
+        'pages': len(pages),
+        'jobs': jobs,
+        'elapsed_s': round(elapsed, 3),
+        'jobs_per_s': round(jobs / elapsed, 1) if elapsed > 0 else None,
+        'driver_calls': dict(calls),
+        'driver_calls_per_job': round(sum(calls.values()) / jobs, 1) if jobs and calls else None,
+    }
+    return result, (pstats.Stats(profiler) if profiler else None)
+
+def bench_crawl(categories, sub_categories, jobs_per_page, latency=0.0):
+    """
+    Run the whole scrape_job_listings loop in-process over the synthetic site
+
+    Returns:
+        dict: Jobs, elapsed time, driver calls and per-stage timings
+    """
+    from boss_selenium import scrape_job_listings
+    from crawl_stats import CrawlStats
+    from benchmarks.bench_crawl import NullStorage
+
+    site = SyntheticSite(categories, sub_categories, jobs_per_page)
+    driver = FakeWebDriver(loader=site_loader(site), latency=latency)
+    stats = CrawlStats(metrics=None)
+    start = time.perf_counter()
+    scrape_job_listings(driver, NullStorage(), None, stats, base_url='http://fixture',
+                        scroll_delay=(0, 0))
+    elapsed = time.perf_counter() - start
+    summary = stats.summary()
+    return {
+        'mode': 'crawl',
+        'latency_ms': latency * 1000,
+        'jobs': summary['jobs'],
+        'expected_jobs': site.total_jobs,
+        'elapsed_s': round(elapsed, 3),
+        'jobs_per_s': round(summary['jobs'] / elapsed, 1) if elapsed > 0 else None,
+        'driver_calls': dict(driver.calls),
+        'stages': summary['stages'],
+    }
+
+def parse_arguments():
+    """
+    Parse command line arguments
+
+    Returns:
+        argparse.Namespace: Parsed arguments
+    """
+    parser = argparse.ArgumentParser(description='Benchmark the job list parsers without a browser')
+    parser.add_argument('--modes', type=str, default=','.join(MODES),
+                        help=f"Comma separated extractors from {', '.join(MODES)}")
+    parser.add_argument('--pages', type=int, default=50, help='List pages to parse')
+    parser.add_argument('--jobs-per-page', type=int, default=30, help='Job cards per synthetic page')
+    parser.add_argument('--archive-dir', type=str, default=None,
+                        help='Parse pages from a page archive instead of synthetic ones')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='Simulated chromedriver round trip in seconds per driver call, e.g. 0.002')
+    parser.add_argument('--crawl', action='store_true',
+                        help='Also run the full scrape_job_listings loop in-process')
+    parser.add_argument('--profile', type=int, default=0,
+                        help='Print the N most expensive functions by cumulative time')
+    parser.add_argument('--output', type=str, default=None, help='Write the results as JSON to this file')
+    return parser.parse_args()
+
+def main():
+    args = parse_arguments()
+    # One debug/error line per card would dominate the parse time
+    loger.set_module_level('boss_parser', 'CRITICAL')
+    loger.set_module_level('boss_selenium', 'WARNING')
+    pages = load_pages(args.pages, args.jobs_per_page, archive_dir=args.archive_dir)
+    results = []
+    for mode in [m.strip() for m in args.modes.split(',') if m.strip()]:
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode: {mode}, choose from {', '.join(MODES)}")
+        result, stats = bench_mode(mode, pages, args.latency, profile=args.profile > 0)
+        results.append(result)
+        print(f"{mode}: {result['jobs']} jobs from {result['pages']} pages in {result['elapsed_s']}s "
+              f"= {result['jobs_per_s']} jobs/s, {result['driver_calls_per_job']} driver calls per job")
+        if stats:
+            out = io.StringIO()
+            stats.stream = out
+            stats.sort_stats('cumulative').print_stats(args.profile)
+            print(f"Profile of {mode}:\n{out.getvalue()}")
+    if args.crawl:
+        result = bench_crawl(categories=2, sub_categories=max(args.pages // 2, 1), jobs_per_page=args.jobs_per_page,
+                             latency=args.latency)
+        results.append(result)
+        print(f"crawl: {result['jobs']}/{result['expected_jobs']} jobs in {result['elapsed_s']}s "
+              f"= {result['jobs_per_s']} jobs/s")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Results written to {args.output}")
+    return results
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+#!/usr/bin/python3
+# encoding: utf-8
+# @author: sunhao
+# @contact: smartadpole@163.com
+# @file: bench_storage.py
+# @time: 2026/10/19 18:00
+# @function: Storage backend microbenchmark with synthetic job listings.
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import multiprocessing
+from datetime import date, timedelta
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+import loger
+from crawl_stats import percentile
+from benchmarks.fixture_site import CATEGORY_NAMES, synthetic_job
+
+# name -> (handler kind, CSV codec)
+BACKENDS = {
+    'csv': ('csv', 'none'),
+    'csv-gzip': ('csv', 'gzip'),
+    'csv-zstd': ('csv', 'zstd'),
+    'sqlite': ('sqlite', None),
+    'mysql': ('mysql', None),
+}
+DEFAULT_BACKENDS = 'csv,csv-gzip,sqlite'
+BENCH_DATABASE = 'spider_bench'
+
+def synthetic_rows(count, seed=0, distinct_descriptions=None, days=7):
+    """
+    Job rows shaped like boss_parser.extract_job_data output
+
+    Args:
+        count (int): Number of rows
+        seed (int): Random seed
+        distinct_descriptions (int): Reuse this many descriptions, None for a new one per row
+        days (int): Spread create_time over this many days up to today
+
+    Returns:
+        list: Rows as dicts
+    """
+    rng = random.Random(seed)
+    descriptions = None
+    if distinct_descriptions:
+        descriptions = [synthetic_job(rng, '')['desc'] for _ in range(distinct_descriptions)]
+    today = date.today()
+    rows = []
+    for n in range(count):
+        category = rng.choice(CATEGORY_NAMES)
+        job = synthetic_job(rng, f"{category}工程师{n}")
+        rows.append({
+            "category": category,
+            "sub_category": f"{category}-{rng.randint(0, 9)}",
+            "job_title": job['title'],
+            "province": job['location'].split('-')[0],
+            "job_location": job['location'],
+            "job_company": job['company'],
+            "job_industry": job['industry'],
+            "job_finance": job['finance'],
+            "job_scale": job['scale'],
+            "job_welfare": job['welfare'],
+            "job_salary_range": job['salary'],
+            "job_experience": job['experience'],
+            "job_education": job['education'],
+            "job_skills": ",".join(job['skills']),
+            "job_address": job['address'],
+            "job_desc": rng.choice(descriptions) if descriptions else job['desc'],
+            "create_time": (today - timedelta(days=rng.randrange(days))).strftime('%Y-%m-%d'),
+        })
+    return rows
+
+def max_rss_mb():
+    """Peak resident set size of this process in MB, None where unavailable"""
+    if resource is None:
+        return None
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1)
+
+def dir_size(path):
+    """Total size in bytes of the files below path"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+def open_handler(backend, work_dir, batch_size, db_config):
+    """
+    Create the handler of a backend with its tables
+
+    Args:
+        backend (str): Key of BACKENDS
+        work_dir (str): Directory of the file based backends
+        batch_size (int): Rows per transaction of the SQLite handler
+        db_config (dict): MySQL connection settings
+
+    Returns:
+        Handler with save_data/close
+    """
+    from database import CSVHandler, SQLiteHandler, MySQLHandler
+
+    kind, codec = BACKENDS[backend]
+    if kind == 'csv':
+        return CSVHandler(work_dir, codec=codec)
+    if kind == 'sqlite':
+        handler = SQLiteHandler(work_dir, batch_size=batch_size)
+    else:
+        handler = MySQLHandler(**db_config)
+    handler.create_database_and_table()
+    return handler
+
+def mysql_size(handler):
+    """Data and index bytes of the benchmark schema"""
+    handler.cursor.execute("SELECT table_name FROM information_schema.tables WHERE table_schema = %s",
+                           (handler.database,))
+    for row in handler.cursor.fetchall():
+        # Refresh the size estimates before reading them
+        handler.cursor.execute(f"ANALYZE TABLE `{row['table_name']}`")
+        handler.cursor.fetchall()
+    handler.cursor.execute("SELECT SUM(data_length + index_length) AS size FROM information_schema.tables "
+                           "WHERE table_schema = %s", (handler.database,))
+    return int(handler.cursor.fetchone()['size'] or 0)
+
+def reset_mysql_database(db_config, create=True):
+    """
+    Drop the benchmark schema and optionally create it empty
+
+    Args:
+        db_config (dict): MySQL connection settings, 'database' names the scratch schema
+        create (bool): Create the schema again after dropping it
+    """
+    import pymysql
+
+    config = dict(db_config)
+    database = config.pop('database')
+    conn = pymysql.connect(**config)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP DATABASE IF EXISTS `{database}`")
+            if create:
+                cursor.execute(f"CREATE DATABASE `{database}` DEFAULT CHARSET utf8mb4")
+        conn.commit()
+    finally:
+        conn.close()
+
+def run_backend(backend, rows, batch_size, seed, distinct_descriptions, db_config):
+    """
+    Store synthetic rows through one backend and measure it
+
+    Runs in a fresh process, so the peak RSS belongs to this backend alone.
+
+    Args:
+        backend (str): Key of BACKENDS
+        rows (int): Number of rows
+        batch_size (int): Rows per save_data call
+        seed (int): Random seed of the rows
+        distinct_descriptions (int): Distinct descriptions among the rows, None for all distinct
+        db_config (dict): MySQL connection settings
+
+    Returns:
+        dict: Throughput, save_data latency, storage size and memory
+    """
+    # Per-batch success messages would dominate the measured time
+    loger.set_module_level('database', 'WARNING')
+    data = synthetic_rows(rows, seed, distinct_descriptions)
+    rss_before = max_rss_mb()
+    work_dir = tempfile.mkdtemp(prefix=f'bench_{backend}_')
+    kind = BACKENDS[backend][0]
+    handler = None
+    try:
+        if kind == 'mysql':
+            reset_mysql_database(db_config)
+        handler = open_handler(backend, work_dir, batch_size, db_config)
+        latencies = []
+        start = time.perf_counter()
+        for offset in range(0, len(data), batch_size):
+            batch_start = time.perf_counter()
+            handler.save_data(data[offset:offset + batch_size])
+            latencies.append(time.perf_counter() - batch_start)
+        if kind == 'mysql':
+            elapsed = time.perf_counter() - start
+            size = mysql_size(handler)
+            handler.close()
+        else:
+            # Buffered CSV rows and the SQLite WAL are only complete after close
+            handler.close()
+            elapsed = time.perf_counter() - start
+            size = dir_size(work_dir)
+        handler = None
+        latencies.sort()
+        return {
+            'backend': backend,
+            'rows': len(data),
+            'batch_size': batch_size,
+            'elapsed_s': round(elapsed, 3),
+            'rows_per_s': round(len(data) / elapsed, 1) if elapsed > 0 else 0.0,
+            'batch_p50_ms': round(percentile(latencies, 50) * 1000, 2),
+            'batch_p95_ms': round(percentile(latencies, 95) * 1000, 2),
+            'batch_max_ms': round(latencies[-1] * 1000, 2),
+            'size_mb': round(size / 1024 / 1024, 2),
+            'bytes_per_row': round(size / len(data), 1) if data else 0.0,
+            'peak_rss_mb': max_rss_mb(),
+            'rss_growth_mb': round(max_rss_mb() - rss_before, 1) if resource else None,
+        }
+    finally:
+        if handler is not None:
+            handler.close()
+        shutil.rmtree(work_dir, ignore_errors=True)
+        if kind == 'mysql':
+            reset_mysql_database(db_config, create=False)
+
+def run_benchmarks(backends, rows, batch_sizes, seed=0, distinct_descriptions=None, db_config=None):
+    """
+    Benchmark every backend and batch size in its own process
+
+    Args:
+        backends (list): Keys of BACKENDS
+        rows (int): Rows per run
+        batch_sizes (list): Rows per save_data call
+        seed (int): Random seed of the rows
+        distinct_descriptions (int): Distinct descriptions among the rows
+        db_config (dict): MySQL connection settings
+
+    Returns:
+        list: Result dicts, with 'error' for runs that failed
+    """
+    results = []
+    context = multiprocessing.get_context('spawn')
+    for backend in backends:
+        for batch_size in batch_sizes:
+            print(f"Benchmarking {backend} with {rows} rows in batches of {batch_size}")
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                future = pool.submit(run_backend, backend, rows, batch_size, seed, distinct_descriptions, db_config)
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    print(f"Benchmark of {backend} failed: {str(e)}", level="ERROR")
+                    results.append({'backend': backend, 'rows': rows, 'batch_size': batch_size, 'error': str(e)})
+    return results
+
+def format_table(results):
+    """Render results as a fixed-width text table"""
+    lines = [f"{'backend':<10} {'batch':>6} {'rows/s':>10} {'p50 ms':>9} {'p95 ms':>9} "
+             f"{'size MB':>9} {'B/row':>8} {'RSS MB':>8}"]
+    for r in results:
+        if 'error' in r:
+            lines.append(f"{r['backend']:<10} {r['batch_size']:>6} failed: {r['error']}")
+            continue
+        lines.append(f"{r['backend']:<10} {r['batch_size']:>6} {r['rows_per_s']:>10} {r['batch_p50_ms']:>9} "
+                     f"{r['batch_p95_ms']:>9} {r['size_mb']:>9} {r['bytes_per_row']:>8} {r['peak_rss_mb']!s:>8}")
+    return '\n'.join(lines)
+
+def parse_arguments():
+    """
+    Parse command line arguments
+
+    Returns:
+        argparse.Namespace: Parsed arguments
+    """
+    parser = argparse.ArgumentParser(description='Benchmark the storage backends with synthetic job listings')
+    parser.add_argument('--backends', type=str, default=DEFAULT_BACKENDS,
+                        help=f"Comma separated backends from {', '.join(BACKENDS)} (default: {DEFAULT_BACKENDS})")
+    parser.add_argument('--rows', type=int, default=20000, help='Rows stored per run')
+    parser.add_argument('--batch-sizes', type=str, default='100,1000',
+                        help='Comma separated rows per save_data call')
+    parser.add_argument('--distinct-descriptions', type=int, default=None,
+                        help='Reuse this many descriptions to mimic reposted listings (default: all distinct)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed of the rows')
+    parser.add_argument('--mysql-host', type=str, default=None, help='MySQL host (default: DEFAULT_DB_CONFIG)')
+    parser.add_argument('--mysql-port', type=int, default=3306, help='MySQL port')
+    parser.add_argument('--mysql-user', type=str, default=None, help='MySQL user (default: DEFAULT_DB_CONFIG)')
+    parser.add_argument('--mysql-password', type=str, default=None,
+                        help='MySQL password (default: DEFAULT_DB_CONFIG)')
+    parser.add_argument('--mysql-database', type=str, default=BENCH_DATABASE,
+                        help=f'Scratch schema, dropped before and after each run (default: {BENCH_DATABASE})')
+    parser.add_argument('--output', type=str, default=None, help='Write the results as JSON to this file')
+    return parser.parse_args()
+
+def main():
+    from database.data_storage import DEFAULT_DB_CONFIG
+
+    args = parse_arguments()
+    backends = [b.strip() for b in args.backends.split(',') if b.strip()]
+    unknown = [b for b in backends if b not in BACKENDS]
+    if unknown:
+        raise ValueError(f"Unknown backends: {', '.join(unknown)}, choose from {', '.join(BACKENDS)}")
+    batch_sizes = [int(b) for b in args.batch_sizes.split(',') if b.strip()]
+    db_config = {
+        'host': args.mysql_host or DEFAULT_DB_CONFIG['host'],
+        'port': args.mysql_port,
+        'user': args.mysql_user or DEFAULT_DB_CONFIG['user'],
+        'password': DEFAULT_DB_CONFIG['password'] if args.mysql_password is None else args.mysql_password,
+        'database': args.mysql_database,
+    }
+
+    results = run_benchmarks(backends, args.rows, batch_sizes, args.seed, args.distinct_descriptions, db_config)
+    print("Storage benchmark results:\n" + format_table(results))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Results written to {args.output}")
+    return results
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+#!/usr/bin/python3
+# encoding: utf-8
+# @author: sunhao
+# @contact: smartadpole@163.com
+# @file: fake_webdriver.py
+# @time: 2026/10/19 19:00
+# @function: In-process WebDriver stand-in over lxml for browser-free parser runs.
+
+import time
+from collections import Counter
+from urllib.parse import urljoin, urlsplit, parse_qs
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import NoSuchElementException, WebDriverException
+import loger
+from boss_parser import html_text
+
+try:
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
+
+try:
+    from lxml.cssselect import CSSSelector
+except ImportError:
+    CSSSelector = None
+
+def _xpath_for(by, value):
+    """Translate a Selenium locator into an XPath, None for CSS selectors"""
+    if by == By.XPATH:
+        return value
+    if by == By.ID:
+        return f'.//*[@id="{value}"]'
+    if by == By.CLASS_NAME:
+        return f'.//*[contains(concat(" ", normalize-space(@class), " "), " {value} ")]'
+    if by == By.TAG_NAME:
+        return f'.//{value}'
+    if by == By.NAME:
+        return f'.//*[@name="{value}"]'
+    if by == By.LINK_TEXT:
+        return f'.//a[normalize-space(.)="{value}"]'
+    if by == By.PARTIAL_LINK_TEXT:
+        return f'.//a[contains(., "{value}")]'
+    if by == By.CSS_SELECTOR:
+        return None
+    raise WebDriverException(f"Unsupported locator strategy: {by}")
+
+class FakeWebElement:
+    def __init__(self, element, driver):
+        """
+        WebElement stand-in wrapping an lxml element
+
+        Args:
+            element (lxml.html.HtmlElement): Wrapped element
+            driver (FakeWebDriver): Owning driver, charged with latency and call counts
+        """
+        self._element = element
+        self._driver = driver
+
+    def find_elements(self, by=By.ID, value=None):
+        self._driver._call('find_elements')
+        return self._driver._select(self._element, by, value)
+
+    def find_element(self, by=By.ID, value=None):
+        self._driver._call('find_element')
+        found = self._driver._select(self._element, by, value)
+        if not found:
+            raise NoSuchElementException(f"Unable to locate element: {by}={value}")
+        return found[0]
+
+    @property
+    def text(self):
+        self._driver._call('text')
+        return html_text(self._element)
+
+    @property
+    def tag_name(self):
+        return self._element.tag
+
+    def get_attribute(self, name):
+        self._driver._call('get_attribute')
+        return self._element.get(name)
+
+    def is_displayed(self):
+        return True
+
+    def click(self):
+        """Follow the href of a link, other clicks have no effect"""
+        self._driver._call('click')
+        link = self._element if self._element.tag == 'a' else next(iter(self._element.iterancestors('a')), None)
+        if link is not None and link.get('href'):
+            self._driver._navigate(urljoin(self._driver.current_url or '', link.get('href')))
+
+class FakeWebDriver:
+    def __init__(self, loader=None, page_source=None, url='about:blank', latency=0.0):
+        """
+        WebDriver stand-in serving pages from a loader and querying them with lxml
+
+        Enough of the WebDriver API for the parsers and crawl loops: get/back,
+        find_element(s) with XPath and simple locators, .text, link clicks and
+        no-op execute_script. Every call can be charged a fixed latency to model
+        the chromedriver round trip, and calls are counted per kind.
+
+        Args:
+            loader (callable): loader(url) -> HTML, None for a 404 page
+            page_source (str): Initial page, e.g. a saved list page
+            url (str): URL of the initial page
+            latency (float): Seconds slept on every driver or element call
+        """
+        if lxml_html is None:
+            raise ImportError("lxml is required for FakeWebDriver, install it with 'pip install lxml'")
+        self.loader = loader
+        self.latency = latency
+        self.calls = Counter()
+        self.scripts = []
+        self._history = []
+        self._tree = None
+        self.current_url = None
+        self.page_source = ''
+        if page_source is not None:
+            self._load(url, page_source)
+
+    def _call(self, kind):
+        self.calls[kind] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _load(self, url, page_source):
+        self.current_url = url
+        self.page_source = page_source or ''
+        self._tree = lxml_html.fromstring(self.page_source) if self.page_source.strip() else None
+
+    def _navigate(self, url, record=True):
+        old = urlsplit(self.current_url or '')
+        new = urlsplit(url)
+        if record and self.current_url is not None:
+            self._history.append((self.current_url, self.page_source))
+        if new.fragment and old._replace(fragment='') == new._replace(fragment=''):
+            # Fragment change keeps the document, as in a browser
+            self.current_url = url
+            return
+        if self.loader is None:
+            raise WebDriverException(f"No loader to navigate to {url}")
+        page_source = self.loader(url)
+        self._load(url, page_source if page_source is not None else '<html><body>404</body></html>')
+
+    def _select(self, element, by, value):
+        if element is None:
+            return []
+        xpath = _xpath_for(by, value)
+        if xpath is None:
+            if CSSSelector is None:
+                raise ImportError("cssselect is required for CSS locators, install it with 'pip install cssselect'")
+            found = CSSSelector(value)(element)
+        else:
+            found = element.xpath(xpath)
+        return [FakeWebElement(e, self) for e in found if hasattr(e, 'tag')]
+
+    def get(self, url):
+        self._call('get')
+        self._navigate(url)
+
+    def back(self):
+        self._call('back')
+        if self._history:
+            url, page_source = self._history.pop()
+            self._load(url, page_source)
+
+    def refresh(self):
+        self._call('refresh')
+        if self.current_url and self.loader:
+            self._navigate(self.current_url, record=False)
+
+    @property
+    def title(self):
+        titles = self._tree.xpath('//title') if self._tree is not None else []
+        return html_text(titles[0]) if titles else ''
+
+    def find_elements(self, by=By.ID, value=None):
+        self._call('find_elements')
+        return self._select(self._tree, by, value)
+
+    def find_element(self, by=By.ID, value=None):
+        self._call('find_element')
+        found = self._select(self._tree, by, value)
+        if not found:
+            raise NoSuchElementException(f"Unable to locate element: {by}={value}")
+        return found[0]
+
+    def execute_script(self, script, *args):
+        """Record the script without running it"""
+        self._call('execute_script')
+        self.scripts.append(script)
+        return None
+
+    def implicitly_wait(self, seconds):
+        pass
+
+    def delete_all_cookies(self):
+        self._call('delete_all_cookies')
+
+    def close(self):
+        pass
+
+    def quit(self):
+        self._history = []
+        self._tree = None
+
+def site_loader(site):
+    """
+    Loader serving a SyntheticSite in-process
+
+    Args:
+        site (SyntheticSite): Page generator
+
+    Returns:
+        callable: loader(url) -> HTML or None
+    """
+    def load(url):
+        parts = urlsplit(url)
+        return site.render(parts.path, parse_qs(parts.query))
+    return load
@@ -0,0 +1,286 @@
+#!/usr/bin/python3
+# encoding: utf-8
+# @author: sunhao
+# @contact: smartadpole@163.com
+# @file: fixture_site.py
+# @time: 2026/10/19 17:30
+# @function: Local stand-in for the BOSS site serving synthetic or recorded pages.
+
+import os
+import re
+import time
+import random
+import threading
+from html import escape
+from urllib.parse import urlsplit, parse_qs, quote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import loger
+
+CATEGORY_NAMES = ['后端开发', '前端/移动开发', '测试', '运维/技术支持', '数据', '人工智能', '产品经理', '设计']
+SKILLS = ['Java', 'Python', 'Go', 'C++', 'MySQL', 'Redis', 'Kafka', 'Spring', 'Linux', 'Docker', 'Kubernetes',
+          'React', 'Vue', 'TypeScript', 'Hadoop', 'Spark', 'PyTorch', 'TensorFlow']
+LOCATIONS = ['北京-海淀区', '北京-朝阳区', '上海-浦东新区', '深圳-南山区', '杭州-西湖区', '广州-天河区',
+             '成都-高新区', '武汉-洪山区']
+INDUSTRIES = ['互联网', '计算机软件', '电子商务', '游戏', '人工智能', '企业服务']
+FINANCES = ['未融资', '天使轮', 'A轮', 'B轮', 'C轮', '已上市', '不需要融资']
+SCALES = ['20-99人', '100-499人', '500-999人', '1000-9999人', '10000人以上']
+EXPERIENCES = ['经验不限', '1-3年', '3-5年', '5-10年']
+EDUCATIONS = ['学历不限', '大专', '本科', '硕士']
+WELFARES = ['五险一金', '带薪年假', '定期体检', '餐补', '股票期权', '弹性工作']
+
+PAGE_TEMPLATE = '<!DOCTYPE html><html><head><meta charset="utf-8"><title>{title}</title></head><body>{body}</body></html>'
+
+# Company page shows the clicked job in a side panel, like the live site
+DETAIL_SCRIPT = """<script>
+function showJob() {
+  var card = document.getElementById(location.hash.slice(1));
+  if (!card) { return; }
+  var body = document.querySelector('.job-detail-body');
+  body.querySelector('.desc').textContent = card.dataset.desc;
+  body.querySelector('.job-address-desc').textContent = card.dataset.address;
+  var skills = body.querySelector('.job-label-list');
+  skills.innerHTML = '';
+  card.dataset.skills.split(',').forEach(function (s) {
+    var li = document.createElement('li'); li.textContent = s; skills.appendChild(li);
+  });
+}
+window.addEventListener('hashchange', showJob);
+showJob();
+</script>"""
+
+def synthetic_job(rng, title):
+    """
+    Random job content
+
+    Args:
+        rng (random.Random): Seeded generator
+        title (str): Job title
+
+    Returns:
+        dict: title, salary, location, experience, education, company, industry,
+            finance, scale, skills (list), desc, address and welfare
+    """
+    low = rng.randint(5, 40)
+    return {
+        'title': title,
+        'salary': f"{low}-{low + rng.randint(2, 20)}K" + rng.choice(['', '·13薪', '·15薪']),
+        'location': rng.choice(LOCATIONS),
+        'experience': rng.choice(EXPERIENCES),
+        'education': rng.choice(EDUCATIONS),
+        'company': f"示例科技{rng.randint(1, 500)}",
+        'industry': rng.choice(INDUSTRIES),
+        'finance': rng.choice(FINANCES),
+        'scale': rng.choice(SCALES),
+        'skills': rng.sample(SKILLS, rng.randint(2, 5)),
+        'desc': ' '.join(rng.choice(SKILLS) for _ in range(rng.randint(40, 200))),
+        'address': f"{rng.choice(LOCATIONS)}示例路{rng.randint(1, 999)}号",
+        'welfare': ','.join(rng.sample(WELFARES, rng.randint(0, 4))),
+    }
+
+class SyntheticSite:
+    def __init__(self, categories=4, sub_categories=5, jobs_per_page=30, companies=5, seed=0):
+        """
+        Deterministic pages with the structure the crawler selectors expect
+
+        Args:
+            categories (int): Categories on the homepage menu
+            sub_categories (int): Sub-categories per category, one list page each
+            jobs_per_page (int): Job cards per list or company page
+            companies (int): Companies returned by the search page
+            seed (int): Random seed of the generated content
+        """
+        self.categories = [CATEGORY_NAMES[i % len(CATEGORY_NAMES)] + ('' if i < len(CATEGORY_NAMES) else str(i))
+                           for i in range(categories)]
+        self.sub_categories = sub_categories
+        self.jobs_per_page = jobs_per_page
+        self.companies = companies
+        self.seed = seed
+
+    @property
+    def total_jobs(self):
+        """Job cards reachable from the homepage"""
+        return len(self.categories) * self.sub_categories * self.jobs_per_page
+
+    def index_page(self):
+        """Homepage with the category menu"""
+        groups = []
+        for ci, category in enumerate(self.categories):
+            links = ''.join(f'<a href="/list/{ci}/{si}">{escape(category)}-{si}</a>'
+                            for si in range(self.sub_categories))
+            groups.append(f'<div class="menu-sub"><h4>{escape(category)}</h4><div class="text">{links}</div></div>')
+        return PAGE_TEMPLATE.format(title='首页', body=f'<div class="job-menu"><b>互联网/AI</b>{"".join(groups)}</div>')
+
+    def list_page(self, ci, si):
+        """List page of one sub-category"""
+        rng = random.Random(f"{self.seed}/{ci}/{si}")
+        cards = []
+        for n in range(self.jobs_per_page):
+            job = synthetic_job(rng, f"{self.categories[ci]}工程师{si}-{n}")
+            skills = ''.join(f'<li>{escape(s)}</li>' for s in job['skills'])
+            cards.append(
+                '<div class="job-card-wrapper"><div class="job-detail-box">'
+                f'<span class="job-name">{escape(job["title"])}</span>'
+                f'<span class="job-salary">{escape(job["salary"])}</span>'
+                f'<ul class="tag-list"><li><a>{escape(job["location"])}</a></li>'
+                f'<li>{escape(job["experience"])}</li><li>{escape(job["education"])}</li></ul>'
+                f'<div class="boss-info-attr">{escape(job["company"])}·{escape(job["industry"])}·'
+                f'{escape(job["finance"])}·{escape(job["scale"])}</div>'
+                f'<p class="desc">{escape(job["desc"])}</p>'
+                f'<ul class="job-label-list">{skills}</ul>'
+                f'<p class="job-address-desc">{escape(job["address"])}</p>'
+                '</div></div>')
+        return PAGE_TEMPLATE.format(title='职位列表', body=''.join(cards))
+
+    def search_page(self, query):
+        """Search results listing matching companies"""
+        cards = ''.join(f'<div class="c-company-card"><a class="card-content" href="/gongsi/{n}?query={quote(query)}">'
+                        f'{escape(query)}{n or ""}</a></div>' for n in range(self.companies))
+        return PAGE_TEMPLATE.format(title='搜索', body=cards)
+
+    def company_page(self, n, query):
+        """Company page with its job cards and a detail panel"""
+        rng = random.Random(f"{self.seed}/company/{n}")
+        name = f"{query}{n or ''}"
+        tags = ''.join(f'<span class="company-info-tag">{escape(v)}</span>'
+                       for v in (rng.choice(FINANCES), rng.choice(SCALES), rng.choice(INDUSTRIES)))
+        cards = []
+        for i in range(self.jobs_per_page):
+            job = synthetic_job(rng, f"{name}岗位{i}")
+            cards.append(
+                f'<div class="job-card-box" id="job-{i}" data-desc="{escape(job["desc"])}" '
+                f'data-address="{escape(job["address"])}" data-skills="{escape(",".join(job["skills"]))}">'
+                f'<a class="job-name" href="#job-{i}">{escape(job["title"])}</a>'
+                f'<span class="job-salary">{escape(job["salary"])}</span>'
+                f'<ul class="tag-list"><li>{escape(job["experience"])}</li><li>{escape(job["education"])}</li></ul>'
+                '</div>')
+        body = (f'<div class="c-company-card"><h1 class="company-name">{escape(name)}</h1>'
+                f'<div class="company-info">{tags}</div></div>'
+                f'<div class="job-list">{"".join(cards)}</div>'
+                '<div class="job-detail-body"><p class="desc"></p><ul class="job-label-list"></ul>'
+                '<p class="job-address-desc"></p></div>' + DETAIL_SCRIPT)
+        return PAGE_TEMPLATE.format(title=escape(name), body=body)
+
+    def render(self, path, query):
+        """
+        Render the page of a request
+
+        Args:
+            path (str): URL path
+            query (dict): Parsed query string
+
+        Returns:
+            str: HTML, None for unknown paths
+        """
+        if path in ('', '/'):
+            return self.index_page()
+        match = re.fullmatch(r'/list/(\d+)/(\d+)', path)
+        if match:
+            ci, si = int(match.group(1)), int(match.group(2))
+            if ci < len(self.categories) and si < self.sub_categories:
+                return self.list_page(ci, si)
+            return None
+        if path == '/web/geek/jobs':
+            return self.search_page(query.get('query', [''])[0])
+        match = re.fullmatch(r'/gongsi/(\d+)', path)
+        if match and int(match.group(1)) < self.companies:
+            return self.company_page(int(match.group(1)), query.get('query', [''])[0])
+        return None
+
+def recorded_page_path(pages_dir, path):
+    """
+    File of a recorded page: '/' maps to index.html, other paths to <path>.html
+
+    Args:
+        pages_dir (str): Directory of recorded pages
+        path (str): URL path without query
+
+    Returns:
+        str: File path inside pages_dir
+    """
+    relative = path.strip('/') or 'index'
+    if not os.path.splitext(relative)[1]:
+        relative += '.html'
+    return os.path.join(pages_dir, *relative.split('/'))
+
+class FixtureServer:
+    def __init__(self, site=None, host='127.0.0.1', port=0, latency=0.0, pages_dir=None):
+        """
+        HTTP server standing in for the BOSS site
+
+        Recorded pages in pages_dir take precedence over synthetic ones, so a
+        saved homepage can be combined with generated list pages.
+
+        Args:
+            site (SyntheticSite): Page generator, a default one if None
+            host (str): Bind address
+            port (int): TCP port, 0 for any free port
+            latency (float): Seconds added to every response to mimic the network
+            pages_dir (str): Directory of recorded pages (optional)
+        """
+        self.site = site or SyntheticSite()
+        self.latency = latency
+        self.pages_dir = pages_dir
+        self.pages_served = 0
+        self._lock = threading.Lock()
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                fixture._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        """Root URL to pass as base_url to the crawlers"""
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handle(self, request):
+        if self.latency:
+            time.sleep(self.latency)
+        url = urlsplit(request.path)
+        html = None
+        if self.pages_dir:
+            recorded = recorded_page_path(self.pages_dir, url.path)
+            if os.path.isfile(recorded):
+                with open(recorded, 'r', encoding='utf-8') as f:
+                    html = f.read()
+        if html is None:
+            html = self.site.render(url.path, parse_qs(url.query))
+        if html is None:
+            request.send_error(404)
+            return
+        body = html.encode('utf-8')
+        request.send_response(200)
+        request.send_header('Content-Type', 'text/html; charset=utf-8')
+        request.send_header('Content-Length', str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
+        with self._lock:
+            self.pages_served += 1
+
+    def start(self):
+        """Serve from a daemon thread"""
+        self._thread = threading.Thread(target=self.server.serve_forever, name='fixture-site', daemon=True)
+        self._thread.start()
+        print(f"Fixture site running at {self.base_url}")
+        return self
+
+    def stop(self):
+        """Shut the server down"""
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
@@ -9,6 +9,25 @@ import time
 from selenium.webdriver.common.by import By
 import loger
 
+try:
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
+
+# Selectors of the list page, shared by the Selenium and the HTML extractor
+JOB_CARD_XPATH = '//div[contains(@class, "job-detail-box")]'
+JOB_FIELD_XPATHS = {
+    "job_title": './/span[@class="job-name"]',
+    "job_salary_range": './/span[@class="job-salary"]',
+    "job_location": './/ul[@class="tag-list"]/li[1]/a',
+    "job_experience": './/ul[@class="tag-list"]/li[2]',
+    "job_education": './/ul[@class="tag-list"]/li[3]',
+    "job_desc": './/p[@class="desc"]',
+}
+COMPANY_INFO_XPATH = './/div[@class="boss-info-attr"]'
+JOB_SKILLS_XPATH = './/ul[@class="job-label-list"]/li'
+JOB_ADDRESS_XPATH = './/p[@class="job-address-desc"]'
+
 # City-province mapping dictionary
 CITY_MAP = {
     "北京": ["北京"],
@@ -76,19 +95,19 @@ def get_province_by_city(city_name, city_map):
             return province
     return ''
 
-def extract_job_data(job, category, sub_category):
+def new_job_data(category, sub_category, create_time=None):
     """
-    Extract job data from a job listing element
+    Empty job record with the category fields set
 
     Args:
-        job (WebElement): Job listing element
         category (str): Primary category
         sub_category (str): Secondary category
+        create_time (str): Crawl date (YYYY-MM-DD), today if None
 
     Returns:
-        dict: Extracted job data or None if critical data is missing
+        dict: Job data with empty fields
     """
-    data = {
+    return {
         "category": category,
         "sub_category": sub_category,
         "job_title": "",
@@ -105,35 +124,157 @@ def extract_job_data(job, category, sub_category):
         "job_skills": "",
         "job_address": "",
         "job_desc": "",
-        "create_time": datetime.now().strftime('%Y-%m-%d'),
+        "create_time": create_time or datetime.now().strftime('%Y-%m-%d'),
     }
+
+def fill_job_data(data, find_text, find_texts):
+    """
+    Fill a job record from one job card
+
+    Shared by the Selenium and the HTML extractor so both follow the same
+    selectors.
+
+    Args:
+        data (dict): Record from new_job_data, filled in place
+        find_text (callable): find_text(xpath) -> text of the first match, raises if there is none
+        find_texts (callable): find_texts(xpath) -> texts of all matches
+
+    Returns:
+        dict: The filled record
+    """
+    for field, xpath in JOB_FIELD_XPATHS.items():
+        data[field] = find_text(xpath)
+
+    info = find_text(COMPANY_INFO_XPATH).split('·')
+    data["job_company"] = info[0].strip() if len(info)>0 else ""
+    data["job_industry"] = info[1].strip() if len(info)>1 else ""
+    data["job_finance"] = info[2].strip() if len(info)>2 else ""
+    data["job_scale"] = info[3].strip() if len(info)>3 else ""
+
+    data["job_skills"] = ",".join(find_texts(JOB_SKILLS_XPATH))
+
+    try:
+        data["job_address"] = find_text(JOB_ADDRESS_XPATH)
+    except Exception:
+        pass
+
+    data["province"] = data["job_location"].split('-')[0] if '-' in data["job_location"] else ""
+    return data
+
+def extract_job_data(job, category, sub_category):
+    """
+    Extract job data from a job listing element
+
+    Args:
+        job (WebElement): Job listing element
+        category (str): Primary category
+        sub_category (str): Secondary category
+
+    Returns:
+        dict: Extracted job data or None if critical data is missing
+    """
+    data = new_job_data(category, sub_category)
+    try:
+        return fill_job_data(data,
+                             lambda xpath: job.find_element(By.XPATH, xpath).text,
+                             lambda xpath: [e.text for e in job.find_elements(By.XPATH, xpath)])
+    except Exception as e:
+        print(f"Error extracting job data: {e}", level="ERROR")
+        return None
+
+def html_text(element):
+    """
+    Visible text of an lxml element, close to Selenium's WebElement.text
+
+    Whitespace runs collapse to one space, <br> starts a new line, and script
+    and style content is skipped.
+
+    Args:
+        element (lxml.html.HtmlElement): Element
+
+    Returns:
+        str: Text
+    """
+    parts = []
+
+    def collect(node):
+        if not isinstance(node.tag, str) or node.tag in ('script', 'style'):
+            return
+        if node.tag == 'br':
+            parts.append('\n')
+        if node.text:
+            parts.append(node.text)
+        for child in node:
+            collect(child)
+            if child.tail:
+                parts.append(child.tail)
+
+    collect(element)
+    lines = (' '.join(line.split()) for line in ''.join(parts).splitlines())
+    return '\n'.join(line for line in lines if line)
+
+def job_cards_html(page_source):
+    """
+    Job card elements of a saved list page
+
+    Args:
+        page_source (str): HTML of a list page
+
+    Returns:
+        list: lxml elements of the job cards
+    """
+    if lxml_html is None:
+        raise ImportError("lxml is required to parse saved pages, install it with 'pip install lxml'")
+    if not page_source or not page_source.strip():
+        return []
+    return lxml_html.fromstring(page_source).xpath(JOB_CARD_XPATH)
+
+def extract_job_data_html(job, category, sub_category, create_time=None):
+    """
+    Extract job data from a job card of a saved page
+
+    Args:
+        job (lxml.html.HtmlElement): Job card element
+        category (str): Primary category
+        sub_category (str): Secondary category
+        create_time (str): Crawl date of the page (YYYY-MM-DD), today if None
+
+    Returns:
+        dict: Extracted job data or None if critical data is missing
+    """
+    def find_text(xpath):
+        found = job.xpath(xpath)
+        if not found:
+            raise LookupError(f"no element matches {xpath}")
+        return html_text(found[0])
+
+    data = new_job_data(category, sub_category, create_time)
     try:
-        data["job_title"] = job.find_element(By.XPATH, './/span[@class="job-name"]').text
-        data["job_salary_range"] = job.find_element(By.XPATH, './/span[@class="job-salary"]').text
-        data["job_location"] = job.find_element(By.XPATH, './/ul[@class="tag-list"]/li[1]/a').text
-        data["job_experience"] = job.find_element(By.XPATH, './/ul[@class="tag-list"]/li[2]').text
-        data["job_education"] = job.find_element(By.XPATH, './/ul[@class="tag-list"]/li[3]').text
-
-        info = job.find_element(By.XPATH, './/div[@class="boss-info-attr"]').text.split('·')
-        data["job_company"] = info[0].strip() if len(info)>0 else ""
-        data["job_industry"] = info[1].strip() if len(info)>1 else ""
-        data["job_finance"] = info[2].strip() if len(info)>2 else ""
-        data["job_scale"] = info[3].strip() if len(info)>3 else ""
-
-        data["job_desc"] = job.find_element(By.XPATH, './/p[@class="desc"]').text
-        data["job_skills"] = ",".join([e.text for e in job.find_elements(By.XPATH, './/ul[@class="job-label-list"]/li')])
-
-        try:
-            data["job_address"] = job.find_element(By.XPATH, './/p[@class="job-address-desc"]').text
-        except:
-            pass
-
-        data["province"] = data["job_location"].split('-')[0] if '-' in data["job_location"] else ""
-        return data
+        return fill_job_data(data, find_text, lambda xpath: [html_text(e) for e in job.xpath(xpath)])
     except Exception as e:
         print(f"Error extracting job data: {e}", level="ERROR")
         return None
 
+def parse_job_listings_html(page_source, current_category, sub_category, create_time=None):
+    """
+    Parse job listings from a saved page without a browser
+
+    Args:
+        page_source (str): HTML of a list page
+        current_category (str): Main job category
+        sub_category (str): Sub category of job
+        create_time (str): Crawl date of the page (YYYY-MM-DD), today if None
+
+    Returns:
+        list: List of parsed job data dict
+    """
+    results = []
+    for job in job_cards_html(page_source):
+        item = extract_job_data_html(job, current_category, sub_category, create_time)
+        if item:
+            results.append(item)
+    return results
+
 def parse_job_listings(browser, current_category, sub_category):
     """
     Parse job listings from the page
@@ -146,11 +287,11 @@ def parse_job_listings(browser, current_category, sub_category):
     Returns:
         list: List of parsed job data dict
     """
-    jobs = browser.find_elements(By.XPATH, '//div[contains(@class, "job-detail-box")]')
+    jobs = browser.find_elements(By.XPATH, JOB_CARD_XPATH)
     results = []
     for job in jobs:
         item = extract_job_data(job, current_category, sub_category)
         if item:
-            print(f"Parsed: {item['job_title']} at {item['job_location']}")
+            print('Parsed:', item['job_title'], 'at', item['job_location'], level="DEBUG")
             results.append(item)
     return results
\ No newline at end of file
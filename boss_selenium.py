@@ -8,16 +8,37 @@ import os
 import time
 import argparse
 from datetime import datetime
+from urllib.parse import urlsplit
 from selenium.webdriver.common.by import By
 import loger
-from database.data_storage import init_storage
+from database.data_storage import init_storage, DEFAULT_DB_CONFIG
 from boss_parser import parse_job_listings
 from browser_manager import get_browser
+from crawl_stats import CrawlStats
+from page_archive import PageArchive, DEFAULT_ARCHIVE_DIR, DEFAULT_ARCHIVE_CODEC
+from database.task_queue import open_task_queue, DEFAULT_LEASE_SECONDS
+from database.rate_limit import open_rate_limiter, DEFAULT_BURST
+from verification import VerificationGuard, VerificationRequired
+from database.category_yield import open_yield_store
+from crawl_scheduler import CrawlScheduler, DEFAULT_TIME_BUDGET_MINUTES, MIN_EXPECTED_NEW
+from city_shards import CITY_CODES, SPARSE_RUNS, YIELD_WINDOW, city_index_path, load_city_codes, select_cities, \
+    shard_tasks
+import metrics
 import random
 
 BACKUP_CSV_FILE = os.path.join("job_listings_backup.csv")
 PROCESS_FILE = os.path.join("crawl_progress.txt")
 DEFAULT_OUTPUT_DIR = "result"
+BASE_URL = "https://www.zhipin.com"
+INDEX_PATH = "/?city=100010000&ka=city-sites-100010000"
+# Random pause range in seconds while the list page loads lazily
+SCROLL_DELAY = (5, 15)
+# Pause while the list page loads when a shared rate limiter paces the requests
+RATE_LIMITED_SCROLL_DELAY = (1, 3)
+# Seconds between claim attempts while other nodes hold the last tasks
+TASK_POLL_INTERVAL = 30
+MENU_TOGGLE_XPATH = '//div[contains(@class, "job-menu")]//b'
+CATEGORY_LINK_XPATH = '//div[contains(@class, "job-menu")]//div/a'
 
 def parse_arguments():
     """
@@ -34,9 +55,212 @@ def parse_arguments():
                         help='Directory to save output files (default: current directory)')
     parser.add_argument('--headless', action='store_true',
                         help='Run browser in headless mode (no GUI)')
+    parser.add_argument('--csv-codec', type=str, default='none',
+                        choices=['none', 'gzip', 'zstd'],
+                        help='Compression of the CSV output when falling back to CSV storage (default: none)')
+    parser.add_argument('--base-url', type=str, default=BASE_URL,
+                        help=f'Site root to crawl, e.g. a local fixture server (default: {BASE_URL})')
+    parser.add_argument('--archive-pages', action='store_true',
+                        help=f'Keep a compressed copy of every list page under <output-dir>/{DEFAULT_ARCHIVE_DIR}')
+    parser.add_argument('--archive-codec', type=str, default=DEFAULT_ARCHIVE_CODEC,
+                        choices=['none', 'gzip', 'zstd'],
+                        help=f'Compression of archived pages (default: {DEFAULT_ARCHIVE_CODEC})')
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help='Serve Prometheus metrics on http://127.0.0.1:<port>/metrics (optional)')
+    parser.add_argument('--metrics-textfile', type=str, default=None,
+                        help='Write Prometheus metrics to this .prom file every few seconds (optional)')
+    parser.add_argument('--coordinator', type=str, default=None, choices=['mysql', 'sqlite'],
+                        help='Share categories with other nodes through a task table in this database (optional)')
+    parser.add_argument('--run-id', type=str, default=None,
+                        help='Crawl round shared by the coordinated nodes (default: today)')
+    parser.add_argument('--node-id', type=str, default=None,
+                        help='Name of this node in the task table (default: host name and pid)')
+    parser.add_argument('--lease-seconds', type=int, default=DEFAULT_LEASE_SECONDS,
+                        help=f'Lease on a claimed category before other nodes may take it over '
+                             f'(default: {DEFAULT_LEASE_SECONDS})')
+    parser.add_argument('--city-shards', action='store_true',
+                        help='Crawl every category once per city instead of the national listing, '
+                             'through the task queue (sqlite coordinator unless --coordinator is given)')
+    parser.add_argument('--city-codes', type=str, default=None,
+                        help='JSON file of city codes, {name: code} or the site city list (default: built-in table)')
+    parser.add_argument('--cities', type=str, default=None,
+                        help='Comma separated city or province names to shard over (default: all with a code)')
+    parser.add_argument('--sparse-runs', type=int, default=SPARSE_RUNS,
+                        help=f'Skip city shards empty in this many recent rounds, 0 keeps all (default: {SPARSE_RUNS})')
+    parser.add_argument('--rate-limit', type=float, default=None,
+                        help='Requests per second per host, shared by all crawler processes through the '
+                             'coordinator database (sqlite unless --coordinator is given)')
+    parser.add_argument('--rate-burst', type=int, default=DEFAULT_BURST,
+                        help=f'Requests allowed back to back under --rate-limit (default: {DEFAULT_BURST})')
+    parser.add_argument('--scroll-delay', type=str, default=None,
+                        help=f'MIN,MAX seconds of the pause on each list page (default: {SCROLL_DELAY[0]},'
+                             f'{SCROLL_DELAY[1]}, or {RATE_LIMITED_SCROLL_DELAY[0]},{RATE_LIMITED_SCROLL_DELAY[1]} '
+                             f'with --rate-limit)')
+    parser.add_argument('--schedule', action='store_true',
+                        help='Visit the categories by expected new postings per browser-minute, skipping those '
+                             'not due, with the history kept in the local sqlite coordinator database')
+    parser.add_argument('--time-budget', type=float, default=DEFAULT_TIME_BUDGET_MINUTES,
+                        help=f'Browser minutes of a --schedule run (default: {DEFAULT_TIME_BUDGET_MINUTES})')
+    parser.add_argument('--min-new', type=float, default=MIN_EXPECTED_NEW,
+                        help=f'Expected new postings that make a category due under --schedule '
+                             f'(default: {MIN_EXPECTED_NEW})')
     return parser.parse_args()
 
-def scrape_job_listings(browser, storage, csv_file):
+def open_category_menu(browser):
+    """
+    Show the Internet/AI menu of the homepage
+
+    Returns:
+        list: Category link elements
+    """
+    # Simulate clicking Internet/AI to show job categories
+    show_ele = browser.find_element(by=By.XPATH, value=MENU_TOGGLE_XPATH)
+    show_ele.click()
+    return browser.find_elements(by=By.XPATH, value=CATEGORY_LINK_XPATH)
+
+def throttle(limiter, url, stats):
+    """Wait for a request slot on the host of url when a shared rate limiter is configured"""
+    if limiter is None:
+        return
+    with stats.timer('rate_limit'):
+        limiter.acquire(urlsplit(url).netloc)
+
+def open_index(browser, index_url, stats, guard, limiter=None):
+    """
+    Load the homepage and show the category menu
+
+    A verification page quarantines this browser (see VerificationGuard)
+    and the homepage is loaded again; VerificationRequired is raised once
+    the guard gives up.
+
+    Returns:
+        list: Category link elements
+    """
+    while True:
+        throttle(limiter, index_url, stats)
+        with stats.timer('page_load'):
+            browser.get(index_url)
+        stats.count('pages')
+        try:
+            guard.check(browser, reset=False)
+            break
+        except VerificationRequired:
+            guard.quarantine(browser)
+    print("Successfully accessed BOSS website")
+    return open_category_menu(browser)
+
+def return_to_index(browser, index_url, stats, guard, limiter=None):
+    """
+    Go back from a list page to the category menu, reloading the homepage if that fails
+
+    Returns:
+        list: Fresh category link elements
+    """
+    try:
+        # Return to homepage
+        throttle(limiter, index_url, stats)
+        browser.back()
+        guard.check(browser, reset=False)
+        return open_category_menu(browser)
+    except VerificationRequired:
+        guard.quarantine(browser)
+    except Exception:
+        stats.error('navigate_back')
+    return open_index(browser, index_url, stats, guard, limiter)
+
+def xpath_literal(text):
+    """Quote text as an XPath string literal"""
+    if '"' not in text:
+        return f'"{text}"'
+    if "'" not in text:
+        return f"'{text}'"
+    return "concat(" + ", '\"', ".join(f'"{part}"' for part in text.split('"')) + ")"
+
+def find_category_link(browser, category, sub_category):
+    """
+    Find the menu link of a sub-category
+
+    Args:
+        browser (webdriver): Browser showing the category menu
+        category (str): Primary category, the h4 heading of the menu group
+        sub_category (str): Link text
+
+    Returns:
+        WebElement: Link element, raises NoSuchElementException if missing
+    """
+    return browser.find_element(
+        by=By.XPATH, value=f'{CATEGORY_LINK_XPATH}[normalize-space(.)={xpath_literal(sub_category)}]'
+                           f'[../../h4[normalize-space(.)={xpath_literal(category)}]]')
+
+def scrape_category(browser, link, category, sub_category, storage, stats, scroll_delay=SCROLL_DELAY,
+                    archive=None, keep_alive=None, limiter=None, guard=None, on_parsed=None):
+    """
+    Open the list page of one sub-category, parse it and store the jobs
+
+    Args:
+        browser (webdriver): Browser showing the category menu
+        link (WebElement): Menu link of the sub-category
+        category (str): Primary category
+        sub_category (str): Secondary category
+        storage: Data storage instance
+        stats (CrawlStats): Collects per-stage timings
+        scroll_delay (tuple): (min, max) seconds of the random pause after scrolling
+        archive (PageArchive): Archive receiving the list page before it is parsed (optional)
+        keep_alive (callable): Called between stages, returning False drops the page unsaved
+        limiter (RateLimiter): Shared request budget, taken before the click (optional)
+        guard (VerificationGuard): Checks the list page, raising VerificationRequired on a verification page
+        on_parsed (callable): Receives the parsed jobs before they are stored (optional)
+
+    Returns:
+        int: Number of parsed jobs, None if keep_alive gave up the page
+    """
+    print(f"Scraping {category}--{sub_category}")
+
+    # Click on the category
+    throttle(limiter, browser.current_url, stats)
+    with stats.timer('page_load'):
+        link.click()
+    stats.count('pages')
+    if guard is not None:
+        guard.check(browser)
+
+    # Scroll page to load all content
+    with stats.timer('scroll_wait'):
+        browser.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        time.sleep(random.uniform(*scroll_delay))
+        browser.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+
+    # Keep the page for offline parser replay
+    if archive is not None:
+        try:
+            with stats.timer('archive'):
+                archive.record(browser.page_source, category, sub_category, browser.current_url)
+        except Exception as e:
+            print(f"Archiving page failed: {str(e)}", level="WARNING")
+
+    # Parse job listings
+    with stats.timer('parse'):
+        parsed_data = parse_job_listings(browser, category, sub_category)
+    stats.count('categories')
+    stats.count('jobs', len(parsed_data))
+
+    if keep_alive is not None and not keep_alive():
+        print(f"Dropping {category}--{sub_category}, the task was taken over by another node", level="WARNING")
+        return None
+    if on_parsed is not None:
+        on_parsed(parsed_data)
+
+    if parsed_data:
+        try:
+            # Failed MySQL batches are spooled and replayed by the storage itself
+            with stats.timer('save'):
+                storage.save_data(parsed_data)
+        except Exception as e:
+            print(f"Storage failed: {str(e)}", level="ERROR")
+    return len(parsed_data)
+
+def scrape_job_listings(browser, storage, csv_file, stats=None, base_url=BASE_URL,
+                        guard=None, scroll_delay=SCROLL_DELAY, archive=None, limiter=None):
     """
     Scrape job listings from BOSS website
 
@@ -44,77 +268,219 @@ def scrape_job_listings(browser, storage, csv_file):
         browser (webdriver): Browser instance
         storage: Data storage instance (MySQL or CSV)
         csv_file (str): CSV file path for fallback storage
+        stats (CrawlStats): Collects per-stage timings, a new one if None
+        base_url (str): Site root, overridden to crawl a local fixture site
+        guard (VerificationGuard): Detects verification pages and backs off, a new one if None
+        scroll_delay (tuple): (min, max) seconds of the random pause after scrolling
+        archive (PageArchive): Archive receiving each list page before it is parsed (optional)
+        limiter (RateLimiter): Request budget shared with other crawler processes (optional)
     """
+    stats = stats or CrawlStats()
+    guard = guard or VerificationGuard(stats)
     # Open BOSS homepage
-    index_url = 'https://www.zhipin.com/?city=100010000&ka=city-sites-100010000'
-    browser.get(index_url)
-    print("Successfully accessed BOSS website")
-
-    # Wait for manual verification
-    print("Please complete the manual verification if required...", level="WARNING")
-    time.sleep(15)  # Wait for 15 seconds to allow manual verification
-
-    # Simulate clicking Internet/AI to show job categories
-    show_ele = browser.find_element(by=By.XPATH, value='//div[contains(@class, "job-menu")]//b')
-    show_ele.click()
-
-    # Get all category elements
-    category_elements = browser.find_elements(by=By.XPATH, value='//div[contains(@class, "job-menu")]//div/a')
+    index_url = base_url.rstrip('/') + INDEX_PATH
+    category_elements = open_index(browser, index_url, stats, guard, limiter)
     total_categories = len(category_elements)
     print(f"Found {total_categories} categories to process")
 
-    for i in range(total_categories):
+    i, retried = 0, False
+    while i < total_categories:
         try:
             print(f"Processing category index {i}")
 
             current_a = category_elements[i]
             current_category = current_a.find_element(by=By.XPATH, value='../../h4').text
             sub_category = current_a.text
-            print(f"Scraping {current_category}--{sub_category}")
+            scrape_category(browser, current_a, current_category, sub_category, storage, stats, scroll_delay,
+                            archive, limiter=limiter, guard=guard)
+            # Refresh category elements after going back
+            category_elements = return_to_index(browser, index_url, stats, guard, limiter)
 
-            # Click on the category
-            current_a.click()
+        except VerificationRequired as e:
+            print(f"Category {i} hit a verification page: {str(e)}", level="WARNING")
+            guard.quarantine(browser)
+            category_elements = open_index(browser, index_url, stats, guard, limiter)
+            # Retry the category once after the backoff
+            if not retried:
+                retried = True
+                continue
+            print(f"Skipping category {i} after a second verification page", level="WARNING")
+        except Exception as e:
+            stats.error('category')
+            print(f"Error processing category {i}: {str(e)}", level="ERROR")
+        i, retried = i + 1, False
 
-            # Scroll page to load all content
-            browser.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(random.uniform(5, 15))
-            browser.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+def menu_cells(category_elements):
+    """(category, sub_category, city) of the menu links, city empty for the national homepage"""
+    return [(link.find_element(by=By.XPATH, value='../../h4').text, link.text, '') for link in category_elements]
 
-            # Parse job listings
-            parsed_data = parse_job_listings(browser, current_category, sub_category)
+def scrape_scheduled_listings(browser, storage, scheduler, stats=None, base_url=BASE_URL, guard=None,
+                              scroll_delay=SCROLL_DELAY, archive=None, limiter=None):
+    """
+    Visit the categories the scheduler expects the most new postings from
 
-            if parsed_data:
-                try:
-                    # Try to save to primary storage
-                    storage.save_data(parsed_data)
-                except Exception as e:
-                    # If primary storage fails, save to CSV
-                    print(f"Primary storage failed: {str(e)}", level="ERROR")
-                    print("Falling back to CSV storage")
-                    storage.close()
+    The scheduler ranks the menu categories by expected new postings per
+    browser-minute and leaves out those not due yet; the run stops when its
+    time budget is spent. Each visit is timed from the click until the menu
+    is back and recorded with its listings, which updates the yield and
+    change rate of the category for the next run.
 
-            try:
-                # Return to homepage
-                browser.back()
-                # Simulate clicking Internet/AI to show job categories
-                show_ele = browser.find_element(by=By.XPATH, value='//div[contains(@class, "job-menu")]//b')
-                show_ele.click()
-                # Refresh category elements after going back
-                category_elements = browser.find_elements(by=By.XPATH, value='//div[contains(@class, "job-menu")]//div/a')
-            except:
-                browser.get(index_url)
-                # Wait for manual verification again if needed
-                print("Please complete the manual verification if required...", level="WARNING")
-                time.sleep(15)  # Wait for 15 seconds to allow manual verification
-                # Simulate clicking Internet/AI to show job categories
-                show_ele = browser.find_element(by=By.XPATH, value='//div[contains(@class, "job-menu")]//b')
-                show_ele.click()
-                # Refresh category elements after reloading
-                category_elements = browser.find_elements(by=By.XPATH, value='//div[contains(@class, "job-menu")]//div/a')
+    Args:
+        browser (webdriver): Browser instance
+        storage: Data storage instance
+        scheduler (CrawlScheduler): Plans the visits and keeps the category history
+        stats (CrawlStats): Collects per-stage timings, a new one if None
+        base_url (str): Site root, overridden to crawl a local fixture site
+        guard (VerificationGuard): Detects verification pages and backs off, a new one if None
+        scroll_delay (tuple): (min, max) seconds of the random pause after scrolling
+        archive (PageArchive): Archive receiving each list page before it is parsed (optional)
+        limiter (RateLimiter): Request budget shared with other crawler processes (optional)
+    """
+    stats = stats or CrawlStats()
+    guard = guard or VerificationGuard(stats)
+    index_url = base_url.rstrip('/') + INDEX_PATH
+    cells = menu_cells(open_index(browser, index_url, stats, guard, limiter))
+    visits = scheduler.plan(cells)
+    stats.count('categories_deferred', len(cells) - len(visits))
 
+    for n, visit in enumerate(visits):
+        if scheduler.exhausted():
+            print(f"Time budget spent, leaving {len(visits) - n} scheduled categories for the next run")
+            stats.count('categories_deferred', len(visits) - n)
+            break
+        category, sub_category, _ = visit['cell']
+        try:
+            link = find_category_link(browser, category, sub_category)
         except Exception as e:
-            print(f"Error processing category {i}: {str(e)}", level="ERROR")
+            stats.error('category')
+            print(f"Category {category}--{sub_category} not found: {str(e)}", level="ERROR")
+            continue
+        start = time.perf_counter()
+        jobs = []
+        try:
+            scrape_category(browser, link, category, sub_category, storage, stats, scroll_delay, archive,
+                            limiter=limiter, guard=guard, on_parsed=jobs.extend)
+        except VerificationRequired as e:
+            # Not recorded, the page says nothing about the category
+            print(f"Category {category}--{sub_category} hit a verification page: {str(e)}", level="WARNING")
+            guard.quarantine(browser)
+            open_index(browser, index_url, stats, guard, limiter)
             continue
+        except Exception as e:
+            stats.error('category')
+            print(f"Error processing category {category}--{sub_category}: {str(e)}", level="ERROR")
+            return_to_index(browser, index_url, stats, guard, limiter)
+            continue
+        return_to_index(browser, index_url, stats, guard, limiter)
+        new = scheduler.record(visit['cell'], jobs, time.perf_counter() - start)
+        stats.count('new_postings', new)
+        print(f"{category}--{sub_category}: {new} new of {len(jobs)} postings (expected {visit['expected_new']:.1f})")
+
+def scrape_queued_listings(browser, storage, queue, stats=None, base_url=BASE_URL,
+                           guard=None, scroll_delay=SCROLL_DELAY, archive=None, poll_interval=TASK_POLL_INTERVAL, city_codes=None, sparse_runs=SPARSE_RUNS, limiter=None):
+    """
+    Scrape the categories this node claims from a shared task queue
+
+    The node seeds the queue with the categories of its homepage (tasks
+    already added by other nodes are kept), then claims tasks until none is
+    left. The lease is renewed between stages, and a task whose lease was
+    taken over is dropped without saving. While other nodes still hold
+    leases the node keeps polling, so it takes over their tasks if they crash.
+    A task interrupted by a verification page is handed back to the queue
+    for other nodes while this one backs off.
+
+    With city_codes every category becomes one task per city, crawled from
+    that city's homepage, so the per-listing cap of the site applies to each
+    city instead of the whole country. Cells that stayed empty in recent
+    rounds are left out (see city_shards.shard_tasks).
+
+    Args:
+        browser (webdriver): Browser instance
+        storage: Data storage instance
+        queue (TaskQueue): Shared task queue
+        stats (CrawlStats): Collects per-stage timings, a new one if None
+        base_url (str): Site root, overridden to crawl a local fixture site
+        guard (VerificationGuard): Detects verification pages and backs off, a new one if None
+        scroll_delay (tuple): (min, max) seconds of the random pause after scrolling
+        archive (PageArchive): Archive receiving each list page before it is parsed (optional)
+        poll_interval (float): Seconds between claim attempts while other nodes hold the remaining tasks
+        city_codes (dict): City name -> site city code to shard categories by, national listing if None
+        sparse_runs (int): Skip city shards empty in this many recent crawls, 0 keeps all
+        limiter (RateLimiter): Request budget shared with other crawler processes (optional)
+    """
+    stats = stats or CrawlStats()
+    guard = guard or VerificationGuard(stats)
+    index_url = base_url.rstrip('/') + INDEX_PATH
+    category_elements = open_index(browser, index_url, stats, guard, limiter)
+    categories = [(a.find_element(by=By.XPATH, value='../../h4').text, a.text) for a in category_elements]
+    tasks = categories
+    if city_codes:
+        history = queue.yield_history(YIELD_WINDOW) if sparse_runs else {}
+        tasks, skipped = shard_tasks(categories, city_codes, queue.run_id, history, sparse_runs)
+        print(f"Sharded {len(categories)} categories over {len(set(city_codes.values()))} cities: "
+              f"{len(tasks)} tasks, {skipped} sparse shards skipped")
+    added = queue.add_tasks(tasks)
+    print(f"Node {queue.node_id} added {added} of {len(tasks)} tasks to round {queue.run_id}")
+
+    current_city = ''
+    while True:
+        task = queue.claim(prefer_city=current_city)
+        if task is None:
+            progress = queue.progress()
+            if not progress['running'] and not progress['expired']:
+                break
+            time.sleep(poll_interval)
+            continue
+        stats.count('tasks_claimed')
+        print(f"Claimed task {task['id']} (attempt {task['attempts']})")
+        if task['city'] != current_city:
+            # Categories of a city shard are only listed from that city's homepage
+            try:
+                index_url = base_url.rstrip('/') + city_index_path(task['city'])
+                open_index(browser, index_url, stats, guard, limiter)
+                current_city = task['city']
+            except VerificationRequired:
+                # The guard gave up on this node, leave the task to the others
+                queue.release(task)
+                raise
+            except Exception as e:
+                stats.error('city_index')
+                print(f"Error opening homepage of city {task['city']}: {str(e)}", level="ERROR")
+                queue.fail(task, f"city homepage failed: {str(e)}")
+                stats.count('tasks_failed')
+                current_city = None
+                continue
+        try:
+            link = find_category_link(browser, task['category'], task['sub_category'])
+        except Exception as e:
+            stats.error('category')
+            print(f"Category {task['category']}--{task['sub_category']} not found: {str(e)}", level="ERROR")
+            queue.fail(task, f"category link not found: {str(e)}")
+            stats.count('tasks_failed')
+            continue
+        try:
+            jobs = scrape_category(browser, link, task['category'], task['sub_category'], storage, stats,
+                                   scroll_delay, archive, keep_alive=lambda: queue.heartbeat(task), limiter=limiter,
+                                   guard=guard)
+            if jobs is None or not queue.complete(task, jobs):
+                stats.count('tasks_lost')
+        except VerificationRequired as e:
+            # Hand the task to the other nodes while this browser backs off
+            print(f"Task {task['id']} hit a verification page: {str(e)}", level="WARNING")
+            queue.release(task)
+            stats.count('tasks_released')
+            guard.quarantine(browser)
+            current_city = None
+            continue
+        except Exception as e:
+            stats.error('category')
+            print(f"Error processing task {task['id']}: {str(e)}", level="ERROR")
+            queue.fail(task, str(e))
+            stats.count('tasks_failed')
+        return_to_index(browser, index_url, stats, guard, limiter)
+
+    print(f"No tasks left to claim in round {queue.run_id}: " +
+          ', '.join(f"{state} {n}" for state, n in progress.items()))
 
 
 def main():
@@ -126,7 +492,15 @@ def main():
     os.makedirs(output_dir, exist_ok=True)
 
     # Initialize data storage
-    storage = init_storage(output_dir)
+    storage = init_storage(output_dir, csv_codec=args.csv_codec)
+    stats = CrawlStats()
+
+    # Optional metrics export for long-running crawls
+    metrics_server = metrics.start_http_server(args.metrics_port) if args.metrics_port else None
+    textfile_exporter = None
+    if args.metrics_textfile:
+        textfile_exporter = metrics.TextfileExporter(args.metrics_textfile)
+        textfile_exporter.start()
 
     try:
         # Initialize browser
@@ -137,7 +511,41 @@ def main():
         csv_file = os.path.join(output_dir, f'job_info_{datetime.now().strftime("%Y%m%d")}.csv')
 
         # Start scraping
-        scrape_job_listings(browser, storage, csv_file)
+        archive = PageArchive(os.path.join(output_dir, DEFAULT_ARCHIVE_DIR), args.archive_codec) \
+            if args.archive_pages else None
+        city_codes = None
+        if args.city_shards:
+            city_codes = load_city_codes(args.city_codes) if args.city_codes else CITY_CODES
+            city_codes = select_cities(city_codes, [c.strip() for c in (args.cities or '').split(',') if c.strip()])
+            if not city_codes:
+                raise ValueError("No city left to shard over")
+        coordinator = args.coordinator or ('sqlite' if city_codes else None)
+        if args.schedule and coordinator:
+            raise ValueError("--schedule plans the visits of a single crawler, "
+                             "it cannot be combined with --coordinator or --city-shards")
+        # The shared budget paces requests, so the per-worker pause only has to cover lazy loading
+        scroll_delay = SCROLL_DELAY
+        if args.rate_limit:
+            limiter = open_rate_limiter(coordinator or 'sqlite', output_dir, DEFAULT_DB_CONFIG,
+                                        rate=args.rate_limit, burst=args.rate_burst)
+            scroll_delay = RATE_LIMITED_SCROLL_DELAY
+        else:
+            limiter = None
+        if args.scroll_delay:
+            scroll_delay = tuple(float(v) for v in args.scroll_delay.split(','))
+        if coordinator:
+            queue = open_task_queue(coordinator, output_dir, DEFAULT_DB_CONFIG, run_id=args.run_id,
+                                    node_id=args.node_id, lease_seconds=args.lease_seconds)
+            scrape_queued_listings(browser, storage, queue, stats, base_url=args.base_url, archive=archive,
+                                   scroll_delay=scroll_delay, city_codes=city_codes, sparse_runs=args.sparse_runs,
+                                   limiter=limiter)
+        elif args.schedule:
+            scheduler = CrawlScheduler(open_yield_store('sqlite', output_dir), args.time_budget * 60, args.min_new)
+            scrape_scheduled_listings(browser, storage, scheduler, stats, base_url=args.base_url, archive=archive,
+                                      scroll_delay=scroll_delay, limiter=limiter)
+        else:
+            scrape_job_listings(browser, storage, csv_file, stats, base_url=args.base_url, archive=archive,
+                                scroll_delay=scroll_delay, limiter=limiter)
 
     except Exception as e:
         print(f"Program execution error: {str(e)}", level="ERROR")
@@ -145,8 +553,20 @@ def main():
         # Close browser and data storage
         if 'browser' in locals():
             browser.quit()
+        if 'queue' in locals():
+            queue.close()
+        if 'limiter' in locals() and limiter:
+            limiter.close()
+        if 'scheduler' in locals():
+            scheduler.close()
         if storage:
             storage.close()
+        stats.finish()
+        stats.report(output_dir)
+        if textfile_exporter:
+            textfile_exporter.stop()
+        if metrics_server:
+            metrics_server.shutdown()
         print("Crawling completed")
 
 
@@ -22,6 +22,7 @@ from webdriver_manager.microsoft import EdgeChromiumDriverManager
 from webdriver_manager.firefox import GeckoDriverManager
 import loger
 import time
+from metrics import REGISTRY
 
 # Browser configuration constants
 BROWSER_CONFIGS = {
@@ -57,6 +58,16 @@ BROWSER_CONFIGS = {
 # Common browser arguments
 COMMON_BROWSER_ARGS = ['--no-sandbox', '--disable-dev-shm-usage']  # , '--headless']
 
+# Driver sessions started by this process
+_driver_starts = 0
+
+def _count_driver_start():
+    """Export driver starts, every session after the first counts as a restart"""
+    global _driver_starts
+    _driver_starts += 1
+    REGISTRY.inc('driver_starts_total')
+    if _driver_starts > 1:
+        REGISTRY.inc('driver_restarts_total')
 
 class BrowserManager:
     """Browser manager class for handling browser drivers and initialization"""
@@ -151,7 +162,9 @@ class BrowserManager:
 
             driver_path = self.get_driver_path(browser_type)
             service = config['service_class'](driver_path)
-            return webdriver.__dict__[browser_type.capitalize()](service=service, options=options)
+            browser = webdriver.__dict__[browser_type.capitalize()](service=service, options=options)
+            _count_driver_start()
+            return browser
 
         except Exception as e:
             print(f"Failed to initialize {browser_type} browser: {e}", level="ERROR")
@@ -0,0 +1,173 @@
+#!/usr/bin/python3
+# encoding: utf-8
+# @author: sunhao
+# @contact: smartadpole@163.com
+# @file: city_shards.py
+# @time: 2026/10/19 20:30
+# @function: City codes aligned with CITY_MAP and per-city expansion of category tasks.
+
+import json
+import zlib
+import loger
+from boss_parser import CITY_MAP
+
+# Site-wide listing, used when a task has no city
+NATIONAL_CITY_CODE = '100010000'
+CITY_INDEX_PATH = "/?city={city}&ka=city-sites-{city}"
+
+# Site city codes of the larger cities; load the full list with load_city_codes
+CITY_CODES = {
+    '北京': '101010100', '上海': '101020100', '天津': '101030100', '重庆': '101040100',
+    '哈尔滨': '101050100', '长春': '101060100', '沈阳': '101070100', '大连': '101070200',
+    '呼和浩特': '101080100', '石家庄': '101090100', '保定': '101090200', '唐山': '101090500', '廊坊': '101090600',
+    '太原': '101100100', '西安': '101110100', '济南': '101120100', '青岛': '101120200', '淄博': '101120300',
+    '烟台': '101120500', '潍坊': '101120600', '济宁': '101120700', '临沂': '101120900',
+    '乌鲁木齐': '101130100', '拉萨': '101140100', '西宁': '101150100', '兰州': '101160100', '银川': '101170100',
+    '郑州': '101180100', '新乡': '101180300', '南阳': '101180700', '洛阳': '101180900',
+    '南京': '101190100', '无锡': '101190200', '镇江': '101190300', '苏州': '101190400', '南通': '101190500',
+    '扬州': '101190600', '盐城': '101190700', '徐州': '101190800', '淮安': '101190900', '连云港': '101191000',
+    '常州': '101191100', '泰州': '101191200', '宿迁': '101191300',
+    '武汉': '101200100', '襄阳': '101200200', '宜昌': '101200900',
+    '杭州': '101210100', '湖州': '101210200', '嘉兴': '101210300', '宁波': '101210400', '绍兴': '101210500',
+    '台州': '101210600', '温州': '101210700', '金华': '101210900',
+    '合肥': '101220100', '芜湖': '101220300', '福州': '101230100', '厦门': '101230200', '泉州': '101230500',
+    '漳州': '101230600', '南昌': '101240100', '赣州': '101240700', '长沙': '101250100', '株洲': '101250300',
+    '贵阳': '101260100', '成都': '101270100', '绵阳': '101270400',
+    '广州': '101280100', '惠州': '101280300', '汕头': '101280500', '深圳': '101280600', '珠海': '101280700',
+    '佛山': '101280800', '肇庆': '101280900', '湛江': '101281000', '江门': '101281100', '东莞': '101281600',
+    '中山': '101281700', '昆明': '101290100', '南宁': '101300100', '柳州': '101300300', '桂林': '101300500',
+    '海口': '101310100', '三亚': '101310200',
+}
+
+# A cell (category, sub_category, city) whose last SPARSE_RUNS crawls all found fewer
+# than MIN_CITY_YIELD jobs is skipped, except in about one of PROBE_EVERY rounds
+SPARSE_RUNS = 2
+MIN_CITY_YIELD = 1
+PROBE_EVERY = 5
+# Past rounds read to judge the yield of a cell
+YIELD_WINDOW = 10
+
+def mapped_cities():
+    """Cities known to CITY_MAP, so listings of a shard resolve to a province"""
+    return {city for cities in CITY_MAP.values() for city in cities}
+
+def city_index_path(city):
+    """Homepage path of a city code, the national homepage for an empty code"""
+    return CITY_INDEX_PATH.format(city=city or NATIONAL_CITY_CODE)
+
+def load_city_codes(path):
+    """
+    Read city codes from a JSON file
+
+    Accepts a {city name: code} object or the site's city list
+    (/wapi/zpCommon/data/city.json), whose leaf entries carry name and code.
+    Cities missing from CITY_MAP are dropped.
+
+    Args:
+        path (str): JSON file
+
+    Returns:
+        dict: City name -> code string
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    codes = {}
+
+    def walk(node):
+        if isinstance(node, list):
+            for item in node:
+                walk(item)
+        elif isinstance(node, dict):
+            children = node.get('subLevelModelList')
+            if children:
+                walk(children)
+            elif 'name' in node and 'code' in node:
+                codes.setdefault(node['name'], str(node['code']))
+            else:
+                for value in node.values():
+                    if isinstance(value, (list, dict)):
+                        walk(value)
+
+    if isinstance(data, dict) and data and all(isinstance(v, (str, int)) for v in data.values()):
+        codes = {name: str(code) for name, code in data.items()}
+    else:
+        walk(data)
+    known = mapped_cities()
+    unmapped = sorted(name for name in codes if name not in known)
+    if unmapped:
+        print(f"Ignoring {len(unmapped)} cities missing from CITY_MAP: {', '.join(unmapped[:10])}", level="WARNING")
+    return {name: code for name, code in codes.items() if name in known}
+
+def select_cities(codes, names=None):
+    """
+    Restrict a city table to some cities or provinces
+
+    Args:
+        codes (dict): City name -> code
+        names (list): City or province names, all cities if empty
+
+    Returns:
+        dict: City name -> code
+    """
+    if not names:
+        return dict(codes)
+    wanted = set()
+    for name in names:
+        wanted.update(CITY_MAP.get(name, [name]))
+    missing = [name for name in names if name not in CITY_MAP and name not in codes]
+    if missing:
+        print(f"No city code for {', '.join(missing)}", level="WARNING")
+    return {name: code for name, code in codes.items() if name in wanted}
+
+def is_sparse(recent_jobs, sparse_runs=SPARSE_RUNS, min_yield=MIN_CITY_YIELD):
+    """
+    Whether a cell yielded too little in its last crawls
+
+    Args:
+        recent_jobs (list): Jobs found by the cell's finished tasks, newest first
+        sparse_runs (int): Crawls that must all fall below min_yield, 0 never skips
+        min_yield (int): Jobs a crawl needs to count as productive
+
+    Returns:
+        bool: True if the cell may be skipped
+    """
+    if sparse_runs <= 0 or len(recent_jobs) < sparse_runs:
+        return False
+    return all(jobs < min_yield for jobs in recent_jobs[:sparse_runs])
+
+def is_probe_round(run_id, cell, probe_every=PROBE_EVERY):
+    """Deterministic per round and cell, so every node seeding a round skips the same cells"""
+    key = '/'.join((run_id,) + tuple(cell)).encode('utf-8')
+    return zlib.crc32(key) % probe_every == 0
+
+def shard_tasks(categories, codes, run_id, history=None, sparse_runs=SPARSE_RUNS, min_yield=MIN_CITY_YIELD,
+                probe_every=PROBE_EVERY):
+    """
+    Expand categories into per-city tasks, leaving out cells that stayed sparse
+
+    Tasks are ordered city by city, so a node working through them reloads
+    the homepage of a new city as rarely as possible.
+
+    Args:
+        categories (list): (category, sub_category) pairs
+        codes (dict): City name -> code
+        run_id (str): Round being seeded
+        history (dict): (category, sub_category, city code) -> jobs of past crawls, newest first
+        sparse_runs (int): See is_sparse, 0 keeps every cell
+        min_yield (int): See is_sparse
+        probe_every (int): A skipped cell is still crawled in about one of this many rounds
+
+    Returns:
+        tuple: (tasks as (category, sub_category, city code), number of skipped cells)
+    """
+    history = history or {}
+    tasks, skipped = [], 0
+    for code in sorted(set(codes.values())):
+        for category, sub_category in categories:
+            cell = (category, sub_category, code)
+            if is_sparse(history.get(cell, []), sparse_runs, min_yield) and \
+                    not is_probe_round(run_id, cell, probe_every):
+                skipped += 1
+                continue
+            tasks.append(cell)
+    return tasks, skipped
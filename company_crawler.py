@@ -17,8 +17,15 @@ import loger
 from database.company_storage import init_company_storage
 from browser_manager import get_browser
 import random
+from verification import VerificationGuard, VerificationRequired
 
 DEFAULT_OUTPUT_DIR = "result"
+BASE_URL = "https://www.zhipin.com"
+SEARCH_PATH = "/web/geek/jobs?query={query}"
+# Pauses in seconds after opening the company page, a job detail and going back
+PAGE_DELAY = 5
+DETAIL_DELAY = 2
+BACK_DELAY = 1
 
 def parse_arguments():
     """
@@ -37,6 +44,8 @@ def parse_arguments():
                         help='Run browser in headless mode (no GUI)')
     parser.add_argument('--company', type=str, required=True,
                         help='Company name to search for')
+    parser.add_argument('--base-url', type=str, default=BASE_URL,
+                        help=f'Site root to crawl, e.g. a local fixture server (default: {BASE_URL})')
     return parser.parse_args()
 
 def save_company_markdown(company_info, output_dir):
@@ -129,7 +138,8 @@ def save_job_markdown(job_listings, company_name, output_dir):
         print(f"Error saving job markdown: {str(e)}", level="ERROR")
         return None
 
-def scrape_company_info(browser, company_name, storage):
+def scrape_company_info(browser, company_name, storage, base_url=BASE_URL, guard=None,
+                        page_delay=PAGE_DELAY, detail_delay=DETAIL_DELAY, back_delay=BACK_DELAY):
     """
     Scrape company information and job listings
     
@@ -137,17 +147,25 @@ def scrape_company_info(browser, company_name, storage):
         browser (webdriver): Browser instance
         company_name (str): Company name to search for
         storage: Company storage instance
+        base_url (str): Site root, overridden to crawl a local fixture site
+        guard (VerificationGuard): Detects verification pages and backs off, a new one if None
+        page_delay (float): Seconds to wait for the company page
+        detail_delay (float): Seconds to wait for each job detail
+        back_delay (float): Seconds to wait after returning to the job list
     """
+    guard = guard or VerificationGuard()
     try:
-        # Open BOSS search page
-        search_url = f'https://www.zhipin.com/web/geek/jobs?query={company_name}'
-        browser.get(search_url)
+        # Open BOSS search page, backing off while it shows a verification page
+        search_url = base_url.rstrip('/') + SEARCH_PATH.format(query=company_name)
+        while True:
+            browser.get(search_url)
+            try:
+                guard.check(browser)
+                break
+            except VerificationRequired:
+                guard.quarantine(browser)
         print("Successfully accessed BOSS search page")
         
-        # Wait for manual verification
-        print("Please complete the manual verification if required...", level="WARNING")
-        time.sleep(15)  # Wait for 15 seconds to allow manual verification
-        
         # Wait for search results to load
         WebDriverWait(browser, 10).until(
             EC.presence_of_element_located((By.CSS_SELECTOR, ".c-company-card"))
@@ -163,7 +181,7 @@ def scrape_company_info(browser, company_name, storage):
         company_links[0].click()
         
         # Wait for company page to load
-        time.sleep(5)
+        time.sleep(page_delay)
         
         # Parse company information
         company_info = parse_company_info(browser)
@@ -172,7 +190,7 @@ def scrape_company_info(browser, company_name, storage):
             storage.save_company_info(company_info)
         
         # Parse job listings
-        job_listings = parse_job_listings(browser)
+        job_listings = parse_job_listings(browser, detail_delay, back_delay)
         if job_listings:
             # Save job listings
             storage.save_job_listings(job_listings, company_name)
@@ -216,12 +234,14 @@ def parse_company_info(browser):
         print(f"Error parsing company info: {str(e)}", level="ERROR")
         return None
 
-def parse_job_listings(browser):
+def parse_job_listings(browser, detail_delay=DETAIL_DELAY, back_delay=BACK_DELAY):
     """
     Parse job listings from the company page
     
     Args:
         browser (webdriver): Browser instance
+        detail_delay (float): Seconds to wait for each job detail
+        back_delay (float): Seconds to wait after returning to the job list
         
     Returns:
         list: List of job listings
@@ -253,7 +273,7 @@ def parse_job_listings(browser):
             job_link.click()
             
             # Wait for job detail to load
-            time.sleep(2)
+            time.sleep(detail_delay)
             
             try:
                 # Get job description
@@ -274,7 +294,7 @@ def parse_job_listings(browser):
             
             # Go back to job list
             browser.back()
-            time.sleep(1)
+            time.sleep(back_delay)
             
         return job_listings
     except Exception as e:
@@ -298,7 +318,7 @@ def main():
         print(f"Successfully initialized {args.driver_type} browser")
 
         # Start scraping
-        scrape_company_info(browser, args.company, storage)
+        scrape_company_info(browser, args.company, storage, base_url=args.base_url)
 
     except Exception as e:
         print(f"Program execution error: {str(e)}", level="ERROR")
@@ -0,0 +1,268 @@
+#!/usr/bin/python3
+# encoding: utf-8
+# @author: sunhao
+# @contact: smartadpole@163.com
+# @file: crawl_scheduler.py
+# @time: 2026/10/19 22:00
+# @function: Order category visits by expected new postings per browser-minute within a time budget.
+
+import time
+import hashlib
+import argparse
+import loger
+from database.category_yield import open_yield_store
+
+# Listings shown on a list page, the most a visit can find before the history knows the page
+PAGE_JOBS = 30
+# Browser seconds of a visit before one has been timed
+DEFAULT_VISIT_SECONDS = 20
+# A category is due once this many new postings are expected
+MIN_EXPECTED_NEW = 1.0
+# A category is visited at least this often, so a rate measured as zero gets re-measured
+MAX_REVISIT_HOURS = 72
+# Weight of the latest visit in the running averages
+EWMA_ALPHA = 0.3
+DEFAULT_TIME_BUDGET_MINUTES = 60
+
+def job_fingerprint(job):
+    """Short hash identifying a posting across visits"""
+    key = '\x1f'.join(str(job.get(name) or '') for name in ('job_title', 'job_company', 'job_location'))
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]
+
+def ewma(previous, value, alpha=EWMA_ALPHA):
+    """Exponentially weighted running average, the value itself without a previous one"""
+    return value if previous is None else previous + alpha * (value - previous)
+
+def update_state(state, fingerprints, seconds, now, alpha=EWMA_ALPHA):
+    """
+    Fold one visit into the history of a category
+
+    A posting is new if its fingerprint was not on the previous visit. The
+    new postings over the hours since that visit give the arrival rate;
+    when the whole page turned over the true rate may be higher, so the
+    observation then never lowers the estimate.
+
+    Args:
+        state (dict): History from YieldStore, None for a category never visited
+        fingerprints (iterable): Fingerprints of the listings found
+        seconds (float): Browser time the visit took
+        now (float): Unix time of the visit
+        alpha (float): Weight of this visit in the running averages
+
+    Returns:
+        tuple: (new state, number of new postings)
+    """
+    seen = set(fingerprints)
+    if not state or not state['visits']:
+        return {
+            'visits': 1, 'last_visit': now, 'new_rate': None, 'new_per_visit': float(len(seen)),
+            'change_rate': 1.0 if seen else 0.0, 'visit_seconds': seconds, 'last_jobs': len(seen), 'last_seen': seen,
+        }, len(seen)
+
+    new = len(seen - state['last_seen'])
+    hours = max((now - state['last_visit']) / 3600, 1 / 60)
+    observed = new / hours
+    rate = state['new_rate']
+    if rate is not None and seen and new >= len(seen):
+        observed = max(observed, rate)
+    # Everything is new on a first visit, that visit says nothing about the turnover
+    first = state['visits'] == 1
+    return {
+        'visits': state['visits'] + 1,
+        'last_visit': now,
+        'new_rate': ewma(rate, observed, alpha),
+        'new_per_visit': ewma(None if first else state['new_per_visit'], new, alpha),
+        'change_rate': ewma(None if first else state['change_rate'], new / len(seen) if seen else 0.0, alpha),
+        'visit_seconds': ewma(state['visit_seconds'] or None, seconds, alpha),
+        # An empty page is more likely a failed load than an emptied category, keep comparing with the last listings
+        'last_jobs': len(seen) or state['last_jobs'],
+        'last_seen': seen or state['last_seen'],
+    }, new
+
+def expected_new(state, now, page_jobs=PAGE_JOBS, max_revisit_hours=MAX_REVISIT_HOURS, min_new=MIN_EXPECTED_NEW):
+    """
+    New postings a visit would find now
+
+    Categories without a measured rate are assumed to have a full page of
+    new postings, so they are visited and measured first.
+
+    Args:
+        state (dict): History of the category, None if never visited
+        now (float): Unix time
+        page_jobs (int): Listings of a full page
+        max_revisit_hours (float): Age after which a category counts as due regardless of its rate
+        min_new (float): Expected postings of a due category
+
+    Returns:
+        float: Expected new postings, capped by the page size
+    """
+    capacity = (state or {}).get('last_jobs') or page_jobs
+    if not state or state['new_rate'] is None:
+        return float(capacity)
+    hours = max(now - state['last_visit'], 0) / 3600
+    expected = min(float(capacity), state['new_rate'] * hours)
+    if hours >= max_revisit_hours:
+        expected = max(expected, min_new)
+    return expected
+
+def plan_visits(cells, states, now, budget_seconds=None, min_new=MIN_EXPECTED_NEW, page_jobs=PAGE_JOBS,
+                max_revisit_hours=MAX_REVISIT_HOURS, default_visit_seconds=DEFAULT_VISIT_SECONDS):
+    """
+    Choose and order the visits of a run
+
+    Categories expecting fewer than min_new new postings are not due yet,
+    which spaces out the visits of slow categories. The due ones are
+    ranked by expected new postings per browser-minute and taken greedily
+    while their estimated visit times fit into the budget.
+
+    Args:
+        cells (list): (category, sub_category, city) of the categories on offer, in menu order
+        states (dict): Category history from YieldStore.load
+        now (float): Unix time
+        budget_seconds (float): Browser time of the run, unlimited if None
+        min_new (float): Expected new postings that make a category due
+        page_jobs (int): See expected_new
+        max_revisit_hours (float): See expected_new
+        default_visit_seconds (float): Visit time of a category never timed
+
+    Returns:
+        tuple: (visits as dicts with cell, expected_new, visit_seconds and priority in crawl order,
+            number of categories not due, number left out by the budget)
+    """
+    due, not_due = [], 0
+    for cell in cells:
+        state = states.get(cell)
+        expected = expected_new(state, now, page_jobs, max_revisit_hours, min_new)
+        if expected < min_new:
+            not_due += 1
+            continue
+        seconds = (state or {}).get('visit_seconds') or default_visit_seconds
+        due.append({'cell': cell, 'expected_new': expected, 'visit_seconds': seconds,
+                    'priority': expected * 60 / seconds})
+    # Stable, so categories nothing is known about keep their menu order
+    due.sort(key=lambda visit: -visit['priority'])
+
+    visits, spent, over_budget = [], 0.0, 0
+    for visit in due:
+        if budget_seconds is not None and spent + visit['visit_seconds'] > budget_seconds:
+            over_budget += 1
+            continue
+        visits.append(visit)
+        spent += visit['visit_seconds']
+    return visits, not_due, over_budget
+
+class CrawlScheduler:
+    def __init__(self, store, budget_seconds=None, min_new=MIN_EXPECTED_NEW, max_revisit_hours=MAX_REVISIT_HOURS):
+        """
+        Plans the category visits of a run and records their outcome
+
+        Args:
+            store (YieldStore): Category history
+            budget_seconds (float): Browser time of a run, unlimited if None
+            min_new (float): Expected new postings that make a category due
+            max_revisit_hours (float): Longest time a category goes unvisited
+        """
+        self.store = store
+        self.budget_seconds = budget_seconds
+        self.min_new = min_new
+        self.max_revisit_hours = max_revisit_hours
+        self.states = {}
+        self.started = None
+
+    def plan(self, cells, now=None):
+        """
+        Start the run clock and choose its visits, see plan_visits
+
+        Args:
+            cells (list): (category, sub_category, city) on offer
+            now (float): Unix time, the current time if None
+
+        Returns:
+            list: Visits in crawl order
+        """
+        self.states = self.store.load()
+        self.started = time.monotonic()
+        visits, not_due, over_budget = plan_visits(cells, self.states, now or time.time(), self.budget_seconds,
+                                                   self.min_new, max_revisit_hours=self.max_revisit_hours)
+        expected = sum(visit['expected_new'] for visit in visits)
+        minutes = sum(visit['visit_seconds'] for visit in visits) / 60
+        print(f"Scheduled {len(visits)} of {len(cells)} categories ({not_due} not due, {over_budget} over budget), "
+              f"expecting {expected:.0f} new postings in {minutes:.1f} browser-minutes")
+        return visits
+
+    def exhausted(self):
+        """Whether the time budget of the run is used up"""
+        return self.budget_seconds is not None and self.started is not None and \
+            time.monotonic() - self.started >= self.budget_seconds
+
+    def record(self, cell, jobs, seconds, now=None):
+        """
+        Store the outcome of a visit
+
+        Args:
+            cell (tuple): (category, sub_category, city)
+            jobs (list): Parsed job dicts
+            seconds (float): Browser time the visit took
+            now (float): Unix time, the current time if None
+
+        Returns:
+            int: New postings found
+        """
+        state, new = update_state(self.states.get(cell), (job_fingerprint(job) for job in jobs), seconds,
+                                  now or time.time())
+        self.states[cell] = state
+        self.store.save(cell, state)
+        return new
+
+    def close(self):
+        """Close the history store"""
+        self.store.close()
+
+def parse_arguments():
+    """
+    Parse command line arguments
+
+    Returns:
+        argparse.Namespace: Parsed arguments
+    """
+    parser = argparse.ArgumentParser(description='Show the category history and the plan of the next scheduled run')
+    parser.add_argument('--coordinator', type=str, default='sqlite', choices=['mysql', 'sqlite'],
+                        help='Database holding the category history')
+    parser.add_argument('--output-dir', type=str, default='result',
+                        help='Directory of the SQLite coordinator database')
+    parser.add_argument('--time-budget', type=float, default=DEFAULT_TIME_BUDGET_MINUTES,
+                        help='Browser minutes of a run')
+    parser.add_argument('--min-new', type=float, default=MIN_EXPECTED_NEW,
+                        help='Expected new postings that make a category due')
+    return parser.parse_args()
+
+def main():
+    from database.data_storage import DEFAULT_DB_CONFIG
+
+    args = parse_arguments()
+    store = open_yield_store(args.coordinator, args.output_dir, DEFAULT_DB_CONFIG)
+    try:
+        states = store.load()
+        now = time.time()
+        visits, not_due, over_budget = plan_visits(sorted(states), states, now, args.time_budget * 60, args.min_new)
+        print(f"{len(states)} categories known: {len(visits)} in the next run, {not_due} not due, "
+              f"{over_budget} over budget")
+        planned = {visit['cell']: n for n, visit in enumerate(visits, 1)}
+        for cell, state in sorted(states.items(), key=lambda item: planned.get(item[0], len(planned) + 1)):
+            rate = state['new_rate']
+            if cell in planned:
+                when = f"#{planned[cell]}"
+            elif expected_new(state, now, min_new=args.min_new) >= args.min_new:
+                when = "over budget"
+            else:
+                hours = min(args.min_new / rate, MAX_REVISIT_HOURS) if rate else MAX_REVISIT_HOURS
+                when = f"due in {max(hours - (now - state['last_visit']) / 3600, 0):.1f}h"
+            print(f"  {when:>14} {'/'.join(filter(None, cell))}: "
+                  f"rate {'-' if rate is None else f'{rate:.2f}/h'}, change {state['change_rate']:.0%}, "
+                  f"{state['new_per_visit']:.1f} new/visit, {state['visit_seconds']:.1f}s/visit, "
+                  f"{state['visits']} visits")
+    finally:
+        store.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/python3
+# encoding: utf-8
+# @author: sunhao
+# @contact: smartadpole@163.com
+# @file: crawl_stats.py
+# @time: 2026/10/19 16:30
+# @function: Per-stage timers and counters of a crawl run with a summary report.
+
+import os
+import json
+import time
+from datetime import datetime
+from contextlib import contextmanager
+import loger
+from metrics import REGISTRY, ThreadShards
+
+STATS_FILE_PREFIX = 'crawl_stats_'
+# Run counters exported under a different metric name, others become '<name>_total'
+COUNTER_METRICS = {
+    'jobs': 'jobs_parsed_total',
+    'pages': 'pages_fetched_total',
+}
+
+def percentile(sorted_values, p):
+    """
+    Nearest-rank percentile of sorted values
+
+    Args:
+        sorted_values (list): Values in ascending order
+        p (float): Percentile between 0 and 100
+
+    Returns:
+        float: Percentile value, None without values
+    """
+    if not sorted_values:
+        return None
+    rank = max(int(-(-len(sorted_values) * p // 100)), 1)
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+class CrawlStats:
+    def __init__(self, metrics=REGISTRY):
+        """
+        Timers and counters of one crawl run, recorded into ThreadShards
+
+        Args:
+            metrics (MetricsRegistry): Registry the timings and counters are forwarded to, None to keep them local
+        """
+        self.metrics = metrics
+        self.started_at = time.time()
+        self.finished_at = None
+        self._shards = ThreadShards(lambda: {'durations': {}, 'errors': {}, 'counters': {}})
+
+    def record(self, stage, seconds):
+        """Record one duration of a stage"""
+        self._shards.get()['durations'].setdefault(stage, []).append(seconds)
+        if self.metrics is not None:
+            self.metrics.observe('stage_seconds', seconds, stage=stage)
+
+    def error(self, stage):
+        """Count a failure of a stage"""
+        errors = self._shards.get()['errors']
+        errors[stage] = errors.get(stage, 0) + 1
+        if self.metrics is not None:
+            self.metrics.inc('stage_errors_total', stage=stage)
+
+    def count(self, name, n=1):
+        """Add n to a counter such as 'jobs'"""
+        counters = self._shards.get()['counters']
+        counters[name] = counters.get(name, 0) + n
+        if self.metrics is not None:
+            self.metrics.inc(COUNTER_METRICS.get(name, f'{name}_total'), n)
+
+    @contextmanager
+    def timer(self, stage):
+        """
+        Time a block as one occurrence of a stage
+
+        A block that raises is timed as well, counted as an error of the
+        stage, and the exception is re-raised.
+
+        Args:
+            stage (str): Stage name, e.g. 'page_load' or 'save'
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.error(stage)
+            raise
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def finish(self):
+        """Mark the end of the run"""
+        self.finished_at = time.time()
+
+    def summary(self):
+        """
+        Merge all shards into a run summary
+
+        Returns:
+            dict: Run times, counters, jobs per minute and per-stage
+                count/total/mean/p50/p95/max seconds with error counts
+        """
+        durations, errors, counters = {}, {}, {}
+        for shard in self._shards.snapshot():
+            for stage, values in list(shard['durations'].items()):
+                durations.setdefault(stage, []).extend(values)
+            for stage, n in list(shard['errors'].items()):
+                errors[stage] = errors.get(stage, 0) + n
+            for name, n in list(shard['counters'].items()):
+                counters[name] = counters.get(name, 0) + n
+
+        finished_at = self.finished_at or time.time()
+        elapsed = finished_at - self.started_at
+        stages = {}
+        for stage in sorted(set(durations) | set(errors)):
+            values = sorted(durations.get(stage, []))
+            total = sum(values)
+            stages[stage] = {
+                'count': len(values),
+                'total_s': round(total, 3),
+                'mean_s': round(total / len(values), 3) if values else None,
+                'p50_s': round(percentile(values, 50), 3) if values else None,
+                'p95_s': round(percentile(values, 95), 3) if values else None,
+                'max_s': round(values[-1], 3) if values else None,
+                'errors': errors.get(stage, 0),
+            }
+        return {
+            'started_at': datetime.fromtimestamp(self.started_at).isoformat(timespec='seconds'),
+            'finished_at': datetime.fromtimestamp(finished_at).isoformat(timespec='seconds'),
+            'elapsed_s': round(elapsed, 3),
+            'jobs': counters.get('jobs', 0),
+            'jobs_per_minute': round(counters.get('jobs', 0) * 60 / elapsed, 2) if elapsed > 0 else 0.0,
+            'errors': sum(errors.values()),
+            'counters': counters,
+            'stages': stages,
+        }
+
+    def report(self, output_dir=None):
+        """
+        Log the run summary and write it as JSON
+
+        Args:
+            output_dir (str): Directory of the crawl_stats_<time>.json file, None to skip writing
+
+        Returns:
+            dict: The summary
+        """
+        summary = self.summary()
+        print(f"Run summary: {summary['jobs']} jobs in {summary['elapsed_s']:.1f}s "
+              f"({summary['jobs_per_minute']} jobs/min), {summary['errors']} errors")
+        for stage, stat in summary['stages'].items():
+            if stat['count']:
+                print(f"  {stage:<18} n={stat['count']:<5} total={stat['total_s']:.1f}s "
+                      f"p50={stat['p50_s']:.3f}s p95={stat['p95_s']:.3f}s errors={stat['errors']}")
+            else:
+                print(f"  {stage:<18} errors={stat['errors']}")
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+            path = os.path.join(output_dir,
+                                f"{STATS_FILE_PREFIX}{datetime.fromtimestamp(self.started_at):%Y%m%d_%H%M%S}.json")
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(summary, f, ensure_ascii=False, indent=2)
+            print(f"Run summary written to {path}")
+        return summary
@@ -8,6 +8,7 @@
 
 from .mysql_handler import MySQLHandler
 from .csv_handler import CSVHandler
+from .sqlite_handler import SQLiteHandler
 from .data_storage import DataStorage, init_storage
 
-__all__ = ['MySQLHandler', 'CSVHandler'] 
\ No newline at end of file
+__all__ = ['MySQLHandler', 'CSVHandler', 'SQLiteHandler'] 
\ No newline at end of file
@@ -0,0 +1,136 @@
+#!/usr/bin/python3
+# encoding: utf-8
+# @author: sunhao
+# @contact: smartadpole@163.com
+# @file: category_yield.py
+# @time: 2026/10/19 22:00
+# @function: Per-category visit history (new postings, change rate, visit time) read by the crawl scheduler.
+
+import os
+import loger
+from database.task_queue import DEFAULT_TASK_DB_FILE
+
+YIELD_TABLE = 'category_yield'
+# Columns of a category state besides the key, see crawl_scheduler.update_state
+STATE_COLUMNS = ['visits', 'last_visit', 'new_rate', 'new_per_visit', 'change_rate', 'visit_seconds', 'last_jobs',
+                 'last_seen']
+
+def mysql_yield_table_sql():
+    """Generate the MySQL DDL of the category history table"""
+    return f"""
+    CREATE TABLE IF NOT EXISTS {YIELD_TABLE} (
+        category VARCHAR(255) NOT NULL,
+        sub_category VARCHAR(255) NOT NULL,
+        city VARCHAR(32) NOT NULL DEFAULT '' COMMENT 'City code, empty for the national listing',
+        visits INT NOT NULL DEFAULT 0,
+        last_visit DOUBLE NOT NULL DEFAULT 0 COMMENT 'Unix time of the last visit',
+        new_rate DOUBLE NULL COMMENT 'New postings per hour, NULL before a second visit',
+        new_per_visit DOUBLE NOT NULL DEFAULT 0,
+        change_rate DOUBLE NOT NULL DEFAULT 0 COMMENT 'Share of the listings that were new',
+        visit_seconds DOUBLE NOT NULL DEFAULT 0 COMMENT 'Browser time of a visit',
+        last_jobs INT NOT NULL DEFAULT 0,
+        last_seen TEXT NULL COMMENT 'Fingerprints of the listings of the last visit',
+        PRIMARY KEY (category, sub_category, city)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """
+
+def sqlite_yield_table_sql():
+    """Generate the SQLite DDL of the category history table"""
+    return f"""
+    CREATE TABLE IF NOT EXISTS {YIELD_TABLE} (
+        category TEXT NOT NULL,
+        sub_category TEXT NOT NULL,
+        city TEXT NOT NULL DEFAULT '',
+        visits INTEGER NOT NULL DEFAULT 0,
+        last_visit REAL NOT NULL DEFAULT 0,
+        new_rate REAL,
+        new_per_visit REAL NOT NULL DEFAULT 0,
+        change_rate REAL NOT NULL DEFAULT 0,
+        visit_seconds REAL NOT NULL DEFAULT 0,
+        last_jobs INTEGER NOT NULL DEFAULT 0,
+        last_seen TEXT,
+        PRIMARY KEY (category, sub_category, city)
+    )
+    """
+
+class YieldStore:
+    def __init__(self, handler, dialect):
+        """
+        Visit history of each category, one row per (category, sub_category, city)
+
+        Args:
+            handler: MySQLHandler or SQLiteHandler connected to the coordinator database
+            dialect (str): 'mysql' or 'sqlite'
+        """
+        if dialect not in ('mysql', 'sqlite'):
+            raise ValueError(f"Unsupported dialect: {dialect}")
+        self.handler = handler
+        self.dialect = dialect
+
+    def create_table(self):
+        """Create the history table if not exists"""
+        self.handler.cursor.execute(mysql_yield_table_sql() if self.dialect == 'mysql' else sqlite_yield_table_sql())
+        self.handler.conn.commit()
+
+    def load(self):
+        """
+        Read the history of all categories
+
+        Returns:
+            dict: (category, sub_category, city) -> state dict with STATE_COLUMNS,
+                last_seen as a set of fingerprints
+        """
+        states = {}
+        for row in self.handler.select_all(f"SELECT category, sub_category, city, {', '.join(STATE_COLUMNS)} "
+                                           f"FROM {YIELD_TABLE}"):
+            state = {name: row[name] for name in STATE_COLUMNS}
+            state['last_seen'] = set((state['last_seen'] or '').split())
+            states[(row['category'], row['sub_category'], row['city'])] = state
+        # End the read so a long run sees rows written by other processes
+        self.handler.conn.commit()
+        return states
+
+    def save(self, cell, state):
+        """
+        Write the history of one category
+
+        Args:
+            cell (tuple): (category, sub_category, city)
+            state (dict): State with STATE_COLUMNS
+        """
+        values = [' '.join(sorted(state[name])) if name == 'last_seen' else state[name] for name in STATE_COLUMNS]
+        columns = ['category', 'sub_category', 'city'] + STATE_COLUMNS
+        # REPLACE INTO is understood by both MySQL and SQLite
+        self.handler.insert_data(
+            f"REPLACE INTO {YIELD_TABLE} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})",
+            tuple(cell) + tuple(values))
+
+    def close(self):
+        """Close the database connection"""
+        self.handler.close()
+
+def open_yield_store(backend, output_dir, db_config=None):
+    """
+    Connect to the coordinator database and create the history table
+
+    Args:
+        backend (str): 'mysql' or 'sqlite'
+        output_dir (str): Directory of the SQLite coordinator file
+        db_config (dict): MySQL connection settings
+
+    Returns:
+        YieldStore: Store using its own connection
+    """
+    from database import MySQLHandler, SQLiteHandler
+
+    if backend == 'mysql':
+        if not db_config:
+            raise ValueError("Database configuration is required for the MySQL category history")
+        handler = MySQLHandler(**db_config)
+    elif backend == 'sqlite':
+        handler = SQLiteHandler(os.path.join(output_dir, 'sqlite'), db_file=DEFAULT_TASK_DB_FILE)
+    else:
+        raise ValueError(f"Unknown category history backend: {backend}")
+    store = YieldStore(handler, backend)
+    store.create_table()
+    return store
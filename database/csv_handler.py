@@ -7,35 +7,348 @@
 # @function: CSV handler for job listings.
 
 import os
+import io
+import re
 import csv
-from datetime import datetime
+import time
+import threading
+from datetime import datetime, date
 import loger
+from database.csv_index import CSVOffsetIndex, complete_records_length, INDEX_SUFFIX
+from database.file_codec import FramedWriter, check_codec, codec_extension, codec_for_path, iter_lines
+from database.schema import CSV_HEADERS, encode_job_row
 
-HEADERS = [
-    'category', 'sub_category', 'job_title', 'province', 'job_location',
-    'job_company', 'job_experience', 'job_education', 'job_skills',
-    'job_address', 'job_salary', 'job_desc', 'create_time'
-]
+CSV_FILE_PATTERN = re.compile(r'^job_info_(\d{4}-\d{2}-\d{2})(\.legacy\d*)?\.csv(\.gz|\.zst)?$')
+
+HEADERS = CSV_HEADERS
+
+# Default flush policy of the append writer
+DEFAULT_FLUSH_ROWS = 100
+DEFAULT_FLUSH_INTERVAL = 5.0
+
+class CSVAppendWriter:
+    def __init__(self, output_dir, headers=HEADERS, flush_rows=DEFAULT_FLUSH_ROWS,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL, fsync=False, codec='none', level=None):
+        """
+        Long-lived buffered writer for the daily CSV files
+
+        The file stays open between writes and is rolled over to a new
+        job_info_<date>.csv when the date changes. Buffered rows are flushed
+        every flush_rows rows, on close, and by a timer at most flush_interval
+        seconds after they were buffered, so rows reach the disk while the
+        crawler is idle as well.
+        With a compression codec each flush is written as a self-contained
+        frame, so a crash never corrupts rows of earlier flushes.
+
+        Args:
+            output_dir (str): Output directory for CSV files
+            headers (list): Header row written to new files
+            flush_rows (int): Flush after this many buffered rows (0 disables)
+            flush_interval (float): Flush buffered rows at most this many seconds after they were written (None disables)
+            fsync (bool): Also fsync the file on every flush
+            codec (str): Compression codec, 'none', 'gzip' or 'zstd'
+            level (int): Compression level, None for the codec default
+        """
+        self.output_dir = output_dir
+        self.headers = headers
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.codec = check_codec(codec)
+        self.level = level
+        self.today = None
+        self.path = None
+        self._file = None
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self._timer = None
+        # The flush timer runs on its own thread
+        self._lock = threading.RLock()
+        self._rollover()
+
+    @staticmethod
+    def file_for_date(output_dir, date, codec='none'):
+        """Return the CSV file path for a '%Y-%m-%d' date"""
+        return os.path.join(output_dir, f'job_info_{date}.csv{codec_extension(codec)}')
+
+    def _rollover(self):
+        """Open the file for the current date, closing the previous one"""
+        today = datetime.now().strftime('%Y-%m-%d')
+        if today == self.today and self._file is not None:
+            return
+        self.close()
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.today = today
+        self.path = self.file_for_date(self.output_dir, today, self.codec)
+        self._move_aside_mismatched(self.path)
+        # Plain CSV records may span lines, so find the last complete one quote-aware
+        valid_length = complete_records_length(self.path) if self.codec == 'none' else None
+        self._file = FramedWriter(self.path, self.codec, self.level, self.fsync, valid_length)
+        if self._file.tell() == 0:
+            self._writer.writerow(self.headers)
+            self.flush()
+
+    def _move_aside_mismatched(self, path):
+        """Rename an existing file written with another header so rows never land under wrong columns"""
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return
+        header = next(csv.reader(iter_lines(path)), None)
+        if header is None or header == list(self.headers):
+            return
+        base, extension = path.split('.csv', 1)
+        suffix = 0
+        while True:
+            legacy_path = f"{base}.legacy{suffix or ''}.csv{extension}"
+            if not os.path.exists(legacy_path):
+                break
+            suffix += 1
+        os.replace(path, legacy_path)
+        if os.path.exists(path + INDEX_SUFFIX):
+            os.replace(path + INDEX_SUFFIX, legacy_path + INDEX_SUFFIX)
+        print(f"Existing {path} uses a different header, moved to {legacy_path}", level="WARNING")
+
+    def write_rows(self, rows):
+        """
+        Append rows and apply the flush policy
+
+        Args:
+            rows (list): Rows as sequences ordered like headers
+
+        Returns:
+            int: Number of rows written
+        """
+        with self._lock:
+            self._rollover()
+            self._writer.writerows(rows)
+            self._pending += len(rows)
+            if (self.flush_rows and self._pending >= self.flush_rows) or \
+                    (self.flush_interval is not None and time.monotonic() - self._last_flush >= self.flush_interval):
+                self.flush()
+            elif self._pending and self.flush_interval is not None and self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self._flush_idle)
+                self._timer.daemon = True
+                self._timer.start()
+        return len(rows)
+
+    def _flush_idle(self):
+        """Timer callback, flush rows that no later write has flushed"""
+        with self._lock:
+            self._timer = None
+            if self._pending:
+                try:
+                    self.flush()
+                except Exception as e:
+                    print(f"Error flushing {self.path}: {str(e)}", level="ERROR")
+
+    def flush(self):
+        """Flush buffered rows to disk"""
+        with self._lock:
+            if self._file is None:
+                return
+            data = self._buffer.getvalue()
+            if data:
+                self._buffer.seek(0)
+                self._buffer.truncate()
+                self._file.write(data.encode('utf-8'))
+            self._file.flush()
+            self._pending = 0
+            self._last_flush = time.monotonic()
+
+    def close(self):
+        """Flush and close the current file"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._file is None:
+                return
+            self.flush()
+            self._file.close()
+            self._file = None
 
 class CSVHandler:
-    def __init__(self, output_dir):
+    def __init__(self, output_dir, flush_rows=DEFAULT_FLUSH_ROWS, flush_interval=DEFAULT_FLUSH_INTERVAL, fsync=False,
+                 codec='none', level=None):
         """
         Initialize CSV handler
         
         Args:
             output_dir (str): Output directory for CSV files
+            flush_rows (int): Flush after this many buffered rows (0 disables)
+            flush_interval (float): Flush buffered rows at most this many seconds after they were written (None disables)
+            fsync (bool): Also fsync the file on every flush
+            codec (str): Compression codec, 'none', 'gzip' or 'zstd'
+            level (int): Compression level, None for the codec default
         """
         self.output_dir = output_dir
-        self.today = datetime.now().strftime('%Y-%m-%d')
-        self.csv_file = os.path.join(output_dir, f'job_info_{self.today}.csv')
-        self._ensure_csv_exists()
+        self.writer = CSVAppendWriter(output_dir, HEADERS, flush_rows, flush_interval, fsync, codec, level)
+
+    @property
+    def today(self):
+        """Date of the file currently written"""
+        return self.writer.today
+
+    @property
+    def csv_file(self):
+        """Path of the file currently written"""
+        return self.writer.path
 
     def _ensure_csv_exists(self):
         """Ensure CSV file exists with headers"""
-        if not os.path.exists(self.csv_file):
-            with open(self.csv_file, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(HEADERS)
+        self.writer._rollover()
+
+    @staticmethod
+    def _value_matcher(expected):
+        """Build a predicate for a single value or a collection of accepted values"""
+        if expected is None:
+            return None
+        if isinstance(expected, str):
+            return lambda value: value == expected
+        accepted = set(expected)
+        return lambda value: value in accepted
+
+    @staticmethod
+    def _date_str(value):
+        """Normalize a date bound to a '%Y-%m-%d' string"""
+        if isinstance(value, (datetime, date)):
+            return value.strftime('%Y-%m-%d')
+        return value
+
+    def _files_in_range(self, start_date, end_date):
+        """List daily CSV files whose date may overlap the requested range"""
+        files = []
+        for name in sorted(os.listdir(self.output_dir)):
+            match = CSV_FILE_PATTERN.match(name)
+            if not match:
+                continue
+            file_date = match.group(1)
+            # Rows are stamped with the crawl date, so the file date bounds create_time
+            if (start_date and file_date < start_date) or (end_date and file_date > end_date):
+                continue
+            files.append(os.path.join(self.output_dir, name))
+        return files
+
+    def query(self, columns=None, category=None, province=None, start_date=None, end_date=None, use_index=False):
+        """
+        Stream matching records from all daily CSV files
+
+        Predicates are evaluated on the raw fields while reading, so only
+        matching rows are turned into dicts. Files outside the date range are
+        skipped by name. With use_index, a sidecar offset index is built or
+        extended for each file and only the matching records are read.
+
+        Args:
+            columns (list): Columns to return, None for all
+            category (str/list): Accepted category value(s)
+            province (str/list): Accepted province value(s)
+            start_date (str/date): Earliest create_time, inclusive
+            end_date (str/date): Latest create_time, inclusive
+            use_index (bool): Use the sidecar offset index
+
+        Yields:
+            dict: Matching record restricted to the requested columns
+        """
+        start_date = self._date_str(start_date)
+        end_date = self._date_str(end_date)
+        predicates = {
+            'category': self._value_matcher(category),
+            'province': self._value_matcher(province),
+        }
+        if start_date or end_date:
+            predicates['create_time'] = lambda value: (not start_date or value >= start_date) and \
+                                                      (not end_date or value <= end_date)
+        predicates = {column: accept for column, accept in predicates.items() if accept}
+
+        self.writer.flush()
+        for csv_file in self._files_in_range(start_date, end_date):
+            try:
+                if use_index:
+                    header, records = self._indexed_records(csv_file, predicates)
+                else:
+                    header, records = self._scanned_records(csv_file)
+                if header is None:
+                    continue
+                checks = [(header.index(c), accept) for c, accept in predicates.items() if c in header]
+                if len(checks) < len(predicates):
+                    # A filtered column is missing from this file, nothing can match
+                    continue
+                wanted = [(c, header.index(c)) for c in (columns or header) if c in header]
+                for fields in records:
+                    if len(fields) != len(header):
+                        continue
+                    if all(accept(fields[i]) for i, accept in checks):
+                        yield {c: fields[i] for c, i in wanted}
+            except Exception as e:
+                print(f"Error querying CSV {csv_file}: {str(e)}", level="ERROR")
+                raise
+
+    @staticmethod
+    def _scanned_records(csv_file):
+        """Open a CSV file, decompressing on the fly, for a full sequential scan"""
+        reader = csv.reader(iter_lines(csv_file))
+        return next(reader, None), reader
+
+    @staticmethod
+    def _indexed_records(csv_file, predicates):
+        """Read only the records selected by the sidecar index"""
+        if codec_for_path(csv_file) != 'none':
+            # Compressed frames cannot be seeked into, scan them instead
+            return CSVHandler._scanned_records(csv_file)
+        index = CSVOffsetIndex(csv_file).update()
+        if index.header is None:
+            return None, iter(())
+        matched = None
+        for column, accept in predicates.items():
+            offsets = index.lookup(column, accept)
+            if offsets is None:
+                continue
+            matched = offsets if matched is None else matched & offsets
+        if matched is None:
+            # No indexed predicate, fall back to reading the whole file
+            return CSVHandler._scanned_records(csv_file)
+        return index.header, index.read(matched)
+
+    def build_index(self):
+        """
+        Build or extend the sidecar offset index of every uncompressed daily CSV file
+
+        Returns:
+            int: Number of indexed files
+        """
+        self.writer.flush()
+        files = [f for f in self._files_in_range(None, None) if codec_for_path(f) == 'none']
+        for csv_file in files:
+            CSVOffsetIndex(csv_file).update()
+        return len(files)
+
+    def purge_before(self, cutoff):
+        """
+        Remove daily CSV files, and their index sidecars, dated before cutoff
+
+        Args:
+            cutoff (date/str): First date to keep
+
+        Returns:
+            int: Number of removed files
+        """
+        cutoff = self._date_str(cutoff)[:10]
+        removed = 0
+        try:
+            for csv_file in self._files_in_range(None, None):
+                file_date = CSV_FILE_PATTERN.match(os.path.basename(csv_file)).group(1)
+                if file_date >= cutoff or csv_file == self.writer.path:
+                    continue
+                os.remove(csv_file)
+                if os.path.exists(csv_file + INDEX_SUFFIX):
+                    os.remove(csv_file + INDEX_SUFFIX)
+                removed += 1
+            print(f"Removed {removed} CSV files before {cutoff}")
+            return removed
+        except Exception as e:
+            print(f"Error purging CSV files: {str(e)}", level="ERROR")
+            raise
 
     def select_all(self, sql=None, args=None):
         """
@@ -49,9 +362,8 @@ class CSVHandler:
             list: All data from CSV
         """
         try:
-            with open(self.csv_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                return list(reader)
+            self.writer.flush()
+            return list(csv.DictReader(iter_lines(self.csv_file)))
         except Exception as e:
             print(f"Error reading CSV: {str(e)}", level="ERROR")
             raise
@@ -68,9 +380,8 @@ class CSVHandler:
             dict: First record from CSV
         """
         try:
-            with open(self.csv_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                return next(reader, None)
+            self.writer.flush()
+            return next(csv.DictReader(iter_lines(self.csv_file)), None)
         except Exception as e:
             print(f"Error reading CSV: {str(e)}", level="ERROR")
             raise
@@ -88,9 +399,9 @@ class CSVHandler:
             list: First n records from CSV
         """
         try:
-            with open(self.csv_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                return [row for _, row in zip(range(n), reader)]
+            self.writer.flush()
+            reader = csv.DictReader(iter_lines(self.csv_file))
+            return [row for _, row in zip(range(n), reader)]
         except Exception as e:
             print(f"Error reading CSV: {str(e)}", level="ERROR")
             raise
@@ -107,10 +418,7 @@ class CSVHandler:
             int: Number of records inserted
         """
         try:
-            with open(self.csv_file, 'a', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(args)
-            return 1
+            return self.writer.write_rows([args])
         except Exception as e:
             print(f"Error writing to CSV: {str(e)}", level="ERROR")
             raise
@@ -125,13 +433,7 @@ class CSVHandler:
         Returns:
             int: Number of records inserted
         """
-        if isinstance(data_row, dict):
-            # Convert dictionary to tuple in the correct order, with default empty string for missing fields
-            data = [data_row.get(k, "") for k in HEADERS]
-            data_tuple = tuple(data)
-        else:
-            data_tuple = data_row
-        return self.insert_data(args=data_tuple)
+        return self.insert_data(args=encode_job_row(data_row))
 
     def update_data(self, sql=None, args=None):
         """
@@ -172,8 +474,8 @@ class CSVHandler:
         return True
 
     def close(self):
-        """Close handler (No-op for CSV)"""
-        pass
+        """Flush and close the CSV writer"""
+        self.writer.close()
 
     def save_data(self, data_rows):
         """
@@ -183,20 +485,9 @@ class CSVHandler:
             data_rows (list): List of data rows to save (can be dict or tuple)
         """
         try:
-            # Convert all rows to tuples if they are dictionaries
-            converted_rows = []
-            for row in data_rows:
-                if isinstance(row, dict):
-                    # Use current time as default for create_time if not provided
-                    converted_row = [row.get(k, "") for k in HEADERS]
-                    converted_rows.append(converted_row)
-                else:
-                    converted_rows.append(row)
-
-            with open(self.csv_file, 'a', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                for row in converted_rows:
-                    writer.writerow(row)
+            # Convert all rows to tuples ordered like the CSV header
+            converted_rows = list(map(encode_job_row, data_rows))
+            self.writer.write_rows(converted_rows)
             print(f"Successfully saved {len(converted_rows)} records to CSV")
         except Exception as e:
             print(f"Error saving data to CSV: {str(e)}", level="ERROR")
@@ -216,10 +507,10 @@ def test_csv_handler():
         test_data = [
             ("技术", "后端开发", "Python开发工程师", "北京", "海淀区",
              "测试公司", "互联网", "未融资", "100-499人", "五险一金",
-             "15-30K", "3-5年", "本科", "Python,MySQL", "2023-12-22"),
+             "15-30K", "3-5年", "本科", "Python,MySQL", "", "", "2023-12-22"),
             ("产品", "产品经理", "高级产品经理", "上海", "浦东新区",
              "科技公司", "金融", "B轮", "500-999人", "年终奖",
-             "20-40K", "5-10年", "本科", "产品设计,数据分析", "2023-12-22")
+             "20-40K", "5-10年", "本科", "产品设计,数据分析", "", "", "2023-12-22")
         ]
         
         # Test single record insert
@@ -0,0 +1,237 @@
+#!/usr/bin/python3
+# encoding: utf-8
+# @author: sunhao
+# @contact: smartadpole@163.com
+# @file: csv_index.py
+# @time: 2026/10/19 11:30
+# @function: Sidecar byte-offset index for the daily CSV files.
+
+import os
+import csv
+import json
+import loger
+
+INDEX_SUFFIX = '.idx'
+INDEX_VERSION = 2
+# Appended segments after which the sidecar is rewritten as a single segment
+COMPACT_SEGMENTS = 64
+# Columns whose values are mapped to row offsets
+INDEXED_COLUMNS = ['category', 'province', 'create_time']
+
+def iter_records(f):
+    """
+    Iterate complete CSV records of a binary file with their byte offsets
+
+    A record may span several lines when a quoted field contains newlines, so
+    lines are joined until the quote count is balanced. A trailing record
+    without its final newline (a write in progress) is not returned.
+
+    Args:
+        f: File object opened in binary mode, positioned at a record start
+
+    Yields:
+        tuple: (offset, raw record bytes)
+    """
+    offset = f.tell()
+    parts = []
+    quotes = 0
+    for line in iter(f.readline, b''):
+        if not line.endswith(b'\n'):
+            return
+        parts.append(line)
+        quotes += line.count(b'"')
+        if quotes % 2 == 0:
+            record = b''.join(parts)
+            yield offset, record
+            offset += len(record)
+            parts = []
+            quotes = 0
+
+def complete_records_length(csv_file):
+    """
+    Return the length of the leading part of a CSV made of complete records
+
+    Args:
+        csv_file (str): Path of the CSV file
+
+    Returns:
+        int: Number of valid leading bytes
+    """
+    if not os.path.exists(csv_file):
+        return 0
+    end = 0
+    with open(csv_file, 'rb') as f:
+        for offset, record in iter_records(f):
+            end = offset + len(record)
+    return end
+
+def parse_record(record):
+    """Decode a raw record into a list of fields"""
+    return next(csv.reader([record.decode('utf-8')]))
+
+class CSVOffsetIndex:
+    def __init__(self, csv_file):
+        """
+        Sidecar index mapping indexed column values to record offsets
+
+        The index is stored next to the CSV as <file>.idx, a JSON lines file
+        of segments. Each segment holds the offsets of the records between
+        its start and size byte positions; an update appends one segment
+        for the records added since, and the file is rewritten as a single
+        segment once COMPACT_SEGMENTS have piled up.
+
+        Args:
+            csv_file (str): Path of the CSV file to index
+        """
+        self.csv_file = csv_file
+        self.index_file = csv_file + INDEX_SUFFIX
+        self.size = 0
+        self.header = None
+        self.offsets = {column: {} for column in INDEXED_COLUMNS}
+        self.segments = 0
+        self.torn = False
+
+    def load(self):
+        """
+        Load the sidecar file if it exists and matches the CSV
+
+        Segments are merged in order. A segment not starting where the
+        previous one ended was appended by a concurrent update of the same
+        records and is skipped; a torn last line ends the index there.
+        """
+        if not os.path.exists(self.index_file):
+            return False
+        self.size = 0
+        self.header = None
+        self.offsets = {column: {} for column in INDEXED_COLUMNS}
+        self.segments = 0
+        self.torn = False
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        segment = json.loads(line) if line.endswith('\n') else None
+                    except ValueError:
+                        segment = None
+                    if segment is None:
+                        self.torn = True
+                        break
+                    if self.segments == 0 and segment.get('version') != INDEX_VERSION:
+                        return False
+                    self.segments += 1
+                    if segment['start'] != self.size:
+                        continue
+                    self.size = segment['size']
+                    self.header = segment.get('header', self.header)
+                    for column, values in segment['offsets'].items():
+                        for value, offsets in values.items():
+                            self.offsets[column].setdefault(value, []).extend(offsets)
+        except (OSError, KeyError, AttributeError) as e:
+            print(f"Ignoring unreadable CSV index {self.index_file}: {str(e)}", level="WARNING")
+            return False
+        if not self.segments or self.size > os.path.getsize(self.csv_file):
+            # The CSV was rewritten or truncated, the offsets are no longer valid
+            return False
+        return True
+
+    def save(self):
+        """Rewrite the index atomically as a single segment"""
+        tmp_file = self.index_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write(self._segment_line(0, self.offsets, header=True))
+        os.replace(tmp_file, self.index_file)
+        self.segments = 1
+        self.torn = False
+
+    def _segment_line(self, start, offsets, header=False):
+        """Serialize the offsets of the records from start to the indexed size as one line"""
+        segment = {'start': start, 'size': self.size, 'offsets': offsets}
+        if header:
+            segment.update(version=INDEX_VERSION, header=self.header)
+        return json.dumps(segment, ensure_ascii=False) + '\n'
+
+    def _append(self, start, offsets):
+        """Append a segment, compacting the file once it holds COMPACT_SEGMENTS or ends in a torn line"""
+        if self.torn or self.segments + 1 >= COMPACT_SEGMENTS:
+            self.save()
+            return
+        # One write call, so concurrent appends do not interleave within a line
+        with open(self.index_file, 'a', encoding='utf-8') as f:
+            f.write(self._segment_line(start, offsets, header=start == 0))
+        self.segments += 1
+
+    def update(self):
+        """
+        Index records appended since the last update
+
+        Returns:
+            CSVOffsetIndex: self
+        """
+        loaded = self.load()
+        if not loaded:
+            self.size = 0
+            self.header = None
+            self.offsets = {column: {} for column in INDEXED_COLUMNS}
+        if self.size == os.path.getsize(self.csv_file):
+            return self
+
+        start = self.size
+        added = {column: {} for column in INDEXED_COLUMNS}
+        with open(self.csv_file, 'rb') as f:
+            f.seek(self.size)
+            positions = None
+            for offset, record in iter_records(f):
+                self.size = offset + len(record)
+                fields = parse_record(record)
+                if self.header is None:
+                    self.header = fields
+                    continue
+                if positions is None:
+                    positions = [(c, self.header.index(c)) for c in INDEXED_COLUMNS if c in self.header]
+                for column, position in positions:
+                    value = fields[position] if position < len(fields) else ''
+                    self.offsets[column].setdefault(value, []).append(offset)
+                    added[column].setdefault(value, []).append(offset)
+        if self.size == start:
+            return self
+        if loaded:
+            self._append(start, added)
+        else:
+            self.save()
+        return self
+
+    def lookup(self, column, accept):
+        """
+        Collect offsets of records whose column value is accepted
+
+        Args:
+            column (str): Indexed column name
+            accept (callable): Predicate over the column value
+
+        Returns:
+            set: Matching record offsets, or None if the column is not indexed
+        """
+        if column not in self.offsets or self.header is None or column not in self.header:
+            return None
+        matched = set()
+        for value, offsets in self.offsets[column].items():
+            if accept(value):
+                matched.update(offsets)
+        return matched
+
+    def read(self, offsets):
+        """
+        Read records at the given offsets in file order
+
+        Args:
+            offsets (iterable): Record offsets
+
+        Yields:
+            list: Parsed record fields
+        """
+        with open(self.csv_file, 'rb') as f:
+            for offset in sorted(offsets):
+                f.seek(offset)
+                for _, record in iter_records(f):
+                    yield parse_record(record)
+                    break
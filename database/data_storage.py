@@ -7,28 +7,49 @@
 # @function: Data storage module for job listings.
 
 import os
-from datetime import datetime
-from database import MySQLHandler, CSVHandler
+from database import MySQLHandler, CSVHandler, SQLiteHandler
+from database.spool import WriteAheadSpool, SpoolReplayer
+from database.rollup import LRUCache, UNKNOWN_BUCKET, percentiles_from_histogram, rollup_query
 import loger
+from metrics import REGISTRY
+
+# Storage types that accept SQL statements in query/update/delete
+SQL_STORAGE_TYPES = ('mysql', 'sqlite')
+
+# Connection settings used by init_storage and the command line tools
+DEFAULT_DB_CONFIG = {
+    'host': 'localhost',
+    'user': 'root',
+    'password': '123456',
+    'database': 'spider_db'
+}
 
 class DataStorage:
-    def __init__(self, output_dir, storage_type='mysql', db_config=None):
+    def __init__(self, output_dir, storage_type='mysql', db_config=None, csv_codec='none'):
         """
         Initialize data storage
         
         Args:
             output_dir (str): Base output directory
-            storage_type (str): Storage type, 'mysql' or 'csv'
+            storage_type (str): Storage type, 'mysql', 'sqlite' or 'csv'
             db_config (dict): Database configuration if using MySQL
+            csv_codec (str): Compression codec for CSV storage, 'none', 'gzip' or 'zstd'
         """
         self.output_dir = output_dir
         self.storage_type = storage_type
         self.db_config = db_config
+        self.spool = None
+        self.replayer = None
+        self._reconnect = False
+        # Rollup results keyed by query, dropped whenever rows are written
+        self._rollup_cache = LRUCache()
         
         # Create output directories
         self.mysql_dir = os.path.join(output_dir, 'mysql')
+        self.sqlite_dir = os.path.join(output_dir, 'sqlite')
         self.csv_dir = os.path.join(output_dir, 'csv')
         os.makedirs(self.mysql_dir, exist_ok=True)
+        os.makedirs(self.sqlite_dir, exist_ok=True)
         os.makedirs(self.csv_dir, exist_ok=True)
         
         # Initialize storage handler
@@ -37,39 +58,64 @@ class DataStorage:
                 raise ValueError("Database configuration is required for MySQL storage")
             self.handler = MySQLHandler(**db_config)
             self.handler.create_database_and_table()
+            # Batches MySQL rejects are spooled locally and replayed in the background
+            self.spool = WriteAheadSpool(os.path.join(self.mysql_dir, 'spool'))
+            self.replayer = SpoolReplayer(self.spool, lambda: MySQLHandler(**db_config),
+                                          on_replayed=self._rollup_cache.clear)
+            self.replayer.start()
+            REGISTRY.gauge('spool_pending_segments', lambda: len(self.spool.segments()))
+        elif storage_type == 'sqlite':
+            self.handler = SQLiteHandler(self.sqlite_dir)
+            self.handler.create_database_and_table()
         else:
-            self.handler = CSVHandler(self.csv_dir)
+            self.handler = CSVHandler(self.csv_dir, codec=csv_codec)
 
     def save_data(self, data_rows):
         """
         Save data using configured storage handler
+
+        With MySQL, a batch that cannot be stored is appended to the local
+        spool instead of raising, and later batches follow it into the spool
+        until the replayer has drained it, so the crawler never blocks on a
+        dead connection.
         
         Args:
             data_rows (list): List of data rows to save
         """
+        if self.spool is not None and self.spool.has_pending():
+            self.spool.append(data_rows)
+            REGISTRY.inc('rows_spooled_total', len(data_rows))
+            print(f"Spooled {len(data_rows)} records while MySQL replay is pending")
+            return
         try:
-            if self.storage_type == 'mysql':
-                # Add create_time to each row
-                today = datetime.now().strftime('%Y-%m-%d')
-                for row in data_rows:
-                    row_with_time = row + (today,)
-                    self.handler.insert_job_listing(row_with_time)
-            else:
-                self.handler.save_data(data_rows)
-                
+            if self._reconnect:
+                # The connection died with the last failure, revive it before writing directly again
+                self.handler.ping()
+                self._reconnect = False
+            # Rows already carry create_time, handlers encode them with the shared schema
+            self.handler.save_data(data_rows)
+            self._rollup_cache.clear()
+            REGISTRY.inc('rows_stored_total', len(data_rows), backend=self.storage_type)
             print(f"Successfully saved {len(data_rows)} records using {self.storage_type} storage")
         except Exception as e:
             print(f"Error saving data: {str(e)}", level="ERROR")
-            # If MySQL fails, try CSV as fallback
-            if self.storage_type == 'mysql':
-                print("Trying CSV as fallback storage...")
-                csv_handler = CSVHandler(self.csv_dir)
-                csv_handler.save_data(data_rows)
-            else:
+            if self.spool is None:
                 raise
+            self._reconnect = True
+            self.spool.append(data_rows)
+            REGISTRY.inc('rows_spooled_total', len(data_rows))
+            print(f"Spooled {len(data_rows)} records for background replay", level="WARNING")
+            self.replayer.wake()
 
     def close(self):
-        """Close storage handler"""
+        """Stop the replayer, make a last replay attempt and close the handler"""
+        if self.replayer is not None:
+            REGISTRY.remove_gauge('spool_pending_segments')
+            self.replayer.stop()
+            self.spool.close()
+            if not self.replayer.replay_once() or self.spool.has_pending():
+                print(f"Spooled records remain in {self.spool.spool_dir} and will be replayed on next start",
+                      level="WARNING")
         if hasattr(self.handler, 'close'):
             self.handler.close()
 
@@ -85,8 +131,8 @@ class DataStorage:
         Returns:
             list/dict: Query results
         """
-        if self.storage_type != 'mysql':
-            raise ValueError("Query operations are only supported for MySQL storage")
+        if self.storage_type not in SQL_STORAGE_TYPES:
+            raise ValueError("Query operations are only supported for MySQL and SQLite storage")
             
         try:
             if n is None:
@@ -99,6 +145,162 @@ class DataStorage:
             print(f"Error querying data: {str(e)}", level="ERROR")
             raise
 
+    def iter_data(self, sql, args=None, batch_size=1000):
+        """
+        Stream query results with bounded memory, for exports and analytics
+
+        Args:
+            sql (str): SQL query
+            args (tuple/list): Query parameters
+            batch_size (int): Rows fetched per round
+
+        Yields:
+            dict: One row at a time
+        """
+        if self.storage_type not in SQL_STORAGE_TYPES:
+            raise ValueError("Query operations are only supported for MySQL and SQLite storage")
+        yield from self.handler.iter_rows(sql, args, batch_size)
+
+    def search_jobs(self, keywords, page=1, page_size=20):
+        """
+        Full-text search over job descriptions and skills
+
+        Args:
+            keywords (str/list): Search terms
+            page (int): Page number, starting at 1
+            page_size (int): Rows per page
+
+        Returns:
+            dict: total, page, page_size and rows ordered by relevance
+        """
+        if self.storage_type not in SQL_STORAGE_TYPES:
+            raise ValueError("Search operations are only supported for MySQL and SQLite storage")
+
+        try:
+            return self.handler.search(keywords, page, page_size)
+        except Exception as e:
+            print(f"Error searching data: {str(e)}", level="ERROR")
+            raise
+
+    def _cached_rollup(self, key, by, filters, start_date, end_date, extra_group=()):
+        """Run a rollup query through the result cache"""
+        if self.storage_type not in SQL_STORAGE_TYPES:
+            raise ValueError("Rollup operations are only supported for MySQL and SQLite storage")
+        rows = self._rollup_cache.get(key)
+        if rows is None:
+            sql, args = rollup_query(by, filters, start_date, end_date, extra_group)
+            try:
+                rows = self.handler.select_all(sql, args)
+            except Exception as e:
+                print(f"Error querying rollups: {str(e)}", level="ERROR")
+                raise
+            self._rollup_cache.put(key, rows)
+        return rows
+
+    def job_counts(self, by=('category',), start_date=None, end_date=None, **filters):
+        """
+        Count job listings grouped by category, sub_category, province or create_time
+
+        Served from the rollup table maintained on every write, so the cost
+        does not grow with the size of job_info.
+
+        Args:
+            by (tuple): Dimensions to group by, empty for a single total
+            start_date (str): Earliest create_time (YYYY-MM-DD), inclusive
+            end_date (str): Latest create_time (YYYY-MM-DD), inclusive
+            **filters: Dimension values to restrict to, e.g. province='广东'
+
+        Returns:
+            list: Dicts with the grouped dimensions and job_count
+        """
+        by = tuple(by)
+        key = ('counts', by, start_date, end_date, tuple(sorted(filters.items())))
+        rows = self._cached_rollup(key, by, filters, start_date, end_date)
+        return [dict(row, job_count=int(row['job_count'] or 0)) for row in rows]
+
+    def salary_percentiles(self, by=('category',), percentiles=(25, 50, 75, 95), start_date=None, end_date=None,
+                           **filters):
+        """
+        Monthly salary percentiles grouped by category, sub_category, province or create_time
+
+        Computed from the salary histogram of the rollup table, so values are
+        whole K per month at the midpoint of each posted range. Listings whose
+        salary cannot be parsed are left out.
+
+        Args:
+            by (tuple): Dimensions to group by, empty for a single group
+            percentiles (tuple): Percentiles between 0 and 100
+            start_date (str): Earliest create_time (YYYY-MM-DD), inclusive
+            end_date (str): Latest create_time (YYYY-MM-DD), inclusive
+            **filters: Dimension values to restrict to
+
+        Returns:
+            list: Dicts with the grouped dimensions, job_count and p<percentile> keys
+        """
+        by = tuple(by)
+        key = ('salary', by, start_date, end_date, tuple(sorted(filters.items())))
+        rows = self._cached_rollup(key, by, filters, start_date, end_date, extra_group=('salary_bucket',))
+        histograms = {}
+        for row in rows:
+            if row['salary_bucket'] == UNKNOWN_BUCKET:
+                continue
+            group = tuple(row[c] for c in by)
+            histograms.setdefault(group, {})[row['salary_bucket']] = int(row['job_count'])
+        result = []
+        for group, histogram in sorted(histograms.items()):
+            entry = dict(zip(by, group))
+            entry['job_count'] = sum(histogram.values())
+            entry.update(percentiles_from_histogram(histogram, percentiles))
+            result.append(entry)
+        return result
+
+    def rebuild_rollups(self):
+        """
+        Recompute the rollup tables from job_info
+
+        update_data/delete_data keep the rollups current, this is only
+        needed for rows stored before the rollup table existed or changed
+        by other tools.
+
+        Returns:
+            int: Number of job rows aggregated
+        """
+        if self.storage_type not in SQL_STORAGE_TYPES:
+            raise ValueError("Rollup operations are only supported for MySQL and SQLite storage")
+        try:
+            return self.handler.rebuild_rollups()
+        finally:
+            self._rollup_cache.clear()
+
+    def purge_before(self, cutoff):
+        """
+        Remove listings created before cutoff
+
+        MySQL drops whole monthly partitions, SQLite deletes in batches and
+        CSV storage removes the daily files.
+
+        Args:
+            cutoff (date/str): First date to keep
+
+        Returns:
+            int: Dropped partitions (MySQL), deleted rows (SQLite) or removed files (CSV)
+        """
+        try:
+            return self.handler.purge_before(cutoff)
+        finally:
+            self._rollup_cache.clear()
+
+    def prune_descriptions(self):
+        """
+        Delete stored job descriptions (and on MySQL skills) that no listing references any more
+
+        Returns:
+            int: Number of deleted descriptions
+        """
+        if self.storage_type not in SQL_STORAGE_TYPES:
+            raise ValueError("Description store is only used by MySQL and SQLite storage")
+        return self.handler.prune_descriptions()
+
     def update_data(self, sql, args=None):
         """
         Update data in storage
@@ -110,14 +312,16 @@ class DataStorage:
         Returns:
             int: Number of affected rows
         """
-        if self.storage_type != 'mysql':
-            raise ValueError("Update operations are only supported for MySQL storage")
+        if self.storage_type not in SQL_STORAGE_TYPES:
+            raise ValueError("Update operations are only supported for MySQL and SQLite storage")
             
         try:
             return self.handler.update_data(sql, args)
         except Exception as e:
             print(f"Error updating data: {str(e)}", level="ERROR")
             raise
+        finally:
+            self._rollup_cache.clear()
 
     def delete_data(self, sql, args=None):
         """
@@ -130,43 +334,44 @@ class DataStorage:
         Returns:
             int: Number of affected rows
         """
-        if self.storage_type != 'mysql':
-            raise ValueError("Delete operations are only supported for MySQL storage")
+        if self.storage_type not in SQL_STORAGE_TYPES:
+            raise ValueError("Delete operations are only supported for MySQL and SQLite storage")
             
         try:
             return self.handler.delete_data(sql, args)
         except Exception as e:
             print(f"Error deleting data: {str(e)}", level="ERROR")
             raise
+        finally:
+            self._rollup_cache.clear()
 
-def init_storage(output_dir):
+def init_storage(output_dir, csv_codec='none'):
     """
-    Initialize data storage (MySQL or CSV)
+    Initialize data storage (MySQL, then SQLite, then CSV)
 
     Args:
         output_dir (str): Directory for output files
+        csv_codec (str): Compression codec of the CSV fallback, 'none', 'gzip' or 'zstd'
 
     Returns:
-        storage: Initialized storage instance
+        DataStorage: Initialized storage instance
     """
-    storage = None
     try:
         # Try to connect to MySQL
-        db = MySQLHandler(
-            host='localhost',
-            user='root',
-            password='123456',
-            database='spider_db'
-        )
-        db.create_database_and_table()
-        storage = db
+        storage = DataStorage(output_dir, 'mysql', DEFAULT_DB_CONFIG)
         print("Successfully connected to MySQL database")
     except Exception as e:
-        # Fallback to CSV storage if MySQL connection fails
         print(f"MySQL connection failed: {str(e)}", level="WARNING")
-        print("Switching to CSV storage mode", level="WARNING")
-        storage = CSVHandler(output_dir)
-        storage.create_database_and_table()
-        print("Successfully initialized CSV storage")
+        try:
+            # Fallback to the embedded SQLite store if no database server is available
+            print("Switching to SQLite storage mode", level="WARNING")
+            storage = DataStorage(output_dir, 'sqlite')
+            print("Successfully initialized SQLite storage")
+        except Exception as e:
+            # Fallback to CSV storage if SQLite is unusable as well
+            print(f"SQLite initialization failed: {str(e)}", level="WARNING")
+            print("Switching to CSV storage mode", level="WARNING")
+            storage = DataStorage(output_dir, 'csv', csv_codec=csv_codec)
+            print("Successfully initialized CSV storage")
 
     return storage
@@ -0,0 +1,136 @@
+#!/usr/bin/python3
+# encoding: utf-8
+# @author: sunhao
+# @contact: smartadpole@163.com
+# @file: desc_store.py
+# @time: 2026/10/19 15:00
+# @function: Content-addressed storage of job descriptions for the SQL backends.
+
+import zlib
+import hashlib
+from database.schema import COLUMN_NAMES
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+DESC_CODECS = ('none', 'zlib', 'zstd')
+# Short descriptions do not shrink enough to pay for the decompression
+MIN_COMPRESS_BYTES = 128
+FETCH_CHUNK_SIZE = 500
+
+_desc_index = COLUMN_NAMES.index('job_desc')
+
+def check_desc_codec(codec):
+    """Validate a description codec and its optional dependency"""
+    if codec not in DESC_CODECS:
+        raise ValueError(f"Unsupported description codec: {codec}, choose from {', '.join(DESC_CODECS)}")
+    if codec == 'zstd' and zstandard is None:
+        raise ImportError("zstandard is required for zstd compression, install it with 'pip install zstandard'")
+
+def desc_hash(text):
+    """
+    Content hash of a description
+
+    Args:
+        text (str): Job description
+
+    Returns:
+        str: Hex SHA-1 digest, None for an empty description
+    """
+    if not text:
+        return None
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+def encode_desc(text, codec='zlib', level=None):
+    """
+    Compress a description for storage
+
+    Args:
+        text (str): Job description
+        codec (str): 'none', 'zlib' or 'zstd'
+        level (int): Compression level, None for the codec default
+
+    Returns:
+        tuple: (codec actually used, content bytes)
+    """
+    data = text.encode('utf-8')
+    if codec == 'none' or len(data) < MIN_COMPRESS_BYTES:
+        return 'none', data
+    if codec == 'zstd':
+        compressed = zstandard.ZstdCompressor(level=level or 3).compress(data)
+    else:
+        compressed = zlib.compress(data, 6 if level is None else level)
+    if len(compressed) >= len(data):
+        return 'none', data
+    return codec, compressed
+
+def decode_desc(codec, content):
+    """
+    Restore a stored description
+
+    Args:
+        codec (str): Codec recorded with the content
+        content (bytes/str): Stored content
+
+    Returns:
+        str: Job description, '' if nothing is stored
+    """
+    if content is None:
+        return ''
+    if isinstance(content, str):
+        return content
+    if codec == 'zlib':
+        content = zlib.decompress(content)
+    elif codec == 'zstd':
+        content = zstandard.ZstdDecompressor().decompress(content)
+    return bytes(content).decode('utf-8')
+
+def split_descriptions(encoded_rows):
+    """
+    Replace descriptions in encoded rows by their hash
+
+    Args:
+        encoded_rows (list): Tuples ordered like COLUMN_NAMES
+
+    Returns:
+        tuple: (rows ordered like STORED_COLUMN_NAMES, {hash: description})
+    """
+    stored_rows, descriptions = [], {}
+    for row in encoded_rows:
+        text = row[_desc_index]
+        digest = desc_hash(text)
+        if digest is not None:
+            descriptions[digest] = text
+        stored_rows.append(row[:_desc_index] + (digest,) + row[_desc_index + 1:])
+    return stored_rows, descriptions
+
+def hydrate_descriptions(rows, fetch):
+    """
+    Put job_desc back into rows read from job_info
+
+    Rows without a desc_hash column are returned unchanged. The hash column
+    is replaced in place by job_desc, so callers see the same keys as before
+    descriptions moved out of job_info; rows read from JOB_INFO_VIEW already
+    carry the text and are not fetched again.
+
+    Args:
+        rows (list): Rows as dicts
+        fetch (callable): fetch(hashes) -> {hash: description}
+
+    Returns:
+        list: Rows as dicts
+    """
+    if not rows or 'desc_hash' not in rows[0]:
+        return rows
+    wanted = sorted({row['desc_hash'] for row in rows if row['desc_hash'] and row.get('job_desc') is None})
+    texts = {}
+    for start in range(0, len(wanted), FETCH_CHUNK_SIZE):
+        texts.update(fetch(wanted[start:start + FETCH_CHUNK_SIZE]))
+    hydrated = []
+    for row in rows:
+        text = row.get('job_desc') or texts.get(row['desc_hash'], '')
+        hydrated.append({('job_desc' if key == 'desc_hash' else key): (text if key == 'desc_hash' else value)
+                         for key, value in row.items() if key != 'job_desc'})
+    return hydrated
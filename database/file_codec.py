@@ -0,0 +1,238 @@
+#!/usr/bin/python3
+# encoding: utf-8
+# @author: sunhao
+# @contact: smartadpole@163.com
+# @file: file_codec.py
+# @time: 2026/10/19 12:00
+# @function: Append-safe framed compression for file based storage.
+
+import os
+import zlib
+import loger
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# codec name -> (file extension, default level)
+CODECS = {
+    'none': ('', None),
+    'gzip': ('.gz', 6),
+    'zstd': ('.zst', 3),
+}
+READ_CHUNK_SIZE = 256 * 1024
+
+def check_codec(codec):
+    """
+    Validate a codec name and its optional dependency
+
+    Args:
+        codec (str): 'none', 'gzip' or 'zstd'
+
+    Returns:
+        str: The codec name
+    """
+    if codec not in CODECS:
+        raise ValueError(f"Unsupported compression codec: {codec}, choose from {', '.join(CODECS)}")
+    if codec == 'zstd' and zstandard is None:
+        raise ImportError("zstandard is required for zstd compression, install it with 'pip install zstandard'")
+    return codec
+
+def codec_extension(codec):
+    """Return the file name extension of a codec"""
+    return CODECS[check_codec(codec)][0]
+
+def codec_for_path(path):
+    """Detect the codec of a file from its extension"""
+    for codec, (extension, _) in CODECS.items():
+        if extension and path.endswith(extension):
+            return codec
+    return 'none'
+
+class FramedWriter:
+    def __init__(self, path, codec='none', level=None, fsync=False, valid_length=None):
+        """
+        Append-only writer that stores each flush as a self-contained frame
+
+        With gzip every frame is a complete gzip member, with zstd a complete
+        zstd frame; concatenated frames are valid streams for standard tools.
+        A crash can only leave the last frame incomplete: readers skip it and
+        the writer cuts it off before appending, so earlier rows are never lost.
+
+        Args:
+            path (str): File to append to
+            codec (str): 'none', 'gzip' or 'zstd'
+            level (int): Compression level, None for the codec default
+            fsync (bool): fsync the file after every frame
+            valid_length (int): Length of the intact part of an existing file, detected when None
+        """
+        self.path = path
+        self.codec = check_codec(codec)
+        self.level = CODECS[codec][1] if level is None else level
+        self.fsync = fsync
+        self._buffer = []
+        self._compressor = zstandard.ZstdCompressor(level=self.level) if codec == 'zstd' else None
+        truncate_incomplete_tail(path, complete_length(path, codec) if valid_length is None else valid_length)
+        self._file = open(path, 'ab')
+
+    def tell(self):
+        """Return the size of the data already on disk"""
+        return self._file.tell()
+
+    def write(self, data):
+        """
+        Buffer data for the next frame
+
+        Args:
+            data (bytes): Data to append
+        """
+        self._buffer.append(data)
+
+    def flush(self):
+        """Write buffered data as one frame"""
+        if self._buffer:
+            data = b''.join(self._buffer)
+            self._buffer = []
+            if self.codec == 'gzip':
+                compressor = zlib.compressobj(self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+                data = compressor.compress(data) + compressor.flush()
+            elif self.codec == 'zstd':
+                data = self._compressor.compress(data)
+            self._file.write(data)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        """Flush the last frame and close the file"""
+        if self._file is None:
+            return
+        self.flush()
+        self._file.close()
+        self._file = None
+
+def _new_decompressor(codec):
+    if codec == 'gzip':
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    return zstandard.ZstdDecompressor().decompressobj()
+
+def _scan_frames(f, codec):
+    """
+    Decompress complete frames from a binary file object
+
+    Yields:
+        tuple: (file offset after the frame, decompressed frame content)
+    """
+    decompressor = _new_decompressor(codec)
+    pending = []
+    consumed = 0
+    for chunk in iter(lambda: f.read(READ_CHUNK_SIZE), b''):
+        consumed += len(chunk)
+        while chunk:
+            try:
+                pending.append(decompressor.decompress(chunk))
+            except Exception as e:
+                print(f"Stopping at corrupt frame in {f.name}: {str(e)}", level="WARNING")
+                return
+            if not decompressor.eof:
+                break
+            # Frame complete, emit it and continue with the next one
+            chunk = decompressor.unused_data
+            yield consumed - len(chunk), b''.join(pending)
+            pending = []
+            decompressor = _new_decompressor(codec)
+    if any(pending):
+        print(f"Skipping incomplete trailing frame in {f.name}", level="WARNING")
+
+def iter_frames(path, codec=None):
+    """
+    Iterate the decompressed content of every complete frame of a file
+
+    Args:
+        path (str): File to read
+        codec (str): Codec, detected from the extension when None
+
+    Yields:
+        bytes: Decompressed frame content
+    """
+    codec = check_codec(codec or codec_for_path(path))
+    with open(path, 'rb') as f:
+        if codec == 'none':
+            for chunk in iter(lambda: f.read(READ_CHUNK_SIZE), b''):
+                yield chunk
+            return
+        for _, data in _scan_frames(f, codec):
+            yield data
+
+def complete_length(path, codec=None):
+    """
+    Return the length of the leading part of a file made of complete frames
+
+    For uncompressed files this is the end of the last complete line.
+
+    Args:
+        path (str): File to inspect
+        codec (str): Codec, detected from the extension when None
+
+    Returns:
+        int: Number of valid leading bytes
+    """
+    codec = check_codec(codec or codec_for_path(path))
+    if not os.path.exists(path):
+        return 0
+    with open(path, 'rb') as f:
+        if codec == 'none':
+            size = f.seek(0, os.SEEK_END)
+            # Walk back block by block to the last newline
+            while size > 0:
+                start = max(0, size - READ_CHUNK_SIZE)
+                f.seek(start)
+                block = f.read(size - start)
+                position = block.rfind(b'\n')
+                if position >= 0:
+                    return start + position + 1
+                size = start
+            return 0
+        end = 0
+        for end, _ in _scan_frames(f, codec):
+            pass
+        return end
+
+def truncate_incomplete_tail(path, valid_length):
+    """
+    Cut off bytes left behind by an interrupted write before appending again
+
+    Args:
+        path (str): File to repair
+        valid_length (int): Number of valid leading bytes
+    """
+    if os.path.exists(path) and os.path.getsize(path) > valid_length:
+        print(f"Truncating {os.path.getsize(path) - valid_length} bytes of an interrupted write in {path}",
+              level="WARNING")
+        with open(path, 'r+b') as f:
+            f.truncate(valid_length)
+
+def iter_lines(path, codec=None, encoding='utf-8'):
+    """
+    Iterate decoded text lines of a possibly compressed file
+
+    Only complete lines are returned, a trailing partial line is dropped.
+
+    Args:
+        path (str): File to read
+        codec (str): Codec, detected from the extension when None
+        encoding (str): Text encoding
+
+    Yields:
+        str: Line including its line ending
+    """
+    tail = b''
+    for frame in iter_frames(path, codec):
+        data = tail + frame
+        end = data.rfind(b'\n') + 1
+        tail = data[end:]
+        if end:
+            # Split on '\n' only, str.splitlines would also break on characters inside quoted fields
+            for line in data[:end - 1].decode(encoding).split('\n'):
+                yield line + '\n'
@@ -0,0 +1,53 @@
+#!/usr/bin/python3
+# encoding: utf-8
+# @author: sunhao
+# @contact: smartadpole@163.com
+# @file: migrate.py
+# @time: 2026/10/20 17:00
+# @function: Explicit schema migrations of an existing MySQL job_info table.
+
+import argparse
+import loger
+from database.mysql_handler import MIGRATIONS
+
+def parse_arguments():
+    """
+    Parse command line arguments
+
+    Returns:
+        argparse.Namespace: Parsed arguments
+    """
+    parser = argparse.ArgumentParser(description='Show or apply the migrations an existing MySQL job_info needs')
+    parser.add_argument('--apply', action='store_true',
+                        help='Apply the pending migrations, without it they are only listed')
+    parser.add_argument('--backup', action='store_true',
+                        help='Copy job_info to job_info_backup_<time> before the first migration')
+    return parser.parse_args()
+
+def main():
+    from database import MySQLHandler
+    from database.data_storage import DEFAULT_DB_CONFIG
+
+    args = parse_arguments()
+    handler = MySQLHandler(**DEFAULT_DB_CONFIG)
+    try:
+        pending = handler.pending_migrations()
+        if not pending:
+            print("job_info is up to date, nothing to migrate")
+            return
+        handler.cursor.execute("SELECT TABLE_ROWS AS n FROM information_schema.TABLES "
+                               "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'job_info'")
+        print(f"job_info holds about {handler.cursor.fetchone()['n']} rows, pending migrations:")
+        for name, description in MIGRATIONS:
+            if name in pending:
+                print(f"  {name}: {description}")
+        if not args.apply:
+            print("Dry run, pass --apply (and preferably --backup) to migrate; stop the crawlers first")
+            return
+        applied = handler.migrate(backup=args.backup)
+        print(f"Applied migrations: {', '.join(applied)}")
+    finally:
+        handler.close()
+
+if __name__ == "__main__":
+    main()
@@ -7,36 +7,38 @@
 # @function: MySQL database handler for job listings.
 
 import pymysql
+from datetime import date, datetime
 import loger
-from datetime import datetime
-
-# 定义表列信息
-JOB_INFO_COLUMNS = [
-    ('category', 'VARCHAR(255)', 'Primary category'),
-    ('sub_category', 'VARCHAR(255)', 'Secondary category'),
-    ('job_title', 'VARCHAR(255)', 'Job title'),
-    ('province', 'VARCHAR(100)', 'Province'),
-    ('job_location', 'VARCHAR(255)', 'Job location'),
-    ('job_company', 'VARCHAR(255)', 'Company name'),
-    ('job_industry', 'VARCHAR(255)', 'Industry type'),
-    ('job_finance', 'VARCHAR(255)', 'Financing status'),
-    ('job_scale', 'VARCHAR(255)', 'Company size'),
-    ('job_welfare', 'VARCHAR(255)', 'Company benefits'),
-    ('job_salary_range', 'VARCHAR(255)', 'Salary range'),
-    ('job_experience', 'VARCHAR(255)', 'Work experience'),
-    ('job_education', 'VARCHAR(255)', 'Education requirement'),
-    ('job_skills', 'VARCHAR(255)', 'Skill requirements'),
-    ('job_address', 'VARCHAR(255)', 'Job address'),
-    ('job_salary', 'VARCHAR(255)', 'Salary'),
-    ('job_desc', 'TEXT', 'Job description'),
-    ('create_time', 'VARCHAR(50)', 'Crawl time')
+from database.schema import JOB_INFO_FIELDS, JOB_INFO_INDEXES, MYSQL_EXTRA_INDEXES, OBSOLETE_INDEXES, \
+    MYSQL_FULLTEXT_INDEXES, DESC_STORE_TABLE, SKILLS_STORE_TABLE, COLUMN_NAMES, PARTITION_COLUMN, PARTITION_MONTHS_AHEAD, UNKNOWN_DATE, encode_job_row, \
+    insert_sql, mysql_create_table_sql, mysql_desc_store_sql, mysql_skills_store_sql, mysql_job_view_sql, mysql_partition_sql, \
+    mysql_partition_definitions, month_start, add_months, route_desc_reads
+from database.desc_store import desc_hash, hydrate_descriptions, split_descriptions
+from database.spool import SPOOL_LEDGER_TABLE, mysql_spool_ledger_sql
+from database.search import split_keywords, page_bounds, search_result
+from database.rollup import ROLLUP_TABLE, count_rollup_keys, mysql_rollup_table_sql, rollup_params, \
+    rollup_upsert_sql, rebuild_rollups, rollup_decrement_params, rollup_delete_select, rollup_prune_sql, \
+    updates_job_info
+
+DEFAULT_STREAM_BATCH_SIZE = 1000
+# Seconds the server waits on a slow consumer of a streamed result before aborting it
+STREAM_WRITE_TIMEOUT = 3600
+
+_skills_index = COLUMN_NAMES.index('job_skills')
+
+# Migrations of older job_info layouts in the order migrate() applies them: (name, description)
+MIGRATIONS = [
+    ('inline_descriptions', 'Move job_info.job_desc into job_desc_store and drop the column'),
+    ('partitioning', 'Convert create_time to DATE and partition job_info by month'),
+    ('skills_store', 'Collect job_skills into job_skills_store and index job_info.job_skills'),
+    ('fulltext_indexes', 'Build the FULLTEXT indexes used by search'),
 ]
 
-# 获取列名列表
-COLUMN_NAMES = [col[0] for col in JOB_INFO_COLUMNS]
+# 表列信息由 schema 统一定义，保留旧名称供外部引用
+JOB_INFO_COLUMNS = [tuple(field) for field in JOB_INFO_FIELDS]
 
 class MySQLHandler:
-    def __init__(self, host, user, password, database, port=3306, charset='utf8mb4'):
+    def __init__(self, host, user, password, database, port=3306, charset='utf8mb4', compress_desc=True):
         """
         Initialize MySQL handler
         
@@ -47,6 +49,7 @@ class MySQLHandler:
             database (str): Database name
             port (int): Database port
             charset (str): Database charset
+            compress_desc (bool): Create job_desc_store with InnoDB compressed pages
         """
         self.host = host
         self.user = user
@@ -54,6 +57,7 @@ class MySQLHandler:
         self.database = database
         self.port = port
         self.charset = charset
+        self.compress_desc = compress_desc
         self.conn = None
         self.cursor = None
         self.connect()
@@ -74,24 +78,39 @@ class MySQLHandler:
             print(f"Error connecting to database: {str(e)}", level="WARNING")
             raise
 
+    def ping(self):
+        """Check the connection and reconnect if it was lost"""
+        self.conn.ping(reconnect=True)
+
     def create_database_and_table(self):
-        """Create database and table if not exists"""
+        """
+        Create database and table if not exists
+
+        Only missing objects are created. Tables in an older layout are
+        left alone and refused; they are converted by the explicit
+        migration command (python -m database.migrate).
+        """
         try:
             # Create database
-            self.cursor.execute("CREATE DATABASE IF NOT EXISTS spider_db")
-            self.cursor.execute("USE spider_db")
-            
+            self.cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{self.database}`")
+            self.cursor.execute(f"USE `{self.database}`")
+            pending = self.pending_migrations()
+            if pending:
+                raise RuntimeError(f"job_info needs the migrations {', '.join(pending)}; "
+                                   f"run python -m database.migrate first")
+
             # Create table
-            create_table_sql = f"""
-            CREATE TABLE IF NOT EXISTS job_info (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                {', '.join([f"{col[0]} {col[1]} NULL COMMENT '{col[2]}'" for col in JOB_INFO_COLUMNS])},
-                INDEX idx_category (category),
-                INDEX idx_job_title (job_title),
-                INDEX idx_job_company (job_company)
-            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-            """
+            self._create_desc_store()
+            create_table_sql = mysql_create_table_sql()
             self.cursor.execute(create_table_sql)
+            self.cursor.execute(mysql_rollup_table_sql())
+            self.cursor.execute(mysql_skills_store_sql())
+            self.cursor.execute(mysql_spool_ledger_sql())
+            self.conn.commit()
+            self.ensure_partitions()
+            # Only new, still empty tables lack their FULLTEXT indexes here
+            self._ensure_fulltext_index()
+            self.cursor.execute(mysql_job_view_sql())
             self.conn.commit()
             print("Database and table created successfully")
         except Exception as e:
@@ -99,6 +118,347 @@ class MySQLHandler:
             print(f"Error creating database and table: {str(e)}", level="ERROR")
             raise
 
+    def _create_desc_store(self):
+        """Create the description store, without page compression if the server does not allow it"""
+        if not self.compress_desc:
+            self.cursor.execute(mysql_desc_store_sql(compressed=False))
+            return
+        try:
+            self.cursor.execute(mysql_desc_store_sql(compressed=True))
+        except pymysql.MySQLError as e:
+            # Compressed pages need innodb_file_per_table and a page size of at most 16K
+            print(f"Compressed row format unavailable ({str(e)}), storing descriptions uncompressed",
+                  level="WARNING")
+            self.cursor.execute(mysql_desc_store_sql(compressed=False))
+
+    def pending_migrations(self):
+        """
+        Migrations the existing tables need before create_database_and_table may run
+
+        Returns:
+            list: Names from MIGRATIONS, empty for a new or up-to-date database
+        """
+        if not self._table_columns('job_info'):
+            return []
+        pending = []
+        if 'job_desc' in self._table_columns('job_info'):
+            pending.append('inline_descriptions')
+        if self._column_type('job_info', PARTITION_COLUMN) != 'date' or not self._partitions():
+            pending.append('partitioning')
+        indexes = self._table_indexes('job_info')
+        if not self._table_columns(SKILLS_STORE_TABLE) or \
+                any(name not in indexes for name, _ in MYSQL_EXTRA_INDEXES):
+            pending.append('skills_store')
+        if any(self._table_columns(table) and index_name not in self._table_indexes(table)
+               for table, index_name, _ in MYSQL_FULLTEXT_INDEXES):
+            pending.append('fulltext_indexes')
+        return pending
+
+    def migrate(self, backup=False):
+        """
+        Apply the pending migrations in the order of MIGRATIONS
+
+        Each step is checked again before it runs, since an earlier step
+        can create work for a later one (a new skills store needs its
+        FULLTEXT index).
+
+        Args:
+            backup (bool): Copy job_info to a job_info_backup_<time> table first
+
+        Returns:
+            list: Names of the applied migrations
+        """
+        steps = {
+            'inline_descriptions': self._migrate_inline_descriptions,
+            'partitioning': self._migrate_partitioning,
+            'skills_store': self._migrate_skills_store,
+            'fulltext_indexes': self._ensure_fulltext_index,
+        }
+        applied = []
+        for name, description in MIGRATIONS:
+            if name not in self.pending_migrations():
+                continue
+            if backup and not applied:
+                self.backup_table('job_info')
+            print(f"Applying migration {name}: {description}")
+            steps[name]()
+            applied.append(name)
+        return applied
+
+    def backup_table(self, table):
+        """
+        Copy a table, with its layout and rows, before it is migrated
+
+        Args:
+            table (str): Table to copy
+
+        Returns:
+            str: Name of the copy
+        """
+        backup = f"{table}_backup_{datetime.now():%Y%m%d%H%M%S}"
+        print(f"Copying {table} to {backup}, this may take a while on large tables")
+        self.cursor.execute(f"CREATE TABLE {backup} LIKE {table}")
+        self.cursor.execute(f"INSERT INTO {backup} SELECT * FROM {table}")
+        self.conn.commit()
+        return backup
+
+    def _migrate_skills_store(self):
+        """Create the skills store, filled from job_info when it is new, and index job_info.job_skills"""
+        created = not self._table_columns(SKILLS_STORE_TABLE)
+        self.cursor.execute(mysql_skills_store_sql())
+        indexes = self._table_indexes('job_info')
+        changes = [f"ADD INDEX {name} ({', '.join(columns)})" for name, columns in MYSQL_EXTRA_INDEXES
+                   if name not in indexes]
+        if changes:
+            self.cursor.execute(f"ALTER TABLE job_info {', '.join(changes)}")
+        if created:
+            print("Collecting job skills into job_skills_store, this may take a while on large tables")
+            self.cursor.execute(f"INSERT IGNORE INTO {SKILLS_STORE_TABLE} (content) "
+                                f"SELECT DISTINCT job_skills FROM job_info WHERE job_skills <> ''")
+        self.conn.commit()
+
+    def _table_columns(self, table):
+        self.cursor.execute("SELECT COLUMN_NAME AS name FROM information_schema.COLUMNS "
+                            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s", (table,))
+        return [row['name'] for row in self.cursor.fetchall()]
+
+    def _column_type(self, table, column):
+        self.cursor.execute("SELECT DATA_TYPE AS type FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE() "
+                            "AND TABLE_NAME = %s AND COLUMN_NAME = %s", (table, column))
+        row = self.cursor.fetchone()
+        return row['type'] if row else None
+
+    def _table_indexes(self, table):
+        self.cursor.execute("SELECT DISTINCT INDEX_NAME AS name FROM information_schema.STATISTICS "
+                            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s", (table,))
+        return [row['name'] for row in self.cursor.fetchall()]
+
+    def _migrate_inline_descriptions(self, chunk_size=1000):
+        """
+        Move descriptions of a job_info table created before job_desc_store into the store
+
+        job_info.job_desc is dropped only after every row with a description
+        was checked to reference a stored one; otherwise the migration stops
+        with the column in place and can be run again.
+        """
+        columns = self._table_columns('job_info')
+        if 'job_desc' not in columns:
+            return
+        self._create_desc_store()
+        print("Moving job descriptions into job_desc_store, this may take a while on large tables")
+        if 'desc_hash' not in columns:
+            self.cursor.execute("ALTER TABLE job_info ADD COLUMN desc_hash CHAR(40) NULL "
+                                "COMMENT 'SHA-1 of the description in job_desc_store' AFTER job_desc, "
+                                "ADD INDEX idx_desc_hash (desc_hash)")
+        last_id = 0
+        while True:
+            self.cursor.execute("SELECT id, job_desc FROM job_info WHERE id > %s ORDER BY id LIMIT %s",
+                                (last_id, chunk_size))
+            rows = self.cursor.fetchall()
+            if not rows:
+                break
+            hashes = [(desc_hash(row['job_desc']), row['id']) for row in rows]
+            self._store_descriptions({digest: row['job_desc'] for (digest, _), row in zip(hashes, rows) if digest})
+            self.cursor.executemany("UPDATE job_info SET desc_hash = %s WHERE id = %s", hashes)
+            self.conn.commit()
+            last_id = rows[-1]['id']
+        self.cursor.execute(f"SELECT SUM(j.desc_hash IS NULL AND j.job_desc <> '') AS unhashed, "
+                            f"SUM(j.desc_hash IS NOT NULL AND d.desc_hash IS NULL) AS unstored FROM job_info j "
+                            f"LEFT JOIN {DESC_STORE_TABLE} d ON d.desc_hash = j.desc_hash")
+        check = self.cursor.fetchone()
+        if check['unhashed'] or check['unstored']:
+            raise RuntimeError(f"{int(check['unhashed'] or 0)} job_info rows have a description without desc_hash and "
+                               f"{int(check['unstored'] or 0)} reference a description missing from "
+                               f"{DESC_STORE_TABLE}; job_info.job_desc was kept, run the migration again")
+        if 'ft_job_desc_skills' in self._table_indexes('job_info'):
+            self.cursor.execute("ALTER TABLE job_info DROP INDEX ft_job_desc_skills")
+        self.cursor.execute("ALTER TABLE job_info DROP COLUMN job_desc")
+        self.conn.commit()
+
+    def _partitions(self):
+        """
+        Partitions of job_info in order
+
+        Returns:
+            list: (partition name, exclusive upper bound date, None for MAXVALUE)
+        """
+        self.cursor.execute("SELECT PARTITION_NAME AS name, PARTITION_DESCRIPTION AS bound "
+                            "FROM information_schema.PARTITIONS WHERE TABLE_SCHEMA = DATABASE() "
+                            "AND TABLE_NAME = 'job_info' AND PARTITION_NAME IS NOT NULL "
+                            "ORDER BY PARTITION_ORDINAL_POSITION")
+        return [(row['name'], None if row['bound'] == 'MAXVALUE' else date.fromisoformat(row['bound'].strip("'")))
+                for row in self.cursor.fetchall()]
+
+    def _migrate_partitioning(self):
+        """Convert a job_info table created before create_time was a partitioned DATE column"""
+        if self._column_type('job_info', PARTITION_COLUMN) != 'date':
+            print("Converting job_info.create_time to DATE, this may take a while on large tables")
+            self.cursor.execute(f"UPDATE job_info SET {PARTITION_COLUMN} = %s WHERE {PARTITION_COLUMN} IS NULL "
+                                f"OR {PARTITION_COLUMN} NOT REGEXP '^[0-9]{{4}}-[0-9]{{2}}-[0-9]{{2}}'", (UNKNOWN_DATE,))
+            self.cursor.execute(f"UPDATE job_info SET {PARTITION_COLUMN} = LEFT({PARTITION_COLUMN}, 10) "
+                                f"WHERE LENGTH({PARTITION_COLUMN}) > 10")
+            self.cursor.execute(f"ALTER TABLE job_info MODIFY {PARTITION_COLUMN} DATE NOT NULL COMMENT 'Crawl date'")
+            self.conn.commit()
+        if self._partitions():
+            return
+        print("Partitioning job_info by month, this may take a while on large tables")
+        indexes = self._table_indexes('job_info')
+        # Partitioned tables allow no FULLTEXT index and need the partition column in the primary key
+        changes = [f"DROP INDEX {name}" for name in indexes if name in OBSOLETE_INDEXES or name == 'ft_job_skills']
+        changes += [f"ADD INDEX {name} ({', '.join(columns)})" for name, columns in JOB_INFO_INDEXES
+                    if name not in indexes]
+        changes += ["DROP PRIMARY KEY", f"ADD PRIMARY KEY (id, {PARTITION_COLUMN})"]
+        self.cursor.execute(f"ALTER TABLE job_info {', '.join(changes)}")
+        self.cursor.execute(f"SELECT MIN({PARTITION_COLUMN}) AS first FROM job_info WHERE {PARTITION_COLUMN} > %s",
+                            (UNKNOWN_DATE,))
+        first = self.cursor.fetchone()['first'] or date.today()
+        last = add_months(month_start(date.today()), PARTITION_MONTHS_AHEAD)
+        self.cursor.execute(f"ALTER TABLE job_info {mysql_partition_sql(first, last)}")
+        self.conn.commit()
+
+    def ensure_partitions(self, months_ahead=PARTITION_MONTHS_AHEAD, today=None):
+        """
+        Split monthly partitions off pmax so the coming months are pruned individually
+
+        Args:
+            months_ahead (int): Months after the current one that need a partition
+            today (date): Current date
+
+        Returns:
+            list: Names of the added partitions
+        """
+        try:
+            last_bound = max(bound for _, bound in self._partitions() if bound)
+            last_month = add_months(month_start(today or date.today()), months_ahead)
+            if last_bound > last_month:
+                return []
+            months = mysql_partition_definitions(last_bound, last_month)[1:-1]
+            self.cursor.execute(f"ALTER TABLE job_info REORGANIZE PARTITION pmax INTO "
+                                f"({', '.join(months)}, PARTITION pmax VALUES LESS THAN (MAXVALUE))")
+            self.conn.commit()
+            added = [definition.split()[1] for definition in months]
+            print(f"Added partitions {', '.join(added)} to job_info")
+            return added
+        except Exception as e:
+            print(f"Error adding partitions: {str(e)}", level="ERROR")
+            raise
+
+    def purge_before(self, cutoff):
+        """
+        Remove listings created before cutoff
+
+        Whole months are removed by dropping their partitions, which takes
+        constant time regardless of the row count. Rows before cutoff in the
+        month containing it are deleted, which only scans that partition.
+
+        Args:
+            cutoff (date/str): First date to keep
+
+        Returns:
+            int: Number of dropped partitions
+        """
+        cutoff = date.fromisoformat(str(cutoff)[:10])
+        try:
+            expired = [name for name, bound in self._partitions() if bound and bound <= cutoff]
+            if expired:
+                self.cursor.execute(f"ALTER TABLE job_info DROP PARTITION {', '.join(expired)}")
+            self.cursor.execute(f"DELETE FROM job_info WHERE {PARTITION_COLUMN} < %s", (cutoff,))
+            self.cursor.execute(f"DELETE FROM {ROLLUP_TABLE} WHERE create_time < %s", (str(cutoff),))
+            self.conn.commit()
+            print(f"Dropped {len(expired)} partitions of job_info before {cutoff}")
+            return len(expired)
+        except Exception as e:
+            self.conn.rollback()
+            print(f"Error purging data: {str(e)}", level="ERROR")
+            raise
+
+    def _store_descriptions(self, descriptions):
+        """Add descriptions not yet in the store"""
+        if descriptions:
+            self.cursor.executemany(
+                f"INSERT INTO {DESC_STORE_TABLE} (desc_hash, content) VALUES (%s, %s) "
+                f"ON DUPLICATE KEY UPDATE desc_hash = desc_hash", list(descriptions.items()))
+
+    def _store_skills(self, converted_rows):
+        """Add skills strings of encoded rows not yet in the store"""
+        skills = {row[_skills_index] for row in converted_rows if row[_skills_index]}
+        if skills:
+            self.cursor.executemany(f"INSERT IGNORE INTO {SKILLS_STORE_TABLE} (content) VALUES (%s)", sorted(skills))
+
+    def _fetch_descriptions(self, hashes):
+        """Read stored descriptions by hash"""
+        self.cursor.execute(f"SELECT desc_hash, content FROM {DESC_STORE_TABLE} "
+                            f"WHERE desc_hash IN ({', '.join(['%s'] * len(hashes))})", hashes)
+        return {row['desc_hash']: row['content'] for row in self.cursor.fetchall()}
+
+    def prune_descriptions(self):
+        """
+        Delete stored descriptions and skills no job_info row references any more
+
+        Returns:
+            int: Number of deleted descriptions
+        """
+        self.delete_data(f"DELETE FROM {SKILLS_STORE_TABLE} WHERE NOT EXISTS "
+                         f"(SELECT 1 FROM job_info j WHERE j.job_skills = {SKILLS_STORE_TABLE}.content)")
+        return self.delete_data(f"DELETE FROM {DESC_STORE_TABLE} WHERE NOT EXISTS "
+                                f"(SELECT 1 FROM job_info j WHERE j.desc_hash = {DESC_STORE_TABLE}.desc_hash)")
+
+    def _ensure_fulltext_index(self):
+        """Add the ngram FULLTEXT indexes used by search, falling back to the default parser"""
+        for table, index_name, columns in MYSQL_FULLTEXT_INDEXES:
+            if index_name in self._table_indexes(table):
+                continue
+            print(f"Building FULLTEXT index {index_name}, this may take a while on large tables")
+            try:
+                # ngram splits CJK text into tokens, the default parser only splits on spaces
+                self.cursor.execute(f"ALTER TABLE {table} ADD FULLTEXT INDEX {index_name} ({', '.join(columns)}) "
+                                    f"WITH PARSER ngram")
+            except pymysql.MySQLError as e:
+                print(f"ngram parser unavailable ({str(e)}), using the default FULLTEXT parser", level="WARNING")
+                self.cursor.execute(f"ALTER TABLE {table} ADD FULLTEXT INDEX {index_name} ({', '.join(columns)})")
+            self.conn.commit()
+
+    def search(self, keywords, page=1, page_size=20):
+        """
+        Full-text search over job descriptions and skills
+
+        Partitioned tables cannot carry FULLTEXT indexes, so matching runs on
+        the description and skills stores and the hits are joined back to
+        job_info. A row matching in both gets the sum of the two scores.
+
+        Args:
+            keywords (str/list): Search terms
+            page (int): Page number, starting at 1
+            page_size (int): Rows per page
+
+        Returns:
+            dict: total, page, page_size and rows ordered by relevance (score column)
+        """
+        terms = split_keywords(keywords)
+        page, limit, offset = page_bounds(page, page_size)
+        if not terms:
+            return search_result([], 0, page, limit)
+        query = ' '.join(terms)
+        match = "MATCH(content) AGAINST (%s IN NATURAL LANGUAGE MODE)"
+        desc_hits = (f"SELECT j.id, j.create_time, d.score FROM (SELECT desc_hash, {match} AS score "
+                     f"FROM {DESC_STORE_TABLE} WHERE {match}) d JOIN job_info j ON j.desc_hash = d.desc_hash")
+        skills_hits = (f"SELECT j.id, j.create_time, s.score FROM (SELECT content, {match} AS score "
+                       f"FROM {SKILLS_STORE_TABLE} WHERE {match}) s JOIN job_info j ON j.job_skills = s.content")
+        hits = (f"(SELECT id, create_time, SUM(score) AS score FROM ({desc_hits} UNION ALL {skills_hits}) u "
+                f"GROUP BY id, create_time) h")
+        params = (query,) * 4
+        try:
+            self.cursor.execute(f"SELECT COUNT(*) AS n FROM {hits}", params)
+            total = self.cursor.fetchone()['n']
+            self.cursor.execute(f"SELECT j.*, h.score FROM {hits} JOIN job_info j "
+                                f"ON j.id = h.id AND j.create_time = h.create_time "
+                                f"ORDER BY h.score DESC, j.id DESC LIMIT %s OFFSET %s", params + (limit, offset))
+            rows = hydrate_descriptions(list(self.cursor.fetchall()), self._fetch_descriptions)
+            return search_result(rows, total, page, limit)
+        except Exception as e:
+            print(f"Error searching data: {str(e)}", level="ERROR")
+            raise
+
     def insert_data(self, sql, args=None):
         """
         Insert data
@@ -129,50 +489,75 @@ class MySQLHandler:
         Returns:
             int: Number of affected rows
         """
-        if isinstance(data_row, dict):
-            # Convert dictionary to tuple using column names
-            current_time = datetime.now().strftime('%Y-%m-%d')
-            data_tuple = tuple(data_row.get(col, '') for col in COLUMN_NAMES[:-1]) + (data_row.get('create_time', current_time),)
-        else:
-            data_tuple = data_row
-
-        # Generate SQL using column names
-        columns = ', '.join(COLUMN_NAMES)
-        placeholders = ', '.join(['%s'] * len(COLUMN_NAMES))
-        sql = f"INSERT INTO job_info({columns}) VALUES ({placeholders})"
-        
-        return self.insert_data(sql, data_tuple)
+        try:
+            return self._write_job_rows([encode_job_row(data_row)])
+        except Exception as e:
+            print(f"Error inserting data: {str(e)}", level="ERROR")
+            raise
+
+    def _write_job_rows(self, converted_rows, batch_id=None):
+        """
+        Insert encoded rows and their rollup increments in one transaction
+
+        Args:
+            converted_rows (list): Tuples ordered like COLUMN_NAMES
+            batch_id (str): Spool segment id recorded with the rows; a batch
+                recorded before is not written again
 
-    def save_data(self, data_rows):
+        Returns:
+            int: Number of inserted rows, None for a batch already stored
+        """
+        stored_rows, descriptions = split_descriptions(converted_rows)
+        try:
+            if batch_id is not None:
+                # Blocks on a concurrent replay of the same batch until it commits
+                self.cursor.execute(f"INSERT IGNORE INTO {SPOOL_LEDGER_TABLE} (batch_id) VALUES (%s)", (batch_id,))
+                if not self.cursor.rowcount:
+                    self.conn.rollback()
+                    return None
+            self._store_descriptions(descriptions)
+            self._store_skills(converted_rows)
+            self.cursor.executemany(insert_sql(), stored_rows)
+            affected = self.cursor.rowcount
+            self.cursor.executemany(rollup_upsert_sql('mysql'), rollup_params(count_rollup_keys(converted_rows)))
+            self.conn.commit()
+            return affected
+        except Exception:
+            self.conn.rollback()
+            raise
+
+    def rebuild_rollups(self):
+        """
+        Recompute the rollup table from job_info
+
+        Returns:
+            int: Number of job rows aggregated
+        """
+        try:
+            total = rebuild_rollups(self, 'mysql')
+            print(f"Rebuilt rollups from {total} records")
+            return total
+        except Exception as e:
+            self.conn.rollback()
+            print(f"Error rebuilding rollups: {str(e)}", level="ERROR")
+            raise
+
+    def save_data(self, data_rows, batch_id=None):
         """
         Save multiple data rows to database
         
         Args:
             data_rows (list): List of data rows to save (can be dict or tuple)
+            batch_id (str): Spool segment id, the rows are skipped if it was stored before
         """
         try:
-            # Convert all rows to tuples if they are dictionaries
-            converted_rows = []
-            current_time = datetime.now().strftime('%Y-%m-%d')
-            
-            for row in data_rows:
-                if isinstance(row, dict):
-                    # Convert dictionary to tuple using column names
-                    converted_row = tuple(row.get(col, '') for col in COLUMN_NAMES[:-1]) + (row.get('create_time', current_time),)
-                    converted_rows.append(converted_row)
-                else:
-                    converted_rows.append(row)
-
-            # Generate SQL using column names
-            columns = ', '.join(COLUMN_NAMES)
-            placeholders = ', '.join(['%s'] * len(COLUMN_NAMES))
-            sql = f"INSERT INTO job_info({columns}) VALUES ({placeholders})"
-            
-            self.cursor.executemany(sql, converted_rows)
-            self.conn.commit()
+            # Convert all rows to tuples ordered like the schema columns
+            converted_rows = list(map(encode_job_row, data_rows))
+            if self._write_job_rows(converted_rows, batch_id) is None:
+                print(f"Spooled batch {batch_id} was stored before, skipping its {len(converted_rows)} records")
+                return
             print(f"Successfully saved {len(converted_rows)} records to MySQL")
         except Exception as e:
-            self.conn.rollback()
             print(f"Error saving data to MySQL: {str(e)}", level="ERROR")
             raise
 
@@ -195,12 +580,57 @@ class MySQLHandler:
             list: Query results
         """
         try:
-            self.cursor.execute(sql, args)
-            return self.cursor.fetchall()
+            self.cursor.execute(route_desc_reads(sql), args)
+            return hydrate_descriptions(list(self.cursor.fetchall()), self._fetch_descriptions)
         except Exception as e:
             print(f"Error querying data: {str(e)}", level="ERROR")
             raise
 
+    def iter_rows(self, sql, args=None, batch_size=DEFAULT_STREAM_BATCH_SIZE):
+        """
+        Stream query results with bounded memory
+
+        Rows are read through an unbuffered SSDictCursor on a dedicated
+        connection, batch_size rows at a time, so the result set never sits
+        in client memory as a whole and this handler's own connection stays
+        free (descriptions of each batch are fetched through it). Stop early
+        by closing the generator; the streaming connection is dropped
+        instead of draining the remaining rows.
+
+        Args:
+            sql (str): SQL query
+            args (tuple/list): Query parameters
+            batch_size (int): Rows fetched from the server per round
+
+        Yields:
+            dict: One row at a time
+        """
+        conn = None
+        try:
+            conn = pymysql.connect(
+                host=self.host,
+                user=self.user,
+                password=self.password,
+                database=self.database,
+                port=self.port,
+                charset=self.charset,
+                cursorclass=pymysql.cursors.SSDictCursor
+            )
+            cursor = conn.cursor()
+            cursor.execute(f"SET SESSION net_write_timeout = {STREAM_WRITE_TIMEOUT}")
+            cursor.execute(route_desc_reads(sql), args)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from hydrate_descriptions(list(rows), self._fetch_descriptions)
+        except Exception as e:
+            print(f"Error streaming data: {str(e)}", level="ERROR")
+            raise
+        finally:
+            if conn:
+                conn.close()
+
     def select_one(self, sql, args=None):
         """
         Query single data
@@ -213,8 +643,11 @@ class MySQLHandler:
             dict: Query result
         """
         try:
-            self.cursor.execute(sql, args)
-            return self.cursor.fetchone()
+            self.cursor.execute(route_desc_reads(sql), args)
+            row = self.cursor.fetchone()
+            if row is None:
+                return None
+            return hydrate_descriptions([row], self._fetch_descriptions)[0]
         except Exception as e:
             print(f"Error querying data: {str(e)}", level="ERROR")
             raise
@@ -232,8 +665,8 @@ class MySQLHandler:
             list: Query results
         """
         try:
-            self.cursor.execute(sql, args)
-            return self.cursor.fetchmany(n)
+            self.cursor.execute(route_desc_reads(sql), args)
+            return hydrate_descriptions(list(self.cursor.fetchmany(n)), self._fetch_descriptions)
         except Exception as e:
             print(f"Error querying data: {str(e)}", level="ERROR")
             raise
@@ -241,6 +674,9 @@ class MySQLHandler:
     def update_data(self, sql, args=None):
         """
         Update data
+
+        Updates of job_info may move rows between rollup keys, so the
+        rollups are rebuilt after one changed any row.
         
         Args:
             sql (str): SQL update statement
@@ -252,7 +688,10 @@ class MySQLHandler:
         try:
             self.cursor.execute(sql, args)
             self.conn.commit()
-            return self.cursor.rowcount
+            affected = self.cursor.rowcount
+            if affected and updates_job_info(sql):
+                self.rebuild_rollups()
+            return affected
         except Exception as e:
             self.conn.rollback()
             print(f"Error updating data: {str(e)}", level="ERROR")
@@ -261,6 +700,10 @@ class MySQLHandler:
     def delete_data(self, sql, args=None):
         """
         Delete data
+
+        For deletes from job_info the removed rows are read and locked
+        first, and their counts are subtracted from the rollups in the same
+        transaction.
         
         Args:
             sql (str): SQL delete statement
@@ -270,9 +713,18 @@ class MySQLHandler:
             int: Number of affected rows
         """
         try:
+            select = rollup_delete_select(sql)
+            if select is not None:
+                self.cursor.execute(select + " FOR UPDATE", args)
+                removed = count_rollup_keys([tuple(row.get(c) for c in COLUMN_NAMES)
+                                             for row in self.cursor.fetchall()])
             self.cursor.execute(sql, args)
+            affected = self.cursor.rowcount
+            if select is not None and removed:
+                self.cursor.executemany(rollup_upsert_sql('mysql'), rollup_decrement_params(removed))
+                self.cursor.execute(rollup_prune_sql())
             self.conn.commit()
-            return self.cursor.rowcount
+            return affected
         except Exception as e:
             self.conn.rollback()
             print(f"Error deleting data: {str(e)}", level="ERROR")
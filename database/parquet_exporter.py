@@ -0,0 +1,217 @@
+#!/usr/bin/python3
+# encoding: utf-8
+# @author: sunhao
+# @contact: smartadpole@163.com
+# @file: parquet_exporter.py
+# @time: 2026/10/19 11:00
+# @function: Export job listings to partitioned Parquet files.
+
+import os
+import csv
+import argparse
+from collections import OrderedDict
+from datetime import datetime
+from urllib.parse import quote
+import loger
+from database.schema import COLUMN_NAMES
+from database.csv_handler import CSV_FILE_PATTERN
+from database.file_codec import iter_lines
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+DEFAULT_CHUNK_SIZE = 100000
+# Partition writers kept open at once; the least recently written one is closed beyond this,
+# and a later write to its partition starts a new part file
+MAX_OPEN_WRITERS = 64
+PARTITION_COLUMNS = ['create_time', 'category']
+# Low-cardinality columns that benefit from dictionary encoding
+DICTIONARY_COLUMNS = [
+    'category', 'sub_category', 'province', 'job_location', 'job_industry',
+    'job_finance', 'job_scale', 'job_experience', 'job_education'
+]
+HIVE_DEFAULT_PARTITION = '__HIVE_DEFAULT_PARTITION__'
+
+def iter_sql_rows(handler, chunk_size=DEFAULT_CHUNK_SIZE, table='job_info'):
+    """
+    Stream rows from a SQL handler (MySQL or SQLite)
+
+    Uses the handler's streaming cursor, so only one batch is held in memory.
+
+    Args:
+        handler: MySQLHandler or SQLiteHandler instance
+        chunk_size (int): Number of rows fetched per batch
+        table (str): Table to read
+
+    Yields:
+        dict: One row per job listing
+    """
+    yield from handler.iter_rows(f"SELECT * FROM {table}", batch_size=chunk_size)
+
+def iter_csv_rows(csv_dir):
+    """
+    Stream rows from every daily CSV file in a directory
+
+    Args:
+        csv_dir (str): Directory containing job_info_*.csv files, possibly compressed
+
+    Yields:
+        dict: One row per job listing
+    """
+    for name in sorted(os.listdir(csv_dir)):
+        if CSV_FILE_PATTERN.match(name):
+            yield from csv.DictReader(iter_lines(os.path.join(csv_dir, name)))
+
+class ParquetExporter:
+    def __init__(self, output_dir, columns=None, chunk_size=DEFAULT_CHUNK_SIZE, compression='zstd',
+                 max_open_writers=MAX_OPEN_WRITERS):
+        """
+        Initialize Parquet exporter
+
+        Args:
+            output_dir (str): Root directory of the partitioned dataset
+            columns (list): Columns to export, defaults to the job_info columns
+            chunk_size (int): Maximum number of rows buffered before flushing
+            compression (str): Parquet compression codec
+            max_open_writers (int): Partition files open at once, bounds the file descriptors in use
+        """
+        if pa is None:
+            raise ImportError("pyarrow is required for Parquet export, install it with 'pip install pyarrow'")
+        self.output_dir = output_dir
+        self.columns = [c for c in (columns or COLUMN_NAMES) if c not in PARTITION_COLUMNS]
+        self.chunk_size = chunk_size
+        self.compression = compression
+        self.max_open_writers = max(1, max_open_writers)
+        self.schema = pa.schema([(c, pa.string()) for c in self.columns])
+        self.run_id = datetime.now().strftime('%Y%m%d%H%M%S')
+        self._buffers = {}
+        self._buffered = 0
+        self._writers = OrderedDict()
+        self._parts = {}
+        self.rows_written = 0
+
+    @staticmethod
+    def _partition_value(value):
+        """Encode a partition value the way Hive-style readers expect"""
+        value = str(value).strip() if value is not None else ''
+        return quote(value, safe='') if value else HIVE_DEFAULT_PARTITION
+
+    def _partition_dir(self, key):
+        parts = [f"{name}={self._partition_value(value)}" for name, value in zip(PARTITION_COLUMNS, key)]
+        return os.path.join(self.output_dir, *parts)
+
+    def _get_writer(self, key):
+        writer = self._writers.get(key)
+        if writer is not None:
+            self._writers.move_to_end(key)
+            return writer
+        while len(self._writers) >= self.max_open_writers:
+            _, evicted = self._writers.popitem(last=False)
+            evicted.close()
+        partition_dir = self._partition_dir(key)
+        os.makedirs(partition_dir, exist_ok=True)
+        part = self._parts.get(key, 0)
+        self._parts[key] = part + 1
+        file_path = os.path.join(partition_dir, f"part-{self.run_id}-{part:05d}.parquet")
+        use_dictionary = [c for c in DICTIONARY_COLUMNS if c in self.columns]
+        writer = pq.ParquetWriter(file_path, self.schema, compression=self.compression,
+                                  use_dictionary=use_dictionary)
+        self._writers[key] = writer
+        return writer
+
+    def write_row(self, row):
+        """
+        Buffer a single row, flushing once chunk_size rows are buffered
+
+        Args:
+            row (dict): Job listing row
+        """
+        key = tuple(row.get(c) or '' for c in PARTITION_COLUMNS)
+        self._buffers.setdefault(key, []).append(row)
+        self._buffered += 1
+        if self._buffered >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Write all buffered rows as one row group per partition"""
+        for key, rows in self._buffers.items():
+            data = {c: [None if r.get(c) is None else str(r.get(c)) for r in rows] for c in self.columns}
+            self._get_writer(key).write_table(pa.Table.from_pydict(data, schema=self.schema))
+            self.rows_written += len(rows)
+        self._buffers = {}
+        self._buffered = 0
+
+    def export(self, rows):
+        """
+        Export an iterable of rows
+
+        Args:
+            rows (iterable): Rows as dicts
+
+        Returns:
+            int: Number of rows written
+        """
+        try:
+            for row in rows:
+                self.write_row(row)
+            self.flush()
+        finally:
+            self.close()
+        print(f"Exported {self.rows_written} records to {self.output_dir}")
+        return self.rows_written
+
+    def close(self):
+        """Close all open partition writers"""
+        for writer in self._writers.values():
+            writer.close()
+        self._writers = OrderedDict()
+
+def parse_arguments():
+    """
+    Parse command line arguments
+
+    Returns:
+        argparse.Namespace: Parsed arguments
+    """
+    parser = argparse.ArgumentParser(description='Export job listings to partitioned Parquet files')
+    parser.add_argument('--source', type=str, default='mysql', choices=['mysql', 'sqlite', 'csv'],
+                        help='Storage backend to read from')
+    parser.add_argument('--input-dir', type=str, default=None,
+                        help='Directory of the CSV files or SQLite database (default: result/csv or result/sqlite, '
+                             'where DataStorage writes them)')
+    parser.add_argument('--output-dir', type=str, default=os.path.join('result', 'parquet'),
+                        help='Root directory of the exported dataset')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help='Rows buffered in memory before each flush')
+    return parser.parse_args()
+
+def main():
+    from database import MySQLHandler, SQLiteHandler
+    from database.sqlite_handler import DEFAULT_DB_FILE
+    from database.data_storage import DEFAULT_DB_CONFIG
+
+    args = parse_arguments()
+    input_dir = args.input_dir or os.path.join('result', args.source)
+    handler = None
+    try:
+        if args.source == 'mysql':
+            handler = MySQLHandler(**DEFAULT_DB_CONFIG)
+            rows = iter_sql_rows(handler, args.chunk_size)
+        elif args.source == 'sqlite':
+            if not os.path.exists(os.path.join(input_dir, DEFAULT_DB_FILE)):
+                raise FileNotFoundError(f"No SQLite database in {input_dir}")
+            handler = SQLiteHandler(input_dir)
+            rows = iter_sql_rows(handler, args.chunk_size)
+        else:
+            rows = iter_csv_rows(input_dir)
+        ParquetExporter(args.output_dir, chunk_size=args.chunk_size).export(rows)
+    finally:
+        if handler:
+            handler.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/python3
+# encoding: utf-8
+# @author: sunhao
+# @contact: smartadpole@163.com
+# @file: rate_limit.py
+# @time: 2026/10/19 21:00
+# @function: Per-host token buckets shared by crawler processes through MySQL or SQLite.
+
+import os
+import time
+import loger
+from database.task_queue import DEFAULT_TASK_DB_FILE
+
+RATE_TABLE = 'rate_bucket'
+# Requests per second and bucket size per host
+DEFAULT_RATE = 0.5
+DEFAULT_BURST = 3
+
+# Current time in fractional seconds on the database server
+NOW_SQL = {
+    'mysql': 'UNIX_TIMESTAMP(NOW(6))',
+    'sqlite': "((julianday('now') - 2440587.5) * 86400.0)",
+}
+
+def mysql_rate_table_sql():
+    """Generate the MySQL DDL of the bucket table"""
+    return f"""
+    CREATE TABLE IF NOT EXISTS {RATE_TABLE} (
+        host VARCHAR(255) NOT NULL PRIMARY KEY,
+        tokens DOUBLE NOT NULL COMMENT 'Tokens left, negative while requests are reserved ahead',
+        updated DOUBLE NOT NULL COMMENT 'Unix time of the last refill'
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """
+
+def sqlite_rate_table_sql():
+    """Generate the SQLite DDL of the bucket table"""
+    return f"""
+    CREATE TABLE IF NOT EXISTS {RATE_TABLE} (
+        host TEXT NOT NULL PRIMARY KEY,
+        tokens REAL NOT NULL,
+        updated REAL NOT NULL
+    )
+    """
+
+class RateLimiter:
+    def __init__(self, handler, dialect, rate=DEFAULT_RATE, burst=DEFAULT_BURST, clock=None, sleep=time.sleep):
+        """
+        Token bucket per host, shared by every process using the same database
+
+        acquire() refills the bucket for the time passed, takes a token and,
+        if the bucket ran dry, sleeps exactly until the token is due. The
+        read-modify-write runs under a row lock (MySQL) or the database write
+        lock (SQLite), so concurrent workers reserve consecutive slots and
+        together never exceed rate requests per second after the first burst.
+        All processes sharing a host should use the same rate and burst.
+
+        Args:
+            handler: MySQLHandler or SQLiteHandler connected to the coordinator database
+            dialect (str): 'mysql' or 'sqlite'
+            rate (float): Requests per second per host
+            burst (int): Requests allowed back to back after an idle period
+            clock (callable): Returns the current Unix time; None reads the
+                database server clock, which every process agrees on
+            sleep (callable): Waits the given seconds in acquire()
+        """
+        if dialect not in NOW_SQL:
+            raise ValueError(f"Unsupported dialect: {dialect}")
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst at least 1")
+        self.handler = handler
+        self.dialect = dialect
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+        self._now = NOW_SQL[dialect]
+        self._p = '%s' if dialect == 'mysql' else '?'
+        self._known_hosts = set()
+
+    def create_table(self):
+        """Create the bucket table if not exists"""
+        self.handler.cursor.execute(mysql_rate_table_sql() if self.dialect == 'mysql' else sqlite_rate_table_sql())
+        self.handler.conn.commit()
+
+    def _ensure_bucket(self, host):
+        # Created outside the locking transaction, so there is always a row to lock
+        verb = 'INSERT IGNORE' if self.dialect == 'mysql' else 'INSERT OR IGNORE'
+        if self.clock is None:
+            now, args = self._now, (host, self.burst)
+        else:
+            now, args = self._p, (host, self.burst, self.clock())
+        self.handler.cursor.execute(f"{verb} INTO {RATE_TABLE} (host, tokens, updated) "
+                                    f"VALUES ({self._p}, {self._p}, {now})", args)
+        self.handler.conn.commit()
+        self._known_hosts.add(host)
+
+    def reserve(self, host, cost=1):
+        """
+        Take tokens from the bucket of a host, possibly ahead of time
+
+        Args:
+            host (str): Host name, e.g. 'www.zhipin.com'
+            cost (float): Tokens taken
+
+        Returns:
+            float: Seconds until the reserved request may be sent
+        """
+        if host not in self._known_hosts:
+            self._ensure_bucket(host)
+        cursor, conn = self.handler.cursor, self.handler.conn
+        try:
+            if self.dialect == 'mysql':
+                cursor.execute("START TRANSACTION")
+                lock = ' FOR UPDATE'
+            else:
+                # Take the write lock before reading, so no other process refills in between
+                cursor.execute("BEGIN IMMEDIATE")
+                lock = ''
+            cursor.execute(f"SELECT tokens, updated, {self._now} AS now FROM {RATE_TABLE} "
+                           f"WHERE host = {self._p}{lock}", (host,))
+            row = cursor.fetchone()
+            now = float(row['now']) if self.clock is None else self.clock()
+            tokens = min(float(self.burst), float(row['tokens']) + (now - float(row['updated'])) * self.rate) - cost
+            cursor.execute(f"UPDATE {RATE_TABLE} SET tokens = {self._p}, updated = {self._p} WHERE host = {self._p}",
+                           (tokens, now, host))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return max(0.0, -tokens / self.rate)
+
+    def acquire(self, host, cost=1):
+        """
+        Wait for a request slot on a host
+
+        Args:
+            host (str): Host name
+            cost (float): Tokens taken
+
+        Returns:
+            float: Seconds waited
+        """
+        wait = self.reserve(host, cost)
+        if wait > 0:
+            print(f"Rate limit on {host}, waiting {wait:.2f}s", level="DEBUG")
+            self.sleep(wait)
+        return wait
+
+    def close(self):
+        """Close the database connection"""
+        self.handler.close()
+
+def open_rate_limiter(backend, output_dir, db_config=None, rate=DEFAULT_RATE, burst=DEFAULT_BURST):
+    """
+    Connect to the coordinator database and create the bucket table
+
+    Args:
+        backend (str): 'mysql' to share the budget across machines, 'sqlite' across processes of one machine
+        output_dir (str): Directory of the SQLite coordinator file
+        db_config (dict): MySQL connection settings
+        rate (float): Requests per second per host
+        burst (int): Requests allowed back to back
+
+    Returns:
+        RateLimiter: Limiter using its own connection
+    """
+    from database import MySQLHandler, SQLiteHandler
+
+    if backend == 'mysql':
+        if not db_config:
+            raise ValueError("Database configuration is required for the MySQL rate limiter")
+        handler = MySQLHandler(**db_config)
+    elif backend == 'sqlite':
+        handler = SQLiteHandler(os.path.join(output_dir, 'sqlite'), db_file=DEFAULT_TASK_DB_FILE)
+    else:
+        raise ValueError(f"Unknown rate limiter backend: {backend}")
+    limiter = RateLimiter(handler, backend, rate, burst)
+    limiter.create_table()
+    return limiter
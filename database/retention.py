@@ -0,0 +1,70 @@
+#!/usr/bin/python3
+# encoding: utf-8
+# @author: sunhao
+# @contact: smartadpole@163.com
+# @file: retention.py
+# @time: 2026/10/19 16:00
+# @function: Drop job listings older than a retention window.
+
+import argparse
+from datetime import date
+import loger
+from database.schema import month_start, add_months
+
+def retention_cutoff(keep_months, today=None):
+    """
+    First date kept when retaining whole months
+
+    Args:
+        keep_months (int): Months kept, including the current one
+        today (date): Current date
+
+    Returns:
+        date: First day of the oldest kept month
+    """
+    if keep_months < 1:
+        raise ValueError("keep_months must be at least 1")
+    return add_months(month_start(today or date.today()), -(keep_months - 1))
+
+def parse_arguments():
+    """
+    Parse command line arguments
+
+    Returns:
+        argparse.Namespace: Parsed arguments
+    """
+    parser = argparse.ArgumentParser(description='Drop job listings older than the retention window')
+    parser.add_argument('--source', type=str, default='mysql', choices=['mysql', 'sqlite', 'csv'],
+                        help='Storage backend to clean up')
+    parser.add_argument('--input-dir', type=str, default='result',
+                        help='Directory of the CSV files or SQLite database')
+    parser.add_argument('--keep-months', type=int, required=True,
+                        help='Months to keep, including the current month')
+    parser.add_argument('--prune-descriptions', action='store_true',
+                        help='Also delete stored descriptions no remaining listing references (MySQL/SQLite)')
+    return parser.parse_args()
+
+def main():
+    from database import MySQLHandler, CSVHandler, SQLiteHandler
+    from database.data_storage import DEFAULT_DB_CONFIG
+
+    args = parse_arguments()
+    cutoff = retention_cutoff(args.keep_months)
+    handler = None
+    try:
+        if args.source == 'mysql':
+            handler = MySQLHandler(**DEFAULT_DB_CONFIG)
+        elif args.source == 'sqlite':
+            handler = SQLiteHandler(args.input_dir)
+        else:
+            handler = CSVHandler(args.input_dir)
+        print(f"Removing {args.source} listings created before {cutoff}")
+        handler.purge_before(cutoff)
+        if args.prune_descriptions and args.source != 'csv':
+            print(f"Pruned {handler.prune_descriptions()} unreferenced descriptions")
+    finally:
+        if handler:
+            handler.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+#!/usr/bin/python3
+# encoding: utf-8
+# @author: sunhao
+# @contact: smartadpole@163.com
+# @file: rollup.py
+# @time: 2026/10/19 14:00
+# @function: Incrementally maintained job count and salary rollups.
+
+import re
+import threading
+from collections import Counter, OrderedDict
+from operator import itemgetter
+from database.schema import COLUMN_NAMES
+
+ROLLUP_TABLE = 'job_rollup'
+# Dimensions a rollup can be grouped or filtered by
+ROLLUP_DIMENSIONS = ['create_time', 'category', 'sub_category', 'province']
+UNKNOWN_BUCKET = -1
+MAX_SALARY_K = 300
+DEFAULT_CACHE_SIZE = 128
+
+# Monthly salary in K per unit of the posted figure
+SALARY_UNITS = {
+    'k': 1.0,
+    '千': 1.0,
+    '万': 10.0,
+    '元/天': 21.75 / 1000,
+    '元/时': 8 * 21.75 / 1000,
+    '元/月': 1 / 1000,
+}
+# Raw statements changing job_info, whose rows the rollups have to follow
+_JOB_INFO_DELETE = re.compile(r"^\s*DELETE\s+FROM\s+job_info\b(.*?)[\s;]*$", re.IGNORECASE | re.S)
+_JOB_INFO_UPDATE = re.compile(r"^\s*UPDATE\s+job_info\b", re.IGNORECASE)
+SALARY_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*-\s*(\d+(?:\.\d+)?)\s*(k|千|万|元/天|元/时|元/月)', re.IGNORECASE)
+
+_dimension_getter = itemgetter(*[COLUMN_NAMES.index(c) for c in ROLLUP_DIMENSIONS])
+_salary_index = COLUMN_NAMES.index('job_salary_range')
+
+def salary_bucket(salary_range):
+    """
+    Map a posted salary range to a monthly midpoint bucket in K
+
+    Args:
+        salary_range (str): Salary text such as '15-30K·13薪' or '150-200元/天'
+
+    Returns:
+        int: Midpoint in whole K per month, UNKNOWN_BUCKET if unparseable
+    """
+    match = SALARY_PATTERN.search(salary_range or '')
+    if not match:
+        return UNKNOWN_BUCKET
+    low, high, unit = match.groups()
+    monthly = (float(low) + float(high)) / 2 * SALARY_UNITS[unit.lower()]
+    return min(int(round(monthly)), MAX_SALARY_K)
+
+def count_rollup_keys(encoded_rows):
+    """
+    Aggregate encoded job rows into rollup increments
+
+    Args:
+        encoded_rows (list): Tuples ordered like COLUMN_NAMES
+
+    Returns:
+        Counter: (create_time, category, sub_category, province, salary_bucket) -> job count
+    """
+    counts = Counter()
+    for row in encoded_rows:
+        counts[_dimension_getter(row) + (salary_bucket(row[_salary_index]),)] += 1
+    return counts
+
+def mysql_rollup_table_sql():
+    """Generate the MySQL DDL of the rollup table"""
+    return f"""
+    CREATE TABLE IF NOT EXISTS {ROLLUP_TABLE} (
+        create_time VARCHAR(50) NOT NULL,
+        category VARCHAR(255) NOT NULL,
+        sub_category VARCHAR(255) NOT NULL,
+        province VARCHAR(100) NOT NULL,
+        salary_bucket SMALLINT NOT NULL COMMENT 'Monthly salary midpoint in K, -1 if unknown',
+        job_count INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (create_time, category, sub_category, province, salary_bucket)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """
+
+def sqlite_rollup_table_sql():
+    """Generate the SQLite DDL of the rollup table"""
+    return f"""
+    CREATE TABLE IF NOT EXISTS {ROLLUP_TABLE} (
+        create_time TEXT NOT NULL,
+        category TEXT NOT NULL,
+        sub_category TEXT NOT NULL,
+        province TEXT NOT NULL,
+        salary_bucket INTEGER NOT NULL,
+        job_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (create_time, category, sub_category, province, salary_bucket)
+    )
+    """
+
+def rollup_upsert_sql(dialect):
+    """
+    Generate the statement adding increments to the rollup table
+
+    Args:
+        dialect (str): 'mysql' or 'sqlite'
+
+    Returns:
+        str: Upsert statement taking the key columns and the increment
+    """
+    columns = ', '.join(ROLLUP_DIMENSIONS + ['salary_bucket', 'job_count'])
+    if dialect == 'mysql':
+        return (f"INSERT INTO {ROLLUP_TABLE} ({columns}) VALUES (%s, %s, %s, %s, %s, %s) "
+                f"ON DUPLICATE KEY UPDATE job_count = job_count + VALUES(job_count)")
+    keys = ', '.join(ROLLUP_DIMENSIONS + ['salary_bucket'])
+    return (f"INSERT INTO {ROLLUP_TABLE} ({columns}) VALUES (?, ?, ?, ?, ?, ?) "
+            f"ON CONFLICT ({keys}) DO UPDATE SET job_count = job_count + excluded.job_count")
+
+def rollup_params(counts):
+    """Turn rollup increments into upsert parameters, empty keys stored as ''"""
+    return [tuple('' if v is None else v for v in key) + (count,) for key, count in counts.items()]
+
+def rollup_decrement_params(counts):
+    """Turn the rollup keys of removed rows into upsert parameters subtracting them"""
+    return rollup_params({key: -count for key, count in counts.items()})
+
+def rollup_prune_sql():
+    """Generate the statement dropping rollup rows whose jobs were all removed"""
+    return f"DELETE FROM {ROLLUP_TABLE} WHERE job_count <= 0"
+
+def rollup_delete_select(sql):
+    """
+    Read back the rows a raw DELETE of job_info is about to remove
+
+    Args:
+        sql (str): Statement passed to delete_data
+
+    Returns:
+        str: SELECT of the rollup columns over the same WHERE clause, taking
+            the same parameters; None if the statement does not delete from job_info
+    """
+    match = _JOB_INFO_DELETE.match(sql)
+    if not match:
+        return None
+    return f"SELECT {', '.join(ROLLUP_DIMENSIONS + ['job_salary_range'])} FROM job_info{match.group(1)}"
+
+def updates_job_info(sql):
+    """Whether a raw statement updates job_info"""
+    return bool(_JOB_INFO_UPDATE.match(sql))
+
+def sqlite_rollup_triggers_sql(table='job_info'):
+    """
+    Generate the SQLite triggers keeping the rollups in step with raw writes
+
+    Inserts through save_data add their increments in Python; deletes and
+    updates, including raw ones from delete_data/update_data, are followed
+    by these triggers inside the same transaction. The salary bucket comes
+    from the rollup_salary_bucket function every SQLiteHandler connection
+    registers.
+
+    Args:
+        table (str): Table the rollups summarize
+
+    Returns:
+        list: CREATE TRIGGER statements
+    """
+    keys = ROLLUP_DIMENSIONS + ['salary_bucket']
+
+    def key_values(alias):
+        return [f"coalesce({alias}.{c}, '')" for c in ROLLUP_DIMENSIONS] + \
+            [f"rollup_salary_bucket({alias}.job_salary_range)"]
+
+    def match(alias):
+        return ' AND '.join(f"{c} = {v}" for c, v in zip(keys, key_values(alias)))
+
+    decrement = (f"UPDATE {ROLLUP_TABLE} SET job_count = job_count - 1 WHERE {match('old')}; "
+                 f"DELETE FROM {ROLLUP_TABLE} WHERE {match('old')} AND job_count <= 0;")
+    increment = (f"INSERT INTO {ROLLUP_TABLE} ({', '.join(keys)}, job_count) "
+                 f"VALUES ({', '.join(key_values('new'))}, 1) "
+                 f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET job_count = job_count + 1;")
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {table}_rollup_ad AFTER DELETE ON {table} BEGIN {decrement} END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_rollup_au AFTER UPDATE OF "
+        f"{', '.join(ROLLUP_DIMENSIONS)}, job_salary_range ON {table} BEGIN {decrement} {increment} END",
+    ]
+
+def rebuild_rollups(handler, dialect, chunk_size=10000):
+    """
+    Recompute the rollup table from job_info
+
+    Needed to backfill rows stored before the rollup table existed, or
+    after job_info was changed by other tools.
+
+    Args:
+        handler: MySQLHandler or SQLiteHandler instance
+        dialect (str): 'mysql' or 'sqlite'
+        chunk_size (int): Rows read per page
+
+    Returns:
+        int: Number of job rows aggregated
+    """
+    upsert = rollup_upsert_sql(dialect)
+    columns = ', '.join(ROLLUP_DIMENSIONS + ['job_salary_range'])
+    handler.cursor.execute(f"DELETE FROM {ROLLUP_TABLE}")
+    last_id, total = 0, 0
+    while True:
+        rows = handler.select_all(f"SELECT id, {columns} FROM job_info WHERE id > %s ORDER BY id LIMIT %s",
+                                  (last_id, chunk_size))
+        if not rows:
+            break
+        counts = count_rollup_keys([tuple(row.get(c) for c in COLUMN_NAMES) for row in rows])
+        handler.cursor.executemany(upsert, rollup_params(counts))
+        last_id = rows[-1]['id']
+        total += len(rows)
+    handler.conn.commit()
+    return total
+
+def rollup_query(by, filters, start_date, end_date, extra_group=()):
+    """
+    Build a grouped query over the rollup table
+
+    Args:
+        by (list): Dimensions to group by
+        filters (dict): Dimension -> required value
+        start_date (str): Earliest create_time, inclusive
+        end_date (str): Latest create_time, inclusive
+        extra_group (tuple): Additional grouping columns such as salary_bucket
+
+    Returns:
+        tuple: (sql with %s placeholders, args)
+    """
+    by = list(by)
+    for column in by + list(filters):
+        if column not in ROLLUP_DIMENSIONS:
+            raise ValueError(f"Unsupported rollup dimension: {column}, choose from {', '.join(ROLLUP_DIMENSIONS)}")
+    where, args = [], []
+    for column, value in filters.items():
+        where.append(f"{column} = %s")
+        args.append(value)
+    if start_date:
+        where.append("create_time >= %s")
+        args.append(start_date)
+    if end_date:
+        where.append("create_time <= %s")
+        args.append(end_date)
+    group = by + list(extra_group)
+    select = ', '.join(group + ['SUM(job_count) AS job_count'])
+    sql = f"SELECT {select} FROM {ROLLUP_TABLE}"
+    if where:
+        sql += " WHERE " + ' AND '.join(where)
+    if group:
+        sql += " GROUP BY " + ', '.join(group)
+    return sql, args
+
+def percentiles_from_histogram(histogram, percentiles):
+    """
+    Compute percentiles from salary bucket counts
+
+    Args:
+        histogram (dict): salary_bucket -> job count, unknown bucket excluded
+        percentiles (list): Percentiles between 0 and 100
+
+    Returns:
+        dict: 'p<percentile>' -> salary bucket in K, None without data
+    """
+    total = sum(histogram.values())
+    result = {}
+    for p in percentiles:
+        value = None
+        if total:
+            threshold = total * p / 100.0
+            cumulative = 0
+            for bucket in sorted(histogram):
+                cumulative += histogram[bucket]
+                if cumulative >= threshold:
+                    value = bucket
+                    break
+        result[f"p{p:g}"] = value
+    return result
+
+class LRUCache:
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        """
+        Small LRU cache for rollup results, cleared whenever data is written
+
+        Args:
+            maxsize (int): Maximum number of cached results
+        """
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        # The spool replayer invalidates from its own thread
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value or None, marking it as recently used"""
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entry when full"""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """Drop all cached results"""
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,361 @@
+#!/usr/bin/python3
+# encoding: utf-8
+# @author: sunhao
+# @contact: smartadpole@163.com
+# @file: schema.py
+# @time: 2026/10/19 12:30
+# @function: Single schema definition of job_info shared by all storage backends.
+
+import re
+from collections import namedtuple
+from datetime import datetime, date
+from operator import itemgetter
+
+Field = namedtuple('Field', ['name', 'mysql_type', 'comment'])
+
+# 职位信息字段，与 boss_parser.extract_job_data 输出保持一致
+JOB_INFO_FIELDS = [
+    Field('category', 'VARCHAR(255)', 'Primary category'),
+    Field('sub_category', 'VARCHAR(255)', 'Secondary category'),
+    Field('job_title', 'VARCHAR(255)', 'Job title'),
+    Field('province', 'VARCHAR(100)', 'Province'),
+    Field('job_location', 'VARCHAR(255)', 'Job location'),
+    Field('job_company', 'VARCHAR(255)', 'Company name'),
+    Field('job_industry', 'VARCHAR(255)', 'Industry type'),
+    Field('job_finance', 'VARCHAR(255)', 'Financing status'),
+    Field('job_scale', 'VARCHAR(255)', 'Company size'),
+    Field('job_welfare', 'VARCHAR(255)', 'Company benefits'),
+    Field('job_salary_range', 'VARCHAR(255)', 'Salary range'),
+    Field('job_experience', 'VARCHAR(255)', 'Work experience'),
+    Field('job_education', 'VARCHAR(255)', 'Education requirement'),
+    Field('job_skills', 'VARCHAR(255)', 'Skill requirements'),
+    Field('job_address', 'VARCHAR(255)', 'Job address'),
+    Field('job_desc', 'TEXT', 'Job description'),
+    Field('create_time', 'DATE', 'Crawl date'),
+]
+
+# MySQL partitions job_info by month of this column, so it is part of the primary key
+PARTITION_COLUMN = 'create_time'
+# Months of empty partitions kept ahead of the current month
+PARTITION_MONTHS_AHEAD = 3
+# Date stored for legacy rows whose create_time cannot be parsed
+UNKNOWN_DATE = '1970-01-01'
+
+# SQL backends keep descriptions once in job_desc_store and reference them by hash
+DESC_STORE_TABLE = 'job_desc_store'
+DESC_HASH_FIELD = Field('desc_hash', 'CHAR(40)', 'SHA-1 of the description in job_desc_store')
+STORED_FIELDS = [DESC_HASH_FIELD if field.name == 'job_desc' else field for field in JOB_INFO_FIELDS]
+# Distinct job_skills strings, unpartitioned so MySQL can search them with a FULLTEXT index
+SKILLS_STORE_TABLE = 'job_skills_store'
+# job_info with job_desc joined back from the store; reads naming job_desc are routed to it
+JOB_INFO_VIEW = 'job_info_full'
+
+# String literals, quoted identifiers and comments of a SQL statement
+SQL_QUOTED_PATTERN = r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|`[^`]*`|--[^\n]*|/\*.*?\*/"
+_DESC_READ_TOKEN = re.compile(SQL_QUOTED_PATTERN + r"|\bjob_desc\b|\bjob_info\b", re.S)
+
+# Secondary indexes of job_info: (index name, columns)
+JOB_INFO_INDEXES = [
+    ('idx_category_time', ['category', 'create_time']),
+    ('idx_province_time', ['province', 'create_time']),
+    ('idx_job_title', ['job_title']),
+    ('idx_job_company', ['job_company']),
+    ('idx_desc_hash', ['desc_hash']),
+]
+# SQLite has no partitions to prune, date-only ranges need their own index
+SQLITE_EXTRA_INDEXES = [
+    ('idx_create_time', ['create_time']),
+]
+# MySQL joins skill search hits back to job_info on the skills string
+MYSQL_EXTRA_INDEXES = [
+    ('idx_job_skills', ['job_skills']),
+]
+# Indexes of older versions covered by a composite index above
+OBSOLETE_INDEXES = ['idx_category']
+
+# Columns answered by full-text search
+SEARCH_COLUMNS = ['job_desc', 'job_skills']
+# MySQL FULLTEXT indexes backing search: (table, index name, columns).
+# Partitioned InnoDB tables cannot carry FULLTEXT indexes, so the
+# unpartitioned description and skills stores are indexed instead.
+MYSQL_FULLTEXT_INDEXES = [
+    (DESC_STORE_TABLE, 'ft_content', ['content']),
+    (SKILLS_STORE_TABLE, 'ft_skills', ['content']),
+]
+
+COLUMN_NAMES = [field.name for field in JOB_INFO_FIELDS]
+STORED_COLUMN_NAMES = [field.name for field in STORED_FIELDS]
+CSV_HEADERS = list(COLUMN_NAMES)
+
+def month_start(day):
+    """First day of the month of a date"""
+    return date(day.year, day.month, 1)
+
+def add_months(day, months):
+    """First day of the month that is months after the month of day"""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(month):
+    """Name of the partition holding the month starting at month"""
+    return f"p{month:%Y%m}"
+
+def mysql_partition_definitions(first_month, last_month):
+    """
+    Monthly RANGE COLUMNS partitions
+
+    Args:
+        first_month (date): Month of the first monthly partition
+        last_month (date): Month of the last monthly partition
+
+    Returns:
+        list: Partition definitions: p_history for anything older, one per
+            month, and pmax catching dates beyond last_month
+    """
+    first_month, last_month = month_start(first_month), month_start(last_month)
+    definitions = [f"PARTITION p_history VALUES LESS THAN ('{first_month}')"]
+    month = first_month
+    while month <= last_month:
+        definitions.append(f"PARTITION {partition_name(month)} VALUES LESS THAN ('{add_months(month, 1)}')")
+        month = add_months(month, 1)
+    definitions.append("PARTITION pmax VALUES LESS THAN (MAXVALUE)")
+    return definitions
+
+def mysql_partition_sql(first_month, last_month):
+    """PARTITION BY clause of job_info covering first_month to last_month"""
+    definitions = ',\n        '.join(mysql_partition_definitions(first_month, last_month))
+    return f"PARTITION BY RANGE COLUMNS({PARTITION_COLUMN}) (\n        {definitions}\n    )"
+
+def mysql_create_table_sql(table='job_info', today=None):
+    """
+    Generate the MySQL DDL of job_info
+
+    The table is partitioned by month of create_time, so retention drops
+    whole partitions and date ranges only touch the matching months.
+
+    Args:
+        table (str): Table name
+        today (date): Current date, partitions start at its month
+
+    Returns:
+        str: CREATE TABLE statement
+    """
+    month = month_start(today or date.today())
+    columns = ', '.join(f"{f.name} {f.mysql_type} {'NOT NULL' if f.name == PARTITION_COLUMN else 'NULL'} "
+                        f"COMMENT '{f.comment}'" for f in STORED_FIELDS)
+    indexes = ', '.join(f"INDEX {name} ({', '.join(index_columns)})" for name, index_columns in JOB_INFO_INDEXES + MYSQL_EXTRA_INDEXES)
+    return f"""
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INT AUTO_INCREMENT,
+        {columns},
+        PRIMARY KEY (id, {PARTITION_COLUMN}),
+        {indexes}
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    {mysql_partition_sql(month, add_months(month, PARTITION_MONTHS_AHEAD))}
+    """
+
+def sqlite_create_table_sql(table='job_info'):
+    """
+    Generate the SQLite DDL of job_info
+
+    Args:
+        table (str): Table name
+
+    Returns:
+        list: CREATE TABLE and CREATE INDEX statements
+    """
+    columns = ', '.join(f"{f.name} TEXT" for f in STORED_FIELDS)
+    statements = [f"CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY AUTOINCREMENT, {columns})"]
+    statements += [f"DROP INDEX IF EXISTS {name}" for name in OBSOLETE_INDEXES]
+    statements += [f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(index_columns)})"
+                   for name, index_columns in JOB_INFO_INDEXES + SQLITE_EXTRA_INDEXES]
+    return statements
+
+def mysql_desc_store_sql(compressed=True):
+    """
+    Generate the MySQL DDL of the description store
+
+    Args:
+        compressed (bool): Use InnoDB compressed pages, which keeps the
+            content searchable by the FULLTEXT index
+
+    Returns:
+        str: CREATE TABLE statement
+    """
+    row_format = " ROW_FORMAT=COMPRESSED KEY_BLOCK_SIZE=8" if compressed else ""
+    return f"""
+    CREATE TABLE IF NOT EXISTS {DESC_STORE_TABLE} (
+        desc_hash CHAR(40) NOT NULL PRIMARY KEY COMMENT 'SHA-1 of the description',
+        content MEDIUMTEXT NOT NULL COMMENT 'Job description'
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci{row_format}
+    """
+
+def mysql_skills_store_sql():
+    """Generate the MySQL DDL of the skills store, one row per distinct job_skills value"""
+    return f"""
+    CREATE TABLE IF NOT EXISTS {SKILLS_STORE_TABLE} (
+        content VARCHAR(255) NOT NULL PRIMARY KEY COMMENT 'Skill requirements as stored in job_info.job_skills'
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """
+
+def sqlite_desc_store_sql():
+    """Generate the SQLite DDL of the description store, content compressed by the handler"""
+    return f"""
+    CREATE TABLE IF NOT EXISTS {DESC_STORE_TABLE} (
+        desc_hash TEXT NOT NULL PRIMARY KEY,
+        codec TEXT NOT NULL,
+        content BLOB NOT NULL
+    ) WITHOUT ROWID
+    """
+
+def sqlite_fulltext_sql(tokenizer='trigram', table='job_info'):
+    """
+    Generate the SQLite FTS5 table and sync triggers for job_info
+
+    The FTS table is contentless, so text is stored only in job_info and
+    job_desc_store. Triggers feed it the decoded description through the
+    desc_decode function every SQLiteHandler connection registers.
+
+    Args:
+        tokenizer (str): FTS5 tokenizer, trigram handles CJK text without word breaks
+        table (str): Indexed table name
+
+    Returns:
+        list: CREATE VIRTUAL TABLE and CREATE TRIGGER statements
+    """
+    fts = f"{table}_fts"
+    column_list = ', '.join(SEARCH_COLUMNS)
+
+    def values(alias):
+        return ', '.join(f"(SELECT desc_decode(codec, content) FROM {DESC_STORE_TABLE} "
+                         f"WHERE desc_hash = {alias}.desc_hash)" if c == 'job_desc' else f"{alias}.{c}"
+                         for c in SEARCH_COLUMNS)
+
+    delete = f"INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES ('delete', old.id, {values('old')});"
+    insert = f"INSERT INTO {fts}(rowid, {column_list}) VALUES (new.id, {values('new')});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({column_list}, content='', tokenize='{tokenizer}')",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_fts_ai AFTER INSERT ON {table} BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_fts_ad AFTER DELETE ON {table} BEGIN {delete} END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_fts_au AFTER UPDATE OF desc_hash, job_skills ON {table} "
+        f"BEGIN {delete} {insert} END",
+    ]
+
+def mysql_job_view_sql(table='job_info'):
+    """Generate the MySQL view of job_info with the description joined back"""
+    columns = ', '.join(f"j.{name}" for name in ['id'] + STORED_COLUMN_NAMES)
+    return f"""
+    CREATE OR REPLACE VIEW {JOB_INFO_VIEW} AS
+    SELECT {columns}, d.content AS job_desc
+    FROM {table} j LEFT JOIN {DESC_STORE_TABLE} d ON d.desc_hash = j.desc_hash
+    """
+
+def sqlite_job_view_sql(table='job_info'):
+    """
+    Generate the SQLite view of job_info with the description joined back
+
+    The description is decoded by desc_decode, so the view is only readable
+    through SQLiteHandler connections.
+
+    Returns:
+        list: DROP VIEW and CREATE VIEW statements
+    """
+    columns = ', '.join(f"j.{name}" for name in ['id'] + STORED_COLUMN_NAMES)
+    return [f"DROP VIEW IF EXISTS {JOB_INFO_VIEW}",
+            f"CREATE VIEW {JOB_INFO_VIEW} AS SELECT {columns}, "
+            f"(SELECT desc_decode(d.codec, d.content) FROM {DESC_STORE_TABLE} d WHERE d.desc_hash = j.desc_hash) "
+            f"AS job_desc FROM {table} j"]
+
+def route_desc_reads(sql):
+    """
+    Point a query that names job_desc at JOB_INFO_VIEW
+
+    job_info itself keeps only desc_hash. Queries that select, filter or
+    sort by job_desc read the view instead; all other queries are returned
+    unchanged and keep reading the table. Names inside string literals and
+    comments are ignored.
+
+    Args:
+        sql (str): SELECT statement
+
+    Returns:
+        str: Statement reading JOB_INFO_VIEW if it names job_desc
+    """
+    if 'job_desc' not in sql or not any(m.group() == 'job_desc' for m in _DESC_READ_TOKEN.finditer(sql)):
+        return sql
+    return _DESC_READ_TOKEN.sub(lambda m: JOB_INFO_VIEW if m.group() == 'job_info' else m.group(), sql)
+
+def insert_sql(placeholder='%s', table='job_info', columns=STORED_COLUMN_NAMES):
+    """
+    Generate the INSERT statement matching the encoder output
+
+    Args:
+        placeholder (str): Parameter placeholder of the driver ('%s' or '?')
+        table (str): Table name
+        columns (list): Inserted columns
+
+    Returns:
+        str: INSERT statement
+    """
+    return f"INSERT INTO {table}({', '.join(columns)}) VALUES ({', '.join([placeholder] * len(columns))})"
+
+def compile_row_encoder(columns=COLUMN_NAMES):
+    """
+    Compile a converter from parser rows to tuples ordered like columns
+
+    Complete dict rows, as emitted by the parser, go through a single
+    itemgetter call. Rows missing keys fall back to filling '' and today's
+    create_time. Tuple rows must already follow the column order; a tuple
+    that only lacks the trailing create_time gets today's date. create_time
+    values carrying a time of day are cut to the date, matching the DATE
+    column of the SQL backends.
+
+    Args:
+        columns (list): Output column order
+
+    Returns:
+        callable: encode(row) -> tuple
+    """
+    columns = list(columns)
+    getter = itemgetter(*columns)
+    width = len(columns)
+    has_time = 'create_time' in columns
+    time_index = columns.index('create_time') if has_time else None
+    if width == 1:
+        fast_path = lambda row: (getter(row),)
+    else:
+        fast_path = getter
+
+    def today():
+        return datetime.now().strftime('%Y-%m-%d')
+
+    def to_date(values):
+        value = values[time_index]
+        if value is None or (isinstance(value, str) and len(value) <= 10):
+            return values
+        value = value.isoformat() if isinstance(value, (datetime, date)) else str(value)
+        return values[:time_index] + (value[:10],) + values[time_index + 1:]
+
+    def convert(row):
+        if isinstance(row, dict):
+            try:
+                return fast_path(row)
+            except KeyError:
+                defaults = {'create_time': today()} if has_time else {}
+                return tuple(row.get(c, defaults.get(c, '')) for c in columns)
+        if len(row) == width:
+            return tuple(row)
+        if has_time and columns[-1] == 'create_time' and len(row) == width - 1:
+            return tuple(row) + (today(),)
+        raise ValueError(f"Row has {len(row)} fields, expected {width}: {row!r}")
+
+    if not has_time:
+        return convert
+
+    def encode(row):
+        return to_date(convert(row))
+
+    return encode
+
+# Encoder of the full job_info column set, shared by the backends
+encode_job_row = compile_row_encoder(COLUMN_NAMES)
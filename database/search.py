@@ -0,0 +1,45 @@
+#!/usr/bin/python3
+# encoding: utf-8
+# @author: sunhao
+# @contact: smartadpole@163.com
+# @file: search.py
+# @time: 2026/10/19 13:30
+# @function: Shared helpers for full-text search over job descriptions and skills.
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 200
+# The SQLite trigram tokenizer only indexes terms of at least three characters
+MIN_TRIGRAM_LENGTH = 3
+
+def split_keywords(keywords):
+    """
+    Normalize search keywords to a list of terms
+
+    Args:
+        keywords (str/list): Space separated string or list of terms
+
+    Returns:
+        list: Non-empty terms
+    """
+    if isinstance(keywords, str):
+        keywords = keywords.split()
+    return [term.strip() for term in keywords if term and term.strip()]
+
+def page_bounds(page, page_size):
+    """
+    Convert a 1-based page number into LIMIT/OFFSET values
+
+    Args:
+        page (int): Page number, starting at 1, smaller values mean page 1
+        page_size (int): Rows per page, clamped to 1..MAX_PAGE_SIZE
+
+    Returns:
+        tuple: (page, limit, offset) with the page actually served
+    """
+    page = max(1, int(page))
+    page_size = min(max(1, int(page_size)), MAX_PAGE_SIZE)
+    return page, page_size, (page - 1) * page_size
+
+def search_result(rows, total, page, page_size):
+    """Pack a result page in the format returned by all backends, page and page_size as served by page_bounds"""
+    return {'total': total, 'page': page, 'page_size': page_size, 'rows': rows}
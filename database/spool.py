@@ -0,0 +1,225 @@
+#!/usr/bin/python3
+# encoding: utf-8
+# @author: sunhao
+# @contact: smartadpole@163.com
+# @file: spool.py
+# @time: 2026/10/19 13:00
+# @function: Local write-ahead spool for batches that could not reach MySQL.
+
+import os
+import re
+import json
+import uuid
+import threading
+import loger
+from metrics import REGISTRY
+from database.file_codec import FramedWriter, codec_extension, iter_lines
+from database.schema import COLUMN_NAMES, encode_job_row
+
+# spool-<sequence>-<random token>, segments of older versions have no token
+SEGMENT_PATTERN = re.compile(r'^(spool-(\d{8})(?:-[0-9a-f]{12})?)\.jsonl(\.gz|\.zst)?$')
+# Segments already stored, recorded in the same transaction as their rows
+SPOOL_LEDGER_TABLE = 'spool_replayed'
+DEFAULT_SEGMENT_ROWS = 5000
+DEFAULT_REPLAY_INTERVAL = 30
+
+class WriteAheadSpool:
+    def __init__(self, spool_dir, segment_rows=DEFAULT_SEGMENT_ROWS, codec='none', level=None):
+        """
+        Durable, segmented JSONL log of job rows
+
+        Every append is written as one frame and fsynced before returning.
+        Segments are sealed when they reach segment_rows rows or when the
+        replayer takes them, and deleted once their rows are stored.
+
+        Args:
+            spool_dir (str): Directory of the segment files
+            segment_rows (int): Rows per segment before a new one is started
+            codec (str): Compression codec of the segments, 'none', 'gzip' or 'zstd'
+            level (int): Compression level, None for the codec default
+        """
+        self.spool_dir = spool_dir
+        self.segment_rows = segment_rows
+        self.codec = codec
+        self.level = level
+        self._lock = threading.Lock()
+        self._writer = None
+        self._writer_rows = 0
+        os.makedirs(spool_dir, exist_ok=True)
+        existing = [int(SEGMENT_PATTERN.match(name).group(2)) for name in os.listdir(spool_dir)
+                    if SEGMENT_PATTERN.match(name)]
+        self._next_seq = max(existing, default=0) + 1
+
+    def _segment_path(self, seq):
+        # The token keeps segment ids unique once the sequence restarts in an emptied directory
+        return os.path.join(self.spool_dir,
+                            f"spool-{seq:08d}-{uuid.uuid4().hex[:12]}.jsonl{codec_extension(self.codec)}")
+
+    def append(self, data_rows):
+        """
+        Durably append rows to the active segment
+
+        Args:
+            data_rows (list): Rows as dicts or schema-ordered tuples
+
+        Returns:
+            int: Number of spooled rows
+        """
+        lines = [json.dumps(dict(zip(COLUMN_NAMES, encode_job_row(row))), ensure_ascii=False) + '\n'
+                 for row in data_rows]
+        with self._lock:
+            if self._writer is None:
+                self._writer = FramedWriter(self._segment_path(self._next_seq), self.codec, self.level, fsync=True)
+                self._next_seq += 1
+                self._writer_rows = 0
+            self._writer.write(''.join(lines).encode('utf-8'))
+            self._writer.flush()
+            self._writer_rows += len(lines)
+            if self._writer_rows >= self.segment_rows:
+                self._seal()
+        return len(lines)
+
+    def _seal(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def seal(self):
+        """Close the active segment so it can be replayed"""
+        with self._lock:
+            self._seal()
+
+    def segments(self):
+        """
+        List sealed segments in write order
+
+        Returns:
+            list: Segment file paths
+        """
+        with self._lock:
+            active = self._writer.path if self._writer else None
+            names = sorted(name for name in os.listdir(self.spool_dir) if SEGMENT_PATTERN.match(name))
+        return [os.path.join(self.spool_dir, name) for name in names
+                if os.path.join(self.spool_dir, name) != active]
+
+    def has_pending(self):
+        """Return True while any spooled row is not yet stored"""
+        with self._lock:
+            if self._writer is not None:
+                return True
+        return bool(self.segments())
+
+    @staticmethod
+    def segment_id(path):
+        """Identifier of a segment recorded in the ledger once its rows are stored"""
+        return SEGMENT_PATTERN.match(os.path.basename(path)).group(1)
+
+    @staticmethod
+    def read_segment(path):
+        """
+        Read the rows of a segment
+
+        Args:
+            path (str): Segment file path
+
+        Returns:
+            list: Rows as dicts
+        """
+        return [json.loads(line) for line in iter_lines(path) if line.strip()]
+
+    @staticmethod
+    def remove(path):
+        """Delete a segment whose rows have been stored"""
+        os.remove(path)
+
+    def close(self):
+        """Close the active segment"""
+        self.seal()
+
+def mysql_spool_ledger_sql():
+    """Generate the MySQL DDL of the table recording replayed segments"""
+    return f"""
+    CREATE TABLE IF NOT EXISTS {SPOOL_LEDGER_TABLE} (
+        batch_id VARCHAR(64) NOT NULL PRIMARY KEY COMMENT 'Spool segment id',
+        replayed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """
+
+class SpoolReplayer(threading.Thread):
+    def __init__(self, spool, handler_factory, interval=DEFAULT_REPLAY_INTERVAL, on_replayed=None):
+        """
+        Background thread replaying spooled segments into the database
+
+        The thread uses its own connection created by handler_factory, so it
+        never shares a connection with the crawler thread. Segments are
+        replayed in write order, each under its segment id: the handler
+        records the id in SPOOL_LEDGER_TABLE in the same transaction as the
+        rows and skips an id already recorded, so a crash between commit and
+        segment removal does not store the rows twice.
+
+        Args:
+            spool (WriteAheadSpool): Spool to drain
+            handler_factory (callable): Returns a new handler with save_data(rows, batch_id)/close
+            interval (float): Seconds between replay attempts
+            on_replayed (callable): Called after each stored segment, e.g. to drop cached results
+        """
+        super().__init__(name='spool-replayer', daemon=True)
+        self.spool = spool
+        self.handler_factory = handler_factory
+        self.interval = interval
+        self.on_replayed = on_replayed
+        self.replayed_rows = 0
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+
+    def wake(self):
+        """Trigger a replay attempt without waiting for the interval"""
+        self._wake_event.set()
+
+    def replay_once(self):
+        """
+        Replay all pending segments once
+
+        Returns:
+            bool: True if every sealed segment was stored
+        """
+        if not self.spool.has_pending():
+            return True
+        handler = None
+        try:
+            handler = self.handler_factory()
+            self.spool.seal()
+            for segment in self.spool.segments():
+                rows = self.spool.read_segment(segment)
+                if rows:
+                    handler.save_data(rows, batch_id=self.spool.segment_id(segment))
+                self.spool.remove(segment)
+                self.replayed_rows += len(rows)
+                REGISTRY.inc('rows_replayed_total', len(rows))
+                if self.on_replayed:
+                    self.on_replayed()
+                print(f"Replayed {len(rows)} spooled records from {os.path.basename(segment)}")
+            return True
+        except Exception as e:
+            print(f"Spool replay failed, retrying in {self.interval}s: {str(e)}", level="WARNING")
+            return False
+        finally:
+            if handler:
+                try:
+                    handler.close()
+                except Exception:
+                    pass
+
+    def run(self):
+        while not self._stop_event.is_set():
+            if self.replay_once() and self.spool.has_pending():
+                # Database is reachable and rows arrived meanwhile, keep draining
+                continue
+            self._wake_event.wait(self.interval)
+            self._wake_event.clear()
+
+    def stop(self, timeout=None):
+        """Stop the thread after its current attempt"""
+        self._stop_event.set()
+        self._wake_event.set()
+        self.join(timeout)
@@ -0,0 +1,483 @@
+#!/usr/bin/python3
+# encoding: utf-8
+# @author: sunhao
+# @contact: smartadpole@163.com
+# @file: sqlite_handler.py
+# @time: 2026/10/19 10:30
+# @function: Embedded SQLite handler for job listings.
+
+import os
+import re
+import sqlite3
+import loger
+from database.schema import DESC_STORE_TABLE, SEARCH_COLUMNS, SQL_QUOTED_PATTERN, encode_job_row, insert_sql, \
+    route_desc_reads, sqlite_create_table_sql, sqlite_desc_store_sql, sqlite_fulltext_sql, sqlite_job_view_sql
+from database.desc_store import check_desc_codec, decode_desc, desc_hash, encode_desc, hydrate_descriptions, \
+    split_descriptions
+from database.search import MIN_TRIGRAM_LENGTH, split_keywords, page_bounds, search_result
+from database.rollup import ROLLUP_TABLE, count_rollup_keys, salary_bucket, sqlite_rollup_table_sql, \
+    sqlite_rollup_triggers_sql, rollup_params, rollup_upsert_sql, rebuild_rollups
+
+DEFAULT_DB_FILE = 'spider_db.sqlite3'
+# PRAGMA user_version of a database whose create_time values are plain dates
+SCHEMA_VERSION = 1
+# Decoded description of job_info row j
+DESC_TEXT_SQL = (f"(SELECT desc_decode(codec, content) FROM {DESC_STORE_TABLE} d "
+                 f"WHERE d.desc_hash = j.desc_hash)")
+# String literals, quoted identifiers and comments, matched so a '%s' inside them is left alone
+SQL_TOKEN_PATTERN = re.compile(SQL_QUOTED_PATTERN + "|%s", re.S)
+
+class SQLiteHandler:
+    def __init__(self, output_dir, db_file=DEFAULT_DB_FILE, batch_size=500, desc_codec='zlib', desc_level=None):
+        """
+        Initialize SQLite handler
+
+        Args:
+            output_dir (str): Directory holding the database file
+            db_file (str): Database file name
+            batch_size (int): Number of rows written per transaction in save_data
+            desc_codec (str): Compression of stored descriptions, 'none', 'zlib' or 'zstd'
+            desc_level (int): Compression level, None for the codec default
+        """
+        check_desc_codec(desc_codec)
+        self.output_dir = output_dir
+        self.db_path = os.path.join(output_dir, db_file)
+        self.batch_size = batch_size
+        self.desc_codec = desc_codec
+        self.desc_level = desc_level
+        self.conn = None
+        self.cursor = None
+        self.connect()
+
+    def connect(self):
+        """Connect to database file and enable WAL mode"""
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            self.conn = sqlite3.connect(self.db_path, timeout=30)
+            self.conn.row_factory = sqlite3.Row
+            # Used by the FTS triggers and LIKE search to read compressed descriptions
+            self.conn.create_function('desc_decode', 2, decode_desc, deterministic=True)
+            # Used by the rollup triggers following deletes and updates of job_info
+            self.conn.create_function('rollup_salary_bucket', 1, salary_bucket, deterministic=True)
+            # WAL lets readers run alongside the crawler's writes; NORMAL sync is durable in WAL mode
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.cursor = self.conn.cursor()
+        except Exception as e:
+            print(f"Error connecting to SQLite database: {str(e)}", level="WARNING")
+            raise
+
+    def create_database_and_table(self):
+        """Create table and indexes if not exists"""
+        try:
+            self.cursor.execute(sqlite_desc_store_sql())
+            self._migrate_inline_descriptions()
+            for statement in sqlite_create_table_sql():
+                self.cursor.execute(statement)
+            self.cursor.execute(sqlite_rollup_table_sql())
+            for statement in sqlite_job_view_sql():
+                self.cursor.execute(statement)
+            self._normalize_create_time()
+            for statement in sqlite_rollup_triggers_sql():
+                self.cursor.execute(statement)
+            self._ensure_fulltext_index()
+            self.conn.commit()
+            print(f"SQLite database and table created successfully: {self.db_path}")
+        except Exception as e:
+            self.conn.rollback()
+            print(f"Error creating SQLite table: {str(e)}", level="ERROR")
+            raise
+
+    def _ensure_fulltext_index(self):
+        """Create the FTS5 index and backfill it from rows stored before it existed"""
+        self.cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'job_info_fts'")
+        if self.cursor.fetchone()[0]:
+            return
+        try:
+            statements = sqlite_fulltext_sql('trigram')
+            self.cursor.execute(statements[0])
+        except sqlite3.OperationalError as e:
+            # SQLite before 3.34 has no trigram tokenizer
+            print(f"FTS5 trigram tokenizer unavailable ({str(e)}), using unicode61", level="WARNING")
+            statements = sqlite_fulltext_sql('unicode61')
+            self.cursor.execute(statements[0])
+        for statement in statements[1:]:
+            self.cursor.execute(statement)
+        self.cursor.execute(f"INSERT INTO job_info_fts(rowid, {', '.join(SEARCH_COLUMNS)}) "
+                            f"SELECT j.id, {DESC_TEXT_SQL}, j.job_skills FROM job_info j")
+
+    def _normalize_create_time(self):
+        """Trim legacy create_time values to 'YYYY-MM-DD' so date ranges compare correctly, once per database"""
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            return
+        self.cursor.execute("UPDATE job_info SET create_time = substr(create_time, 1, 10) "
+                            "WHERE length(create_time) > 10")
+        self.cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def purge_before(self, cutoff):
+        """
+        Remove listings created before cutoff
+
+        SQLite has no partitions, so rows are deleted through the create_time
+        index in batch_size transactions to keep each write lock short.
+
+        Args:
+            cutoff (date/str): First date to keep
+
+        Returns:
+            int: Number of deleted rows
+        """
+        cutoff = str(cutoff)[:10]
+        total = 0
+        try:
+            while True:
+                with self.conn:
+                    deleted = self.conn.execute(
+                        "DELETE FROM job_info WHERE id IN "
+                        "(SELECT id FROM job_info WHERE create_time < ? LIMIT ?)", (cutoff, self.batch_size)).rowcount
+                total += deleted
+                if deleted < self.batch_size:
+                    break
+            with self.conn:
+                self.conn.execute(f"DELETE FROM {ROLLUP_TABLE} WHERE create_time < ?", (cutoff,))
+            print(f"Deleted {total} records before {cutoff}")
+            return total
+        except Exception as e:
+            print(f"Error purging data: {str(e)}", level="ERROR")
+            raise
+
+    def _migrate_inline_descriptions(self):
+        """Move descriptions of a job_info table created before job_desc_store into the store"""
+        columns = [row['name'] for row in self.conn.execute("PRAGMA table_info(job_info)")]
+        if 'job_desc' not in columns:
+            return
+        print("Moving job descriptions into job_desc_store, this may take a while on large tables")
+        # The old FTS table and triggers read job_info.job_desc directly
+        for trigger in ('job_info_fts_ai', 'job_info_fts_ad', 'job_info_fts_au'):
+            self.cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        self.cursor.execute("DROP TABLE IF EXISTS job_info_fts")
+        if 'desc_hash' not in columns:
+            self.cursor.execute("ALTER TABLE job_info ADD COLUMN desc_hash TEXT")
+        last_id = 0
+        while True:
+            rows = self.conn.execute("SELECT id, job_desc FROM job_info WHERE id > ? ORDER BY id LIMIT ?",
+                                     (last_id, self.batch_size)).fetchall()
+            if not rows:
+                break
+            hashes = [(desc_hash(row['job_desc']), row['id']) for row in rows]
+            self._store_descriptions({digest: row['job_desc'] for (digest, _), row in zip(hashes, rows) if digest})
+            self.conn.executemany("UPDATE job_info SET desc_hash = ? WHERE id = ?", hashes)
+            last_id = rows[-1]['id']
+        unhashed, unstored = self.conn.execute(
+            f"SELECT SUM(j.desc_hash IS NULL AND j.job_desc <> ''), "
+            f"SUM(j.desc_hash IS NOT NULL AND d.desc_hash IS NULL) FROM job_info j "
+            f"LEFT JOIN {DESC_STORE_TABLE} d ON d.desc_hash = j.desc_hash").fetchone()
+        if unhashed or unstored:
+            # Raised inside the open transaction: the caller rolls back the hash updates and job_desc is kept
+            raise RuntimeError(f"{unhashed or 0} job_info rows have a description without desc_hash and "
+                               f"{unstored or 0} reference a description missing from {DESC_STORE_TABLE}")
+        self.cursor.execute("ALTER TABLE job_info DROP COLUMN job_desc")
+
+    def _store_descriptions(self, descriptions):
+        """Add descriptions not yet in the store, compressing only the new ones"""
+        if not descriptions:
+            return
+        hashes = list(descriptions)
+        existing = set()
+        for start in range(0, len(hashes), 500):
+            chunk = hashes[start:start + 500]
+            existing.update(row[0] for row in self.conn.execute(
+                f"SELECT desc_hash FROM {DESC_STORE_TABLE} WHERE desc_hash IN ({', '.join('?' * len(chunk))})",
+                chunk))
+        self.conn.executemany(
+            f"INSERT OR IGNORE INTO {DESC_STORE_TABLE} (desc_hash, codec, content) VALUES (?, ?, ?)",
+            [(digest,) + encode_desc(text, self.desc_codec, self.desc_level)
+             for digest, text in descriptions.items() if digest not in existing])
+
+    def _fetch_descriptions(self, hashes):
+        """Read and decode stored descriptions by hash"""
+        rows = self.conn.execute(
+            f"SELECT desc_hash, codec, content FROM {DESC_STORE_TABLE} "
+            f"WHERE desc_hash IN ({', '.join('?' * len(hashes))})", hashes)
+        return {row['desc_hash']: decode_desc(row['codec'], row['content']) for row in rows}
+
+    def prune_descriptions(self):
+        """
+        Delete stored descriptions no job_info row references any more
+
+        Returns:
+            int: Number of deleted descriptions
+        """
+        try:
+            with self.conn:
+                return self.conn.execute(
+                    f"DELETE FROM {DESC_STORE_TABLE} WHERE NOT EXISTS "
+                    f"(SELECT 1 FROM job_info j WHERE j.desc_hash = {DESC_STORE_TABLE}.desc_hash)").rowcount
+        except Exception as e:
+            print(f"Error pruning descriptions: {str(e)}", level="ERROR")
+            raise
+
+    def search(self, keywords, page=1, page_size=20):
+        """
+        Full-text search over job descriptions and skills
+
+        Terms of at least three characters are answered by the FTS5 index and
+        ranked with bm25. Shorter terms, common for Chinese keywords, cannot
+        be served by the trigram index and fall back to a LIKE scan ranked by
+        the number of matched terms.
+
+        Args:
+            keywords (str/list): Search terms
+            page (int): Page number, starting at 1
+            page_size (int): Rows per page
+
+        Returns:
+            dict: total, page, page_size and rows ordered by relevance (score column)
+        """
+        terms = split_keywords(keywords)
+        page, limit, offset = page_bounds(page, page_size)
+        if not terms:
+            return search_result([], 0, page, limit)
+        try:
+            if all(len(term) >= MIN_TRIGRAM_LENGTH for term in terms):
+                query = ' OR '.join('"' + term.replace('"', '""') + '"' for term in terms)
+                self.cursor.execute("SELECT COUNT(*) FROM job_info_fts WHERE job_info_fts MATCH ?", (query,))
+                total = self.cursor.fetchone()[0]
+                self.cursor.execute(
+                    "SELECT j.*, -bm25(job_info_fts) AS score FROM job_info_fts "
+                    "JOIN job_info j ON j.id = job_info_fts.rowid WHERE job_info_fts MATCH ? "
+                    "ORDER BY bm25(job_info_fts) LIMIT ? OFFSET ?", (query, limit, offset))
+            else:
+                term_match = '(' + ' OR '.join(f"{c} LIKE ?" for c in SEARCH_COLUMNS) + ')'
+                where = ' OR '.join([term_match] * len(terms))
+                score = ' + '.join([f"CASE WHEN {term_match} THEN 1 ELSE 0 END"] * len(terms))
+                patterns = [f"%{term}%" for term in terms for _ in SEARCH_COLUMNS]
+                texts = f"(SELECT j.*, {DESC_TEXT_SQL} AS job_desc FROM job_info j)"
+                self.cursor.execute(f"SELECT COUNT(*) FROM {texts} WHERE {where}", patterns)
+                total = self.cursor.fetchone()[0]
+                self.cursor.execute(f"SELECT *, ({score}) AS score FROM {texts} WHERE {where} "
+                                    f"ORDER BY score DESC, id DESC LIMIT ? OFFSET ?",
+                                    patterns + patterns + [limit, offset])
+            rows = [dict(row) for row in self.cursor.fetchall()]
+            return search_result(hydrate_descriptions(rows, self._fetch_descriptions), total, page, limit)
+        except Exception as e:
+            print(f"Error searching data: {str(e)}", level="ERROR")
+            raise
+
+    @staticmethod
+    def _convert_sql(sql):
+        """Accept MySQL style '%s' placeholders so callers can share SQL between backends"""
+        if '%s' not in sql:
+            return sql
+        return SQL_TOKEN_PATTERN.sub(lambda m: '?' if m.group() == '%s' else m.group(), sql)
+
+    def insert_data(self, sql, args=None):
+        """
+        Insert data
+
+        Args:
+            sql (str): SQL insert statement
+            args (tuple/list): Insert parameters
+
+        Returns:
+            int: Number of affected rows
+        """
+        try:
+            self.cursor.execute(self._convert_sql(sql), args or ())
+            self.conn.commit()
+            return self.cursor.rowcount
+        except Exception as e:
+            self.conn.rollback()
+            print(f"Error inserting data: {str(e)}", level="ERROR")
+            raise
+
+    def insert_job_listing(self, data_row):
+        """
+        Insert a job listing into the database
+
+        Args:
+            data_row (dict): Data row to insert
+
+        Returns:
+            int: Number of affected rows
+        """
+        try:
+            return self._write_job_rows([encode_job_row(data_row)])
+        except Exception as e:
+            print(f"Error inserting data: {str(e)}", level="ERROR")
+            raise
+
+    def _write_job_rows(self, converted_rows):
+        """Insert encoded rows and their rollup increments in one transaction"""
+        stored_rows, descriptions = split_descriptions(converted_rows)
+        with self.conn:
+            self._store_descriptions(descriptions)
+            affected = self.conn.executemany(insert_sql('?'), stored_rows).rowcount
+            self.conn.executemany(rollup_upsert_sql('sqlite'), rollup_params(count_rollup_keys(converted_rows)))
+        return affected
+
+    def rebuild_rollups(self):
+        """
+        Recompute the rollup table from job_info
+
+        Returns:
+            int: Number of job rows aggregated
+        """
+        try:
+            total = rebuild_rollups(self, 'sqlite')
+            print(f"Rebuilt rollups from {total} records")
+            return total
+        except Exception as e:
+            self.conn.rollback()
+            print(f"Error rebuilding rollups: {str(e)}", level="ERROR")
+            raise
+
+    def save_data(self, data_rows):
+        """
+        Save multiple data rows to database in batched transactions
+
+        Args:
+            data_rows (list): List of data rows to save (can be dict or tuple)
+        """
+        try:
+            converted_rows = list(map(encode_job_row, data_rows))
+
+            for start in range(0, len(converted_rows), self.batch_size):
+                self._write_job_rows(converted_rows[start:start + self.batch_size])
+            print(f"Successfully saved {len(converted_rows)} records to SQLite")
+        except Exception as e:
+            print(f"Error saving data to SQLite: {str(e)}", level="ERROR")
+            raise
+
+    def close(self):
+        """Close database connection"""
+        if self.cursor:
+            self.cursor.close()
+            self.cursor = None
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+    def select_all(self, sql, args=None):
+        """
+        Query all data
+
+        Args:
+            sql (str): SQL query
+            args (tuple/list): Query parameters
+
+        Returns:
+            list: Query results
+        """
+        try:
+            self.cursor.execute(self._convert_sql(route_desc_reads(sql)), args or ())
+            return hydrate_descriptions([dict(row) for row in self.cursor.fetchall()], self._fetch_descriptions)
+        except Exception as e:
+            print(f"Error querying data: {str(e)}", level="ERROR")
+            raise
+
+    def iter_rows(self, sql, args=None, batch_size=1000):
+        """
+        Stream query results with bounded memory
+
+        Args:
+            sql (str): SQL query
+            args (tuple/list): Query parameters
+            batch_size (int): Rows fetched per round
+
+        Yields:
+            dict: One row at a time
+        """
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(self._convert_sql(route_desc_reads(sql)), args or ())
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from hydrate_descriptions([dict(row) for row in rows], self._fetch_descriptions)
+        except Exception as e:
+            print(f"Error streaming data: {str(e)}", level="ERROR")
+            raise
+        finally:
+            cursor.close()
+
+    def select_one(self, sql, args=None):
+        """
+        Query single data
+
+        Args:
+            sql (str): SQL query
+            args (tuple/list): Query parameters
+
+        Returns:
+            dict: Query result
+        """
+        try:
+            self.cursor.execute(self._convert_sql(route_desc_reads(sql)), args or ())
+            row = self.cursor.fetchone()
+            if row is None:
+                return None
+            return hydrate_descriptions([dict(row)], self._fetch_descriptions)[0]
+        except Exception as e:
+            print(f"Error querying data: {str(e)}", level="ERROR")
+            raise
+
+    def select_n(self, sql, n, args=None):
+        """
+        Query first n data
+
+        Args:
+            sql (str): SQL query
+            n (int): Number of records to fetch
+            args (tuple/list): Query parameters
+
+        Returns:
+            list: Query results
+        """
+        try:
+            self.cursor.execute(self._convert_sql(route_desc_reads(sql)), args or ())
+            return hydrate_descriptions([dict(row) for row in self.cursor.fetchmany(n)], self._fetch_descriptions)
+        except Exception as e:
+            print(f"Error querying data: {str(e)}", level="ERROR")
+            raise
+
+    def update_data(self, sql, args=None):
+        """
+        Update data
+
+        Args:
+            sql (str): SQL update statement
+            args (tuple/list): Update parameters
+
+        Returns:
+            int: Number of affected rows
+        """
+        try:
+            self.cursor.execute(self._convert_sql(sql), args or ())
+            self.conn.commit()
+            return self.cursor.rowcount
+        except Exception as e:
+            self.conn.rollback()
+            print(f"Error updating data: {str(e)}", level="ERROR")
+            raise
+
+    def delete_data(self, sql, args=None):
+        """
+        Delete data
+
+        Args:
+            sql (str): SQL delete statement
+            args (tuple/list): Delete parameters
+
+        Returns:
+            int: Number of affected rows
+        """
+        try:
+            self.cursor.execute(self._convert_sql(sql), args or ())
+            self.conn.commit()
+            return self.cursor.rowcount
+        except Exception as e:
+            self.conn.rollback()
+            print(f"Error deleting data: {str(e)}", level="ERROR")
+            raise
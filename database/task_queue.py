@@ -0,0 +1,363 @@
+#!/usr/bin/python3
+# encoding: utf-8
+# @author: sunhao
+# @contact: smartadpole@163.com
+# @file: task_queue.py
+# @time: 2026/10/19 20:00
+# @function: Crawl task table with leases, shared by crawler nodes through MySQL or SQLite.
+
+import os
+import socket
+import random
+import argparse
+from datetime import date
+import loger
+
+TASK_TABLE = 'crawl_task'
+DEFAULT_TASK_DB_FILE = 'crawl_tasks.sqlite3'
+DEFAULT_LEASE_SECONDS = 300
+DEFAULT_MAX_ATTEMPTS = 3
+# Claimable tasks read per round; nodes try them in random order to avoid racing for the same one
+CLAIM_CANDIDATES = 8
+TASK_STATUSES = ('pending', 'running', 'done', 'failed')
+
+# Current time in seconds on the database server, so leases do not depend on node clocks
+NOW_SQL = {
+    'mysql': 'UNIX_TIMESTAMP()',
+    'sqlite': "CAST((julianday('now') - 2440587.5) * 86400 AS INTEGER)",
+}
+
+def mysql_task_table_sql():
+    """Generate the MySQL DDL of the task table"""
+    return f"""
+    CREATE TABLE IF NOT EXISTS {TASK_TABLE} (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        run_id VARCHAR(32) NOT NULL COMMENT 'Crawl round shared by all nodes, e.g. the date',
+        category VARCHAR(255) NOT NULL,
+        sub_category VARCHAR(255) NOT NULL,
+        city VARCHAR(32) NOT NULL DEFAULT '' COMMENT 'City code, empty for the national listing',
+        status VARCHAR(16) NOT NULL DEFAULT 'pending',
+        owner VARCHAR(128) NULL COMMENT 'Node holding the lease',
+        lease_until BIGINT NOT NULL DEFAULT 0 COMMENT 'Unix time the lease expires',
+        attempts INT NOT NULL DEFAULT 0,
+        jobs INT NOT NULL DEFAULT 0 COMMENT 'Listings stored by the finished task',
+        last_error VARCHAR(1000) NULL,
+        updated_at BIGINT NOT NULL DEFAULT 0,
+        UNIQUE KEY uk_task (run_id, category, sub_category, city),
+        KEY idx_claim (run_id, status, lease_until)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """
+
+def sqlite_task_table_sql():
+    """Generate the SQLite DDL of the task table and its index"""
+    return [f"""
+    CREATE TABLE IF NOT EXISTS {TASK_TABLE} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        run_id TEXT NOT NULL,
+        category TEXT NOT NULL,
+        sub_category TEXT NOT NULL,
+        city TEXT NOT NULL DEFAULT '',
+        status TEXT NOT NULL DEFAULT 'pending',
+        owner TEXT,
+        lease_until INTEGER NOT NULL DEFAULT 0,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        jobs INTEGER NOT NULL DEFAULT 0,
+        last_error TEXT,
+        updated_at INTEGER NOT NULL DEFAULT 0,
+        UNIQUE (run_id, category, sub_category, city)
+    )
+    """, f"CREATE INDEX IF NOT EXISTS idx_claim ON {TASK_TABLE} (run_id, status, lease_until)"]
+
+def default_node_id():
+    """Host name and process id, unique per crawler process"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+def default_run_id():
+    """Today's date, so nodes started on the same day share the round"""
+    return date.today().isoformat()
+
+class TaskQueue:
+    def __init__(self, handler, dialect, run_id=None, node_id=None, lease_seconds=DEFAULT_LEASE_SECONDS,
+                 max_attempts=DEFAULT_MAX_ATTEMPTS):
+        """
+        Category tasks claimed by crawler nodes under expiring leases
+
+        A node claims a task by a conditional UPDATE that only succeeds while
+        the task is pending or its lease has expired, so concurrent nodes get
+        disjoint tasks without table locks. The holder extends the lease with
+        heartbeat(); a task whose holder crashed becomes claimable again once
+        the lease runs out. Failed tasks are retried until max_attempts.
+
+        Args:
+            handler: MySQLHandler or SQLiteHandler connected to the coordinator database
+            dialect (str): 'mysql' or 'sqlite'
+            run_id (str): Crawl round, today's date if None
+            node_id (str): Name of this node, host and pid if None
+            lease_seconds (int): Lease granted by claim and heartbeat
+            max_attempts (int): Claims of a task before it is marked failed
+        """
+        if dialect not in NOW_SQL:
+            raise ValueError(f"Unsupported dialect: {dialect}")
+        self.handler = handler
+        self.dialect = dialect
+        self.run_id = run_id or default_run_id()
+        self.node_id = node_id or default_node_id()
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._now = NOW_SQL[dialect]
+
+    def create_table(self):
+        """Create the task table if not exists"""
+        statements = [mysql_task_table_sql()] if self.dialect == 'mysql' else sqlite_task_table_sql()
+        for statement in statements:
+            self.handler.cursor.execute(statement)
+        self.handler.conn.commit()
+
+    def _select(self, sql, args=None):
+        rows = self.handler.select_all(sql, args)
+        # End the read so the next one sees other nodes' commits under REPEATABLE READ
+        self.handler.conn.commit()
+        return rows
+
+    def add_tasks(self, tasks):
+        """
+        Add tasks to the current round, existing ones are left untouched
+
+        Every node may seed the same tasks; the unique key keeps one copy.
+
+        Args:
+            tasks (list): (category, sub_category) or (category, sub_category, city) tuples
+
+        Returns:
+            int: Number of new tasks
+        """
+        verb, placeholder = ('INSERT IGNORE', '%s') if self.dialect == 'mysql' else ('INSERT OR IGNORE', '?')
+        params = []
+        for task in tasks:
+            category, sub_category, city = (tuple(task) + ('',))[:3]
+            params.append((self.run_id, category, sub_category, city or ''))
+        if not params:
+            return 0
+        # One transaction for the whole round, city shards add thousands of tasks
+        try:
+            self.handler.cursor.executemany(
+                f"{verb} INTO {TASK_TABLE} (run_id, category, sub_category, city, updated_at) "
+                f"VALUES ({', '.join([placeholder] * 4)}, {self._now})", params)
+            added = self.handler.cursor.rowcount
+            self.handler.conn.commit()
+        except Exception:
+            self.handler.conn.rollback()
+            raise
+        return max(added, 0)
+
+    def claim(self, prefer_city=None):
+        """
+        Take the next pending task or one whose lease expired
+
+        Args:
+            prefer_city (str): Try tasks of this city first, saving the node a homepage reload
+
+        Returns:
+            dict: Task row, None when nothing is left to claim
+        """
+        # Expired tasks out of attempts are given up instead of being claimed again
+        self.handler.update_data(
+            f"UPDATE {TASK_TABLE} SET status = 'failed', owner = NULL WHERE run_id = %s AND status = 'running' "
+            f"AND lease_until < {self._now} AND attempts >= %s", (self.run_id, self.max_attempts))
+        claimable = (f"(status = 'pending' OR (status = 'running' AND lease_until < {self._now})) "
+                     f"AND attempts < %s")
+        order, order_args = 'attempts, id', ()
+        if prefer_city is not None:
+            order, order_args = 'CASE WHEN city = %s THEN 0 ELSE 1 END, attempts, id', (prefer_city,)
+        while True:
+            candidates = self._select(
+                f"SELECT id, city FROM {TASK_TABLE} WHERE run_id = %s AND {claimable} ORDER BY {order} LIMIT %s",
+                (self.run_id, self.max_attempts) + order_args + (CLAIM_CANDIDATES,))
+            if not candidates:
+                return None
+            random.shuffle(candidates)
+            if prefer_city is not None:
+                candidates.sort(key=lambda c: c['city'] != prefer_city)
+            for candidate in candidates:
+                claimed = self.handler.update_data(
+                    f"UPDATE {TASK_TABLE} SET status = 'running', owner = %s, lease_until = {self._now} + %s, "
+                    f"attempts = attempts + 1, updated_at = {self._now} WHERE id = %s AND {claimable}",
+                    (self.node_id, self.lease_seconds, candidate['id'], self.max_attempts))
+                if claimed == 1:
+                    return self._select(f"SELECT * FROM {TASK_TABLE} WHERE id = %s", (candidate['id'],))[0]
+            # Every candidate went to another node, read a fresh set
+
+    def heartbeat(self, task):
+        """
+        Extend the lease of a claimed task
+
+        Args:
+            task (dict): Task returned by claim()
+
+        Returns:
+            bool: False if the lease was lost to another node, whose results then count instead
+        """
+        held = "id = %s AND owner = %s AND status = 'running'"
+        if self.handler.update_data(
+                f"UPDATE {TASK_TABLE} SET lease_until = {self._now} + %s, updated_at = {self._now} WHERE {held}",
+                (self.lease_seconds, task['id'], self.node_id)) == 1:
+            return True
+        # MySQL reports 0 affected rows when a heartbeat in the same second changes nothing
+        return bool(self._select(f"SELECT id FROM {TASK_TABLE} WHERE {held}", (task['id'], self.node_id)))
+
+    def complete(self, task, jobs=0):
+        """
+        Mark a claimed task done
+
+        Args:
+            task (dict): Task returned by claim()
+            jobs (int): Listings stored for the task
+
+        Returns:
+            bool: False if the lease was lost to another node
+        """
+        return self.handler.update_data(
+            f"UPDATE {TASK_TABLE} SET status = 'done', jobs = %s, lease_until = 0, last_error = NULL, "
+            f"updated_at = {self._now} WHERE id = %s AND owner = %s AND status = 'running'",
+            (jobs, task['id'], self.node_id)) == 1
+
+    def fail(self, task, error):
+        """
+        Release a claimed task after an error, to be retried until max_attempts
+
+        Args:
+            task (dict): Task returned by claim()
+            error (str): Error message kept in last_error
+        """
+        self.handler.update_data(
+            f"UPDATE {TASK_TABLE} SET status = CASE WHEN attempts >= %s THEN 'failed' ELSE 'pending' END, "
+            f"owner = NULL, lease_until = 0, last_error = %s, updated_at = {self._now} "
+            f"WHERE id = %s AND owner = %s AND status = 'running'",
+            (self.max_attempts, str(error)[:1000], task['id'], self.node_id))
+
+    def release(self, task):
+        """
+        Hand a claimed task back without using up an attempt, e.g. while this node is blocked
+
+        Args:
+            task (dict): Task returned by claim()
+        """
+        self.handler.update_data(
+            f"UPDATE {TASK_TABLE} SET status = 'pending', owner = NULL, lease_until = 0, "
+            f"attempts = CASE WHEN attempts > 0 THEN attempts - 1 ELSE 0 END, updated_at = {self._now} "
+            f"WHERE id = %s AND owner = %s AND status = 'running'", (task['id'], self.node_id))
+
+    def retry_failed(self):
+        """
+        Return failed tasks of the round to pending with fresh attempts
+
+        Returns:
+            int: Number of tasks reset
+        """
+        return self.handler.update_data(
+            f"UPDATE {TASK_TABLE} SET status = 'pending', attempts = 0, owner = NULL, lease_until = 0, "
+            f"updated_at = {self._now} WHERE run_id = %s AND status = 'failed'", (self.run_id,))
+
+    def yield_history(self, window):
+        """
+        Jobs found by finished tasks of earlier rounds
+
+        Args:
+            window (int): Number of most recent earlier rounds read; run ids must sort in time order, as dates do
+
+        Returns:
+            dict: (category, sub_category, city) -> jobs per finished crawl, newest round first
+        """
+        runs = [row['run_id'] for row in self._select(
+            f"SELECT DISTINCT run_id FROM {TASK_TABLE} WHERE run_id < %s ORDER BY run_id DESC LIMIT %s",
+            (self.run_id, window))]
+        if not runs:
+            return {}
+        history = {}
+        for row in self._select(
+                f"SELECT category, sub_category, city, jobs FROM {TASK_TABLE} WHERE status = 'done' "
+                f"AND run_id IN ({', '.join(['%s'] * len(runs))}) ORDER BY run_id DESC", tuple(runs)):
+            history.setdefault((row['category'], row['sub_category'], row['city']), []).append(int(row['jobs']))
+        return history
+
+    def progress(self):
+        """
+        Count the tasks of the round by status
+
+        Returns:
+            dict: status -> number of tasks, running ones with an expired lease as 'expired'
+        """
+        rows = self._select(
+            f"SELECT CASE WHEN status = 'running' AND lease_until < {self._now} THEN 'expired' ELSE status END "
+            f"AS state, COUNT(*) AS n FROM {TASK_TABLE} WHERE run_id = %s GROUP BY state", (self.run_id,))
+        counts = dict.fromkeys(TASK_STATUSES + ('expired',), 0)
+        counts.update({row['state']: int(row['n']) for row in rows})
+        return counts
+
+    def close(self):
+        """Close the coordinator connection"""
+        self.handler.close()
+
+def open_task_queue(coordinator, output_dir, db_config=None, **kwargs):
+    """
+    Connect to the coordinator database and create the task table
+
+    Args:
+        coordinator (str): 'mysql' or 'sqlite'
+        output_dir (str): Directory of the SQLite coordinator file
+        db_config (dict): MySQL connection settings
+        **kwargs: run_id, node_id, lease_seconds, max_attempts
+
+    Returns:
+        TaskQueue: Queue bound to the round
+    """
+    from database import MySQLHandler, SQLiteHandler
+
+    if coordinator == 'mysql':
+        if not db_config:
+            raise ValueError("Database configuration is required for the MySQL coordinator")
+        handler = MySQLHandler(**db_config)
+    elif coordinator == 'sqlite':
+        # Nodes on one machine share the file; SQLite serializes their claims
+        handler = SQLiteHandler(os.path.join(output_dir, 'sqlite'), db_file=DEFAULT_TASK_DB_FILE)
+    else:
+        raise ValueError(f"Unknown coordinator: {coordinator}")
+    queue = TaskQueue(handler, coordinator, **kwargs)
+    queue.create_table()
+    return queue
+
+def parse_arguments():
+    """
+    Parse command line arguments
+
+    Returns:
+        argparse.Namespace: Parsed arguments
+    """
+    parser = argparse.ArgumentParser(description='Inspect or reset the shared crawl task queue')
+    parser.add_argument('--coordinator', type=str, default='mysql', choices=['mysql', 'sqlite'],
+                        help='Database holding the task table')
+    parser.add_argument('--output-dir', type=str, default='result',
+                        help='Directory of the SQLite coordinator database')
+    parser.add_argument('--run-id', type=str, default=None, help='Crawl round, default today')
+    parser.add_argument('--retry-failed', action='store_true', help='Return failed tasks to pending')
+    return parser.parse_args()
+
+def main():
+    from database.data_storage import DEFAULT_DB_CONFIG
+
+    args = parse_arguments()
+    queue = open_task_queue(args.coordinator, args.output_dir, DEFAULT_DB_CONFIG, run_id=args.run_id)
+    try:
+        if args.retry_failed:
+            print(f"Reset {queue.retry_failed()} failed tasks of round {queue.run_id}")
+        counts = queue.progress()
+        print(f"Round {queue.run_id}: " + ', '.join(f"{state} {n}" for state, n in counts.items()))
+        for row in queue._select(f"SELECT category, sub_category, city, attempts, last_error FROM {TASK_TABLE} "
+                                 f"WHERE run_id = %s AND status = 'failed' ORDER BY id", (queue.run_id,)):
+            print(f"  failed {row['category']}/{row['sub_category']} {row['city']} after {row['attempts']} "
+                  f"attempts: {row['last_error']}", level="WARNING")
+    finally:
+        queue.close()
+
+if __name__ == "__main__":
+    main()
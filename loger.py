@@ -9,13 +9,28 @@
 '''
 import sys
 import os
+import queue
+import atexit
 import builtins
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 
 DEFAULT_OUTPUT_DIR = './'
 LOG_FILE = 'scraper.log'
 DEFAULT_FILE_SIZE = 1000 # 1000MB
+DEFAULT_LEVEL = 'INFO'
+LOG_FORMAT = '%(asctime)s [%(levelname)s] [%(filename)s:%(lineno)d] %(message)s'
+# Environment: LOG_LEVEL sets the default level, LOG_LEVELS per module, e.g. "boss_parser=DEBUG,database=WARNING"
+LEVEL_ENV = 'LOG_LEVEL'
+MODULE_LEVELS_ENV = 'LOG_LEVELS'
+
+LEVELS = {
+    'DEBUG': logging.DEBUG,
+    'INFO': logging.INFO,
+    'WARNING': logging.WARNING,
+    'ERROR': logging.ERROR,
+    'CRITICAL': logging.CRITICAL,
+}
 
 COLORS = {
     'DEBUG': '\033[94m',     # Blue
@@ -32,16 +47,48 @@ class ColoredFormatter(logging.Formatter):
         msg = super().format(record)
         return f"{COLORS.get(levelname, COLORS['RESET'])}{msg}{COLORS['RESET']}"
 
+class LazyMessage:
+    """print() arguments, joined only when a handler formats the record"""
+    __slots__ = ('args', 'sep')
+
+    def __init__(self, args, sep=' '):
+        self.args = args
+        self.sep = sep
+
+    def __str__(self):
+        return self.sep.join(str(arg) for arg in self.args)
+
+class LazyQueueHandler(QueueHandler):
+    """Queue handler that leaves formatting to the listener thread"""
+
+    def prepare(self, record):
+        # The queue never leaves the process, so the record does not need to
+        # be flattened to a string before it is enqueued
+        return record
+
 class Logger:
     """Logger class for managing logging configuration"""
     
     def __init__(self):
         self.output_dir = DEFAULT_OUTPUT_DIR
         self.log_file = os.path.join(self.output_dir, LOG_FILE)
+        self.listener = None
+        self.handlers = []
         self._setup_logging()
+        atexit.register(self.stop)
         
+    def stop(self):
+        """Write out queued records and close the handlers"""
+        if self.listener:
+            self.listener.stop()
+            self.listener = None
+        for handler in self.handlers:
+            handler.close()
+        self.handlers = []
+
     def set_output_dir(self, output_dir):
         """Set output directory for logs"""
+        self.stop()
         if os.path.exists(self.log_file):
             os.remove(self.log_file)
         self.output_dir = output_dir
@@ -50,10 +97,11 @@ class Logger:
         self._setup_logging()
         
     def _setup_logging(self):
-        """Setup logging configuration"""
+        """Setup logging configuration, records are written by a background listener thread"""
+        self.stop()
         # Create console handler
         console = logging.StreamHandler()
-        console.setFormatter(ColoredFormatter('%(asctime)s [%(levelname)s] %(message)s'))
+        console.setFormatter(ColoredFormatter(LOG_FORMAT))
 
         # Create file handler
         file_handler = RotatingFileHandler(
@@ -62,42 +110,102 @@ class Logger:
             backupCount=5,
             encoding='utf-8'
         )
-        file_handler.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] %(message)s'))
+        file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        self.handlers = [console, file_handler]
+
+        # Callers only enqueue records, the listener formats and writes them
+        log_queue = queue.SimpleQueue()
+        self.listener = QueueListener(log_queue, console, file_handler, respect_handler_level=True)
 
         # Configure root logger
         logger = logging.getLogger()
-        logger.setLevel(logging.INFO)
+        logger.setLevel(to_level(os.environ.get(LEVEL_ENV, DEFAULT_LEVEL)))
 
         # Clear existing handlers
         if logger.handlers:
             logger.handlers = []
 
         # Add handlers
-        logger.addHandler(console)
-        logger.addHandler(file_handler)
+        logger.addHandler(LazyQueueHandler(log_queue))
+        set_module_levels(os.environ.get(MODULE_LEVELS_ENV, ''))
+        self.listener.start()
+
+def to_level(level):
+    """Convert a level name or number to a logging level number"""
+    if isinstance(level, int):
+        return level
+    return LEVELS.get(str(level).upper(), logging.INFO)
+
+def set_module_level(module, level):
+    """
+    Set the verbosity of one module and its submodules
+
+    Args:
+        module (str): Module name as in __name__, e.g. 'boss_parser' or 'database'
+        level (str/int): Level name or number
+    """
+    logging.getLogger(module).setLevel(to_level(level))
+
+def set_module_levels(spec):
+    """
+    Apply per-module levels from a 'module=LEVEL,module=LEVEL' string
+
+    Args:
+        spec (str): Comma separated module=LEVEL pairs
+    """
+    for item in spec.split(','):
+        module, _, level = item.partition('=')
+        if module.strip() and level.strip():
+            set_module_level(module.strip(), level.strip())
 
 # Create global logger manager instance
 logger_manager = Logger()
 
-def print_to_logging(*args, level="INFO", **kwargs):
-    """Custom print function that logs messages"""
-    for k in ['end', 'flush']:
-        kwargs.pop(k, None)
-        
-    caller = f"[{os.path.basename(sys._getframe(1).f_globals['__file__'])}:{sys._getframe(1).f_lineno}] "
-    message = caller + ' '.join(str(arg) for arg in args)
-    
-    log_level = level.upper() if isinstance(level, str) else level
-    if log_level == "DEBUG" or log_level == logging.DEBUG:
-        logging.debug(message)
-    elif log_level == "WARNING" or log_level == logging.WARNING:
-        logging.warning(message)
-    elif log_level == "ERROR" or log_level == logging.ERROR:
-        logging.error(message)
-    elif log_level == "CRITICAL" or log_level == logging.CRITICAL:
-        logging.critical(message)
-    else:
-        logging.info(message)
+_loggers = {}
+
+def logger_name(module_globals):
+    """
+    Logger name of a module, the entry script is named after its module instead of '__main__'
+
+    Args:
+        module_globals (dict): Globals of the module
+
+    Returns:
+        str: e.g. 'boss_selenium' for python boss_selenium.py, 'database.migrate' for python -m database.migrate
+    """
+    name = module_globals.get('__name__', 'root')
+    if name != '__main__':
+        return name
+    spec = module_globals.get('__spec__')
+    if spec is not None and spec.name:
+        return spec.name
+    path = module_globals.get('__file__')
+    return os.path.splitext(os.path.basename(path))[0] if path else name
+
+def print_to_logging(*args, level="INFO", sep=' ', **kwargs):
+    """
+    Custom print function that logs messages
+
+    The logger of the calling module decides first whether the level is
+    enabled; disabled calls return before any formatting. The caller's
+    file, line and function are read from the frame already at hand, so
+    logging's stack walk (findCaller) never runs. Enabled records are
+    queued and formatted on the listener thread, so pass values as
+    separate arguments instead of pre-formatting them to keep disabled
+    debug calls free.
+    """
+    frame = sys._getframe(1)
+    module = frame.f_globals.get('__name__', 'root')
+    logger = _loggers.get(module)
+    if logger is None:
+        logger = _loggers.setdefault(module, logging.getLogger(logger_name(frame.f_globals)))
+    log_level = LEVELS.get(level.upper(), logging.INFO) if isinstance(level, str) else level
+    if not logger.isEnabledFor(log_level):
+        return
+    code = frame.f_code
+    record = logger.makeRecord(logger.name, log_level, code.co_filename, frame.f_lineno, LazyMessage(args, sep), (),
+                               None, code.co_name)
+    logger.handle(record)
 
 # replace print
 builtins.print = print_to_logging
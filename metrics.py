@@ -0,0 +1,264 @@
+#!/usr/bin/python3
+# encoding: utf-8
+# @author: sunhao
+# @contact: smartadpole@163.com
+# @file: metrics.py
+# @time: 2026/10/19 17:00
+# @function: Prometheus text-format metrics for long-running crawls, served over HTTP or written to a textfile.
+
+import os
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import loger
+
+METRIC_PREFIX = 'boss_crawler_'
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+DEFAULT_TEXTFILE_INTERVAL = 15
+
+# name -> (type, help); names are exported with METRIC_PREFIX
+METRICS = {
+    'pages_fetched_total': ('counter', 'Pages loaded by the browser'),
+    'jobs_parsed_total': ('counter', 'Job listings parsed from list pages'),
+    'categories_total': ('counter', 'Job categories processed'),
+    'rows_stored_total': ('counter', 'Rows written by the storage backend'),
+    'rows_spooled_total': ('counter', 'Rows diverted to the local spool because MySQL rejected them'),
+    'rows_replayed_total': ('counter', 'Spooled rows replayed into MySQL'),
+    'verification_hits_total': ('counter', 'Verification pages detected after a navigation'),
+    'session_refreshes_total': ('counter', 'Browser sessions reset after a verification backoff'),
+    'tasks_released_total': ('counter', 'Claimed category tasks handed back because of a verification page'),
+    'driver_starts_total': ('counter', 'Browser driver sessions started'),
+    'driver_restarts_total': ('counter', 'Browser driver sessions started after the first one'),
+    'stage_errors_total': ('counter', 'Failures per crawl stage'),
+    'tasks_claimed_total': ('counter', 'Category tasks claimed from the shared queue'),
+    'tasks_failed_total': ('counter', 'Claimed category tasks released after an error'),
+    'tasks_lost_total': ('counter', 'Claimed category tasks whose lease was taken over by another node'),
+    'new_postings_total': ('counter', 'Listings not seen on the previous visit of their category'),
+    'categories_deferred_total': ('counter', 'Categories left for a later run by the crawl scheduler'),
+    'stage_seconds': ('histogram', 'Latency of crawl stages in seconds'),
+    'spool_pending_segments': ('gauge', 'Spool segments waiting for replay'),
+}
+
+class ThreadShards:
+    def __init__(self, factory):
+        """
+        Per-thread shards of recorded values
+
+        Every thread records into its own shard, so the hot path takes no
+        lock; readers take a snapshot of all shards and merge them. A shard
+        may be updated while it is merged, so readers copy its items first.
+
+        Args:
+            factory (callable): Returns a new empty shard
+        """
+        self.factory = factory
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Shard of the calling thread, created on first use"""
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = self.factory()
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def snapshot(self):
+        """All shards created so far"""
+        with self._lock:
+            return list(self._shards)
+
+class MetricsRegistry:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        Counters, histograms and callback gauges, recorded into ThreadShards
+
+        Args:
+            buckets (tuple): Upper bounds of histogram buckets in seconds
+        """
+        self.buckets = tuple(buckets)
+        self._shards = ThreadShards(lambda: {'counters': {}, 'histograms': {}})
+        self._gauges = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        """
+        Add to a counter
+
+        Args:
+            name (str): Metric name without prefix, e.g. 'jobs_parsed_total'
+            value (float): Increment
+            **labels: Label values, e.g. backend='mysql'
+        """
+        key = (name, tuple(sorted(labels.items())))
+        counters = self._shards.get()['counters']
+        counters[key] = counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        """
+        Record a value into a histogram
+
+        Args:
+            name (str): Metric name without prefix, e.g. 'stage_seconds'
+            value (float): Observed value
+            **labels: Label values, e.g. stage='parse'
+        """
+        key = (name, tuple(sorted(labels.items())))
+        histograms = self._shards.get()['histograms']
+        histogram = histograms.get(key)
+        if histogram is None:
+            # Bucket counts, then sum and count
+            histogram = histograms[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        histogram[bisect_left(self.buckets, value)] += 1
+        histogram[-2] += value
+        histogram[-1] += 1
+
+    def gauge(self, name, callback, **labels):
+        """
+        Register a gauge evaluated when metrics are rendered
+
+        Args:
+            name (str): Metric name without prefix
+            callback (callable): Returns the current value
+            **labels: Label values
+        """
+        with self._lock:
+            self._gauges[(name, tuple(sorted(labels.items())))] = callback
+
+    def remove_gauge(self, name, **labels):
+        """Unregister a gauge, e.g. when the queue it reads is closed"""
+        with self._lock:
+            self._gauges.pop((name, tuple(sorted(labels.items()))), None)
+
+    @staticmethod
+    def _labels(labels, extra=()):
+        pairs = list(labels) + list(extra)
+        if not pairs:
+            return ''
+        escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+        return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+    def render(self):
+        """
+        Merge all shards into the Prometheus text exposition format
+
+        Returns:
+            str: Metrics text
+        """
+        counters, histograms = {}, {}
+        with self._lock:
+            gauges = list(self._gauges.items())
+        for shard in self._shards.snapshot():
+            for key, value in list(shard['counters'].items()):
+                counters[key] = counters.get(key, 0) + value
+            for key, values in list(shard['histograms'].items()):
+                merged = histograms.setdefault(key, [0] * len(values))
+                for i, v in enumerate(list(values)):
+                    merged[i] += v
+
+        samples = {}
+        for (name, labels), value in counters.items():
+            samples.setdefault(name, []).append(f"{METRIC_PREFIX}{name}{self._labels(labels)} {value}")
+        for (name, labels), values in histograms.items():
+            lines = samples.setdefault(name, [])
+            cumulative = 0
+            for bound, n in zip(self.buckets + ('+Inf',), values):
+                cumulative += n
+                lines.append(f"{METRIC_PREFIX}{name}_bucket{self._labels(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{METRIC_PREFIX}{name}_sum{self._labels(labels)} {values[-2]}")
+            lines.append(f"{METRIC_PREFIX}{name}_count{self._labels(labels)} {values[-1]}")
+        for (name, labels), callback in gauges:
+            try:
+                value = callback()
+            except Exception as e:
+                print(f"Error reading gauge {name}: {str(e)}", level="WARNING")
+                continue
+            samples.setdefault(name, []).append(f"{METRIC_PREFIX}{name}{self._labels(labels)} {value}")
+
+        output = []
+        for name in sorted(samples):
+            metric_type, help_text = METRICS.get(name, ('untyped', name))
+            output.append(f"# HELP {METRIC_PREFIX}{name} {help_text}")
+            output.append(f"# TYPE {METRIC_PREFIX}{name} {metric_type}")
+            output.extend(samples[name])
+        return '\n'.join(output) + '\n'
+
+# Registry fed by the crawler and storage modules
+REGISTRY = MetricsRegistry()
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = self.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would flood the crawl log
+        pass
+
+def start_http_server(port, host='127.0.0.1', registry=REGISTRY):
+    """
+    Serve /metrics from a daemon thread
+
+    Args:
+        port (int): TCP port
+        host (str): Bind address, local only by default
+        registry (MetricsRegistry): Metrics to expose
+
+    Returns:
+        ThreadingHTTPServer: Running server, call shutdown() to stop it
+    """
+    handler = type('MetricsHandler', (_MetricsHandler,), {'registry': registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    print(f"Serving metrics on http://{host}:{server.server_port}/metrics")
+    return server
+
+class TextfileExporter(threading.Thread):
+    def __init__(self, path, interval=DEFAULT_TEXTFILE_INTERVAL, registry=REGISTRY):
+        """
+        Periodically write the metrics for node_exporter's textfile collector
+
+        Args:
+            path (str): Output .prom file, replaced atomically on every write
+            interval (float): Seconds between writes
+            registry (MetricsRegistry): Metrics to write
+        """
+        super().__init__(name='metrics-textfile', daemon=True)
+        self.path = path
+        self.interval = interval
+        self.registry = registry
+        self._stop_event = threading.Event()
+
+    def write(self):
+        """Write the current metrics"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.registry.render())
+        os.replace(tmp_path, self.path)
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.write()
+            except Exception as e:
+                print(f"Error writing metrics textfile: {str(e)}", level="WARNING")
+
+    def stop(self):
+        """Stop the thread and write the final values"""
+        self._stop_event.set()
+        self.join()
+        self.write()
@@ -0,0 +1,262 @@
+#!/usr/bin/python3
+# encoding: utf-8
+# @author: sunhao
+# @contact: smartadpole@163.com
+# @file: page_archive.py
+# @time: 2026/10/19 18:30
+# @function: Compressed archive of crawled list pages and offline parser replay.
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+import loger
+from crawl_stats import percentile
+from database.file_codec import FramedWriter, check_codec, codec_extension, iter_frames
+from boss_parser import job_cards_html, extract_job_data_html
+
+DEFAULT_ARCHIVE_DIR = 'pages'
+DEFAULT_ARCHIVE_CODEC = 'gzip'
+MANIFEST_FILE = 'manifest.jsonl'
+# Fields reported by replay, category fields and create_time are set by the crawler
+REPORT_FIELDS = ['job_title', 'job_salary_range', 'job_location', 'job_experience', 'job_education',
+                 'job_company', 'job_industry', 'job_finance', 'job_scale', 'job_skills', 'job_address',
+                 'job_desc', 'province']
+_unsafe_chars = re.compile(r'[^\w\-]+')
+
+def safe_name(text, max_length=40):
+    """File name friendly form of a category name"""
+    return _unsafe_chars.sub('_', text or '').strip('_')[:max_length] or 'unknown'
+
+class PageArchive:
+    def __init__(self, archive_dir, codec=DEFAULT_ARCHIVE_CODEC, level=None):
+        """
+        Archive of list page sources, one compressed file per page
+
+        Pages are grouped in one directory per day. Each day has a manifest
+        of JSON lines recording the file, categories, URL and capture time,
+        so the original category names survive the file name sanitizing.
+
+        Args:
+            archive_dir (str): Root directory of the archive
+            codec (str): Compression codec, 'none', 'gzip' or 'zstd'
+            level (int): Compression level, None for the codec default
+        """
+        self.archive_dir = archive_dir
+        self.codec = check_codec(codec)
+        self.level = level
+        os.makedirs(archive_dir, exist_ok=True)
+
+    def record(self, page_source, category, sub_category, url=None, captured_at=None):
+        """
+        Store the source of one list page
+
+        Args:
+            page_source (str): HTML of the page
+            category (str): Primary category
+            sub_category (str): Secondary category
+            url (str): Page URL
+            captured_at (datetime): Capture time, now if None
+
+        Returns:
+            str: Path of the stored file
+        """
+        captured_at = captured_at or datetime.now()
+        day_dir = os.path.join(self.archive_dir, captured_at.strftime('%Y-%m-%d'))
+        os.makedirs(day_dir, exist_ok=True)
+        name = (f"{captured_at:%H%M%S_%f}_{safe_name(category)}_{safe_name(sub_category)}"
+                f".html{codec_extension(self.codec)}")
+        path = os.path.join(day_dir, name)
+        # Write under a temporary name so a crash never leaves a truncated page behind
+        tmp_path = path + '.tmp'
+        writer = FramedWriter(tmp_path, self.codec, self.level, valid_length=0)
+        writer.write(page_source.encode('utf-8'))
+        writer.close()
+        os.replace(tmp_path, path)
+        entry = {
+            'file': name,
+            'category': category,
+            'sub_category': sub_category,
+            'url': url,
+            'captured_at': captured_at.isoformat(timespec='seconds'),
+        }
+        with open(os.path.join(day_dir, MANIFEST_FILE), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        return path
+
+    def entries(self, start_date=None, end_date=None, category=None):
+        """
+        Iterate archived pages in capture order
+
+        Args:
+            start_date (str): First day (YYYY-MM-DD), inclusive
+            end_date (str): Last day (YYYY-MM-DD), inclusive
+            category (str): Only pages of this primary category
+
+        Yields:
+            dict: Manifest entry with 'path' and 'date' added
+        """
+        days = sorted(name for name in os.listdir(self.archive_dir)
+                      if re.fullmatch(r'\d{4}-\d{2}-\d{2}', name))
+        for day in days:
+            if (start_date and day < start_date) or (end_date and day > end_date):
+                continue
+            manifest = os.path.join(self.archive_dir, day, MANIFEST_FILE)
+            if not os.path.exists(manifest):
+                continue
+            with open(manifest, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Interrupted manifest write, the page itself may still be complete
+                        print(f"Skipping corrupt manifest line in {manifest}", level="WARNING")
+                        continue
+                    if category and entry['category'] != category:
+                        continue
+                    entry['path'] = os.path.join(self.archive_dir, day, entry['file'])
+                    entry['date'] = day
+                    yield entry
+
+    @staticmethod
+    def read(entry):
+        """
+        Load the HTML of an archived page
+
+        Args:
+            entry (dict): Entry from entries()
+
+        Returns:
+            str: Page source
+        """
+        return b''.join(iter_frames(entry['path'])).decode('utf-8')
+
+def replay_page(entry, page_source):
+    """
+    Parse one archived page with the HTML extractor
+
+    Args:
+        entry (dict): Archive entry
+        page_source (str): HTML of the page
+
+    Returns:
+        tuple: (number of job cards, parsed job dicts, parse seconds)
+    """
+    start = time.perf_counter()
+    cards = job_cards_html(page_source)
+    items = []
+    for card in cards:
+        item = extract_job_data_html(card, entry['category'], entry['sub_category'], entry['date'])
+        if item:
+            items.append(item)
+    return len(cards), items, time.perf_counter() - start
+
+def replay(archive, start_date=None, end_date=None, category=None):
+    """
+    Re-run the parser over archived pages and report how well it does
+
+    A markup change shows up as a drop of parse_rate or of single field
+    fill rates, or as pages without job cards.
+
+    Args:
+        archive (PageArchive): Archive to replay
+        start_date (str): First day (YYYY-MM-DD), inclusive
+        end_date (str): Last day (YYYY-MM-DD), inclusive
+        category (str): Only pages of this primary category
+
+    Returns:
+        dict: Page and card counts, parse_rate, field fill rates, parse timings
+            and per-category results
+    """
+    pages, empty_pages, unreadable = 0, 0, 0
+    cards, parsed = 0, 0
+    filled = dict.fromkeys(REPORT_FIELDS, 0)
+    timings = []
+    categories = {}
+    for entry in archive.entries(start_date, end_date, category):
+        try:
+            page_source = archive.read(entry)
+        except Exception as e:
+            unreadable += 1
+            print(f"Error reading archived page {entry['path']}: {str(e)}", level="WARNING")
+            continue
+        n_cards, items, seconds = replay_page(entry, page_source)
+        pages += 1
+        empty_pages += n_cards == 0
+        cards += n_cards
+        parsed += len(items)
+        timings.append(seconds)
+        for item in items:
+            for field in REPORT_FIELDS:
+                if item.get(field):
+                    filled[field] += 1
+        stat = categories.setdefault(f"{entry['category']}/{entry['sub_category']}",
+                                     {'pages': 0, 'cards': 0, 'parsed': 0})
+        stat['pages'] += 1
+        stat['cards'] += n_cards
+        stat['parsed'] += len(items)
+
+    timings.sort()
+    total = sum(timings)
+    return {
+        'pages': pages,
+        'empty_pages': empty_pages,
+        'unreadable_pages': unreadable,
+        'cards': cards,
+        'parsed': parsed,
+        'parse_rate': round(parsed / cards, 4) if cards else None,
+        # Share of all cards with a non-empty value, failed cards count as empty
+        'fill_rates': {field: round(n / cards, 4) if cards else None for field, n in filled.items()},
+        'parse_total_s': round(total, 3),
+        'parse_page_p50_ms': round(percentile(timings, 50) * 1000, 2) if timings else None,
+        'parse_page_p95_ms': round(percentile(timings, 95) * 1000, 2) if timings else None,
+        'cards_per_s': round(cards / total, 1) if total > 0 else None,
+        'categories': categories,
+    }
+
+def parse_arguments():
+    """
+    Parse command line arguments
+
+    Returns:
+        argparse.Namespace: Parsed arguments
+    """
+    parser = argparse.ArgumentParser(description='Replay archived list pages through the parser')
+    parser.add_argument('--archive-dir', type=str, default=os.path.join('result', DEFAULT_ARCHIVE_DIR),
+                        help='Archive written by boss_selenium.py --archive-pages')
+    parser.add_argument('--start-date', type=str, default=None, help='First capture day (YYYY-MM-DD)')
+    parser.add_argument('--end-date', type=str, default=None, help='Last capture day (YYYY-MM-DD)')
+    parser.add_argument('--category', type=str, default=None, help='Only replay this primary category')
+    parser.add_argument('--min-parse-rate', type=float, default=None,
+                        help='Exit with status 1 if fewer than this share of job cards parse, e.g. 0.95')
+    parser.add_argument('--output', type=str, default=None, help='Write the report as JSON to this file')
+    return parser.parse_args()
+
+def main():
+    args = parse_arguments()
+    # Failed cards are counted in the report, one error line per card would bury it
+    loger.set_module_level('boss_parser', 'CRITICAL')
+    report = replay(PageArchive(args.archive_dir), args.start_date, args.end_date, args.category)
+
+    print(f"Replayed {report['pages']} pages: {report['parsed']}/{report['cards']} job cards parsed "
+          f"(parse rate {report['parse_rate']}), {report['empty_pages']} pages without job cards")
+    if report['pages']:
+        print(f"Parse time {report['parse_total_s']}s, p50 {report['parse_page_p50_ms']} ms/page, "
+              f"p95 {report['parse_page_p95_ms']} ms/page, {report['cards_per_s']} cards/s")
+    for field, rate in report['fill_rates'].items():
+        print(f"  {field:<18} {rate}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Report written to {args.output}")
+    if args.min_parse_rate is not None and (report['parse_rate'] or 0) < args.min_parse_rate:
+        print(f"Parse rate below {args.min_parse_rate}", level="ERROR")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/python3
+# encoding: utf-8
+# @author: sunhao
+# @contact: smartadpole@163.com
+# @file: test_crawl_stats.py
+# @time: 2026/10/20 10:00
+# @function: Run summaries of CrawlStats and their metrics forwarding.
+
+import threading
+from crawl_stats import CrawlStats
+from metrics import MetricsRegistry, METRIC_PREFIX
+
+
+def metric_value(registry, name):
+    for line in registry.render().splitlines():
+        if line.startswith(f"{METRIC_PREFIX}{name} "):
+            return float(line.split()[-1])
+    return None
+
+
+def test_summary_without_counters():
+    stats = CrawlStats(metrics=MetricsRegistry())
+    with stats.timer('page_load'):
+        pass
+    summary = stats.summary()
+    assert summary['counters'] == {}
+    assert summary['jobs'] == 0
+    assert summary['stages']['page_load']['count'] == 1
+
+
+def test_empty_report():
+    stats = CrawlStats(metrics=MetricsRegistry())
+    stats.finish()
+    assert stats.report()['errors'] == 0
+
+
+def test_summary_does_not_add_to_metrics():
+    registry = MetricsRegistry()
+    stats = CrawlStats(metrics=registry)
+    stats.count('jobs', 10)
+    assert stats.summary()['jobs'] == 10
+    assert stats.summary()['jobs'] == 10
+    assert metric_value(registry, 'jobs_parsed_total') == 10
+
+
+def test_threads_record_into_separate_shards():
+    registry = MetricsRegistry()
+    stats = CrawlStats(metrics=registry)
+
+    def work():
+        for _ in range(100):
+            stats.count('jobs')
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(stats._shards.snapshot()) == 4
+    assert stats.summary()['jobs'] == 400
+    assert metric_value(registry, 'jobs_parsed_total') == 400
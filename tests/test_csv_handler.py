@@ -0,0 +1,40 @@
+#!/usr/bin/python3
+# encoding: utf-8
+# @author: sunhao
+# @contact: smartadpole@163.com
+# @file: test_csv_handler.py
+# @time: 2026/10/20 21:00
+# @function: Flush policy of the buffered daily CSV writer.
+
+import time
+from database.csv_handler import CSVAppendWriter
+
+HEADERS = ['job_title', 'job_company']
+
+
+def written_rows(writer):
+    with open(writer.path, encoding='utf-8') as f:
+        return f.read().splitlines()[1:]
+
+
+def test_idle_rows_are_flushed_by_the_timer(tmp_path):
+    writer = CSVAppendWriter(str(tmp_path), HEADERS, flush_rows=0, flush_interval=0.05)
+    writer.write_rows([['Java', 'ACME']])
+    assert written_rows(writer) == []
+    # No further write arrives, the timer alone has to flush the row
+    deadline = time.monotonic() + 5
+    while not written_rows(writer) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert written_rows(writer) == ['Java,ACME']
+    writer.write_rows([['Go', 'ACME']])
+    writer.close()
+    assert written_rows(writer) == ['Java,ACME', 'Go,ACME']
+    assert writer._timer is None
+
+
+def test_no_timer_without_flush_interval(tmp_path):
+    writer = CSVAppendWriter(str(tmp_path), HEADERS, flush_rows=0, flush_interval=None)
+    writer.write_rows([['Java', 'ACME']])
+    assert writer._timer is None and written_rows(writer) == []
+    writer.close()
+    assert written_rows(writer) == ['Java,ACME']
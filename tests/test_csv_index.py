@@ -0,0 +1,80 @@
+#!/usr/bin/python3
+# encoding: utf-8
+# @author: sunhao
+# @contact: smartadpole@163.com
+# @file: test_csv_index.py
+# @time: 2026/10/20 14:00
+# @function: Append-only sidecar index of the daily CSV files.
+
+import csv
+import pytest
+from database import csv_index
+from database.csv_index import CSVOffsetIndex
+
+
+def append_rows(path, rows, header=False):
+    with open(path, 'a', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        if header:
+            writer.writerow(['category', 'province', 'create_time', 'job_title'])
+        writer.writerows(rows)
+
+
+def index_lines(path):
+    with open(path + csv_index.INDEX_SUFFIX, encoding='utf-8') as f:
+        return f.readlines()
+
+
+def titles(index, category):
+    return [fields[3] for fields in index.read(index.lookup('category', lambda value: value == category))]
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = str(tmp_path / 'job_info_2026-10-20.csv')
+    append_rows(path, [['技术', '北京', '2026-10-20', 'a'], ['产品', '上海', '2026-10-20', 'b']], header=True)
+    return path
+
+
+def test_update_appends_a_segment(csv_file):
+    CSVOffsetIndex(csv_file).update()
+    append_rows(csv_file, [['技术', '上海', '2026-10-20', 'c']])
+    index = CSVOffsetIndex(csv_file).update()
+    assert len(index_lines(csv_file)) == 2
+    assert titles(index, '技术') == ['a', 'c']
+    assert titles(CSVOffsetIndex(csv_file).update(), '技术') == ['a', 'c']
+
+
+def test_compacts_after_many_segments(csv_file, monkeypatch):
+    monkeypatch.setattr(csv_index, 'COMPACT_SEGMENTS', 3)
+    CSVOffsetIndex(csv_file).update()
+    for title in 'cde':
+        append_rows(csv_file, [['技术', '北京', '2026-10-20', title]])
+        CSVOffsetIndex(csv_file).update()
+    assert len(index_lines(csv_file)) == 2
+    assert titles(CSVOffsetIndex(csv_file).update(), '技术') == ['a', 'c', 'd', 'e']
+
+
+def test_torn_segment_is_reindexed(csv_file):
+    CSVOffsetIndex(csv_file).update()
+    append_rows(csv_file, [['技术', '北京', '2026-10-20', 'c']])
+    CSVOffsetIndex(csv_file).update()
+    # A crash halfway through appending the last segment
+    with open(csv_file + csv_index.INDEX_SUFFIX, 'r+', encoding='utf-8') as f:
+        content = f.read()
+        f.seek(0)
+        f.truncate()
+        f.write(content[:-10])
+    index = CSVOffsetIndex(csv_file).update()
+    assert titles(index, '技术') == ['a', 'c']
+    assert len(index_lines(csv_file)) == 1
+
+
+def test_duplicate_segment_is_skipped(csv_file):
+    CSVOffsetIndex(csv_file).update()
+    append_rows(csv_file, [['技术', '北京', '2026-10-20', 'c']])
+    CSVOffsetIndex(csv_file).update()
+    # Two readers extended the index over the same records at the same time
+    with open(csv_file + csv_index.INDEX_SUFFIX, 'a', encoding='utf-8') as f:
+        f.write(index_lines(csv_file)[-1])
+    assert titles(CSVOffsetIndex(csv_file).update(), '技术') == ['a', 'c']
@@ -0,0 +1,52 @@
+#!/usr/bin/python3
+# encoding: utf-8
+# @author: sunhao
+# @contact: smartadpole@163.com
+# @file: test_data_storage.py
+# @time: 2026/10/20 16:00
+# @function: DataStorage rollups across raw writes.
+
+import pytest
+from database.data_storage import DataStorage
+from database.schema import COLUMN_NAMES
+
+
+def job(title, category='后端开发', salary='15-25K', **fields):
+    row = dict.fromkeys(COLUMN_NAMES, '')
+    row.update(category=category, sub_category='Java', province='北京', job_title=title, job_salary_range=salary,
+               create_time='2026-10-19')
+    row.update(fields)
+    return row
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = DataStorage(str(tmp_path), 'sqlite')
+    yield storage
+    storage.close()
+
+
+def counts(storage):
+    return {row['category']: row['job_count'] for row in storage.job_counts()}
+
+
+def test_delete_updates_rollups(storage):
+    storage.save_data([job('Java'), job('Go')])
+    assert counts(storage) == {'后端开发': 2}
+    assert storage.delete_data("DELETE FROM job_info WHERE job_title = %s", ('Go',)) == 1
+    assert counts(storage) == {'后端开发': 1}
+    assert storage.query_data("SELECT COUNT(*) AS n FROM job_info", n=1)['n'] == 1
+    storage.delete_data("DELETE FROM job_info")
+    assert counts(storage) == {}
+
+
+def test_update_moves_rollup_rows(storage):
+    storage.save_data([job('Java'), job('Go', salary='30-50K')])
+    storage.update_data("UPDATE job_info SET category = %s WHERE job_title = %s", ('算法', 'Go'))
+    assert counts(storage) == {'后端开发': 1, '算法': 1}
+    assert storage.salary_percentiles(percentiles=(50,)) == [
+        {'category': '后端开发', 'job_count': 1, 'p50': 20},
+        {'category': '算法', 'job_count': 1, 'p50': 40},
+    ]
+    storage.rebuild_rollups()
+    assert counts(storage) == {'后端开发': 1, '算法': 1}
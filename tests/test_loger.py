@@ -0,0 +1,22 @@
+#!/usr/bin/python3
+# encoding: utf-8
+# @author: sunhao
+# @contact: smartadpole@163.com
+# @file: test_loger.py
+# @time: 2026/10/20 22:30
+# @function: Logger names used by the print replacement.
+
+from types import SimpleNamespace
+from loger import logger_name
+
+
+def test_modules_keep_their_name():
+    assert logger_name({'__name__': 'database.spool', '__file__': '/src/database/spool.py'}) == 'database.spool'
+
+
+def test_entry_script_is_named_after_its_module():
+    assert logger_name({'__name__': '__main__', '__spec__': None, '__file__': '/src/boss_selenium.py'}) == 'boss_selenium'
+    spec = SimpleNamespace(name='database.migrate')
+    assert logger_name({'__name__': '__main__', '__spec__': spec, '__file__': '/src/database/migrate.py'}) == \
+        'database.migrate'
+    assert logger_name({'__name__': '__main__'}) == '__main__'
@@ -0,0 +1,140 @@
+#!/usr/bin/python3
+# encoding: utf-8
+# @author: sunhao
+# @contact: smartadpole@163.com
+# @file: test_mysql_migrations.py
+# @time: 2026/10/20 17:00
+# @function: Migration gating of the MySQL handler against an in-memory catalog.
+
+import pytest
+from database.mysql_handler import MySQLHandler
+from database.schema import DESC_STORE_TABLE, SKILLS_STORE_TABLE
+
+
+class FakeCursor:
+    def __init__(self):
+        self.statements = []
+        # Row returned by fetchone, as for the description check of the migration
+        self.one = None
+
+    def execute(self, sql, args=None):
+        self.statements.append(' '.join(sql.split()))
+
+    def executemany(self, sql, args):
+        self.execute(sql)
+
+    def fetchall(self):
+        return []
+
+    def fetchone(self):
+        return self.one
+
+
+class FakeConnection:
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class CatalogHandler(MySQLHandler):
+    """MySQLHandler reading table layouts from a dict instead of information_schema"""
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.steps = []
+        super().__init__('localhost', 'root', '', 'spider_db')
+
+    def connect(self):
+        self.conn = FakeConnection()
+        self.cursor = FakeCursor()
+
+    def _table_columns(self, table):
+        return list(self.tables.get(table, {}).get('columns', {}))
+
+    def _table_indexes(self, table):
+        return list(self.tables.get(table, {}).get('indexes', []))
+
+    def _column_type(self, table, column):
+        return self.tables.get(table, {}).get('columns', {}).get(column)
+
+    def _partitions(self):
+        return self.tables.get('job_info', {}).get('partitions', [])
+
+    def backup_table(self, table):
+        self.steps.append('backup')
+
+    def _migrate_partitioning(self):
+        self.steps.append('partitioning')
+        self.tables['job_info']['columns']['create_time'] = 'date'
+        self.tables['job_info']['partitions'] = [('pmax', None)]
+
+    def _migrate_skills_store(self):
+        self.steps.append('skills_store')
+        self.tables['job_info']['indexes'].append('idx_job_skills')
+        self.tables[SKILLS_STORE_TABLE] = {'columns': {'content': 'varchar'}, 'indexes': ['PRIMARY']}
+
+    def _ensure_fulltext_index(self):
+        self.steps.append('fulltext_indexes')
+        for table in (DESC_STORE_TABLE, SKILLS_STORE_TABLE):
+            if table in self.tables:
+                self.tables[table]['indexes'].append('ft_content' if table == DESC_STORE_TABLE else 'ft_skills')
+
+
+def legacy_tables():
+    return {
+        'job_info': {'columns': {'id': 'int', 'job_skills': 'varchar', 'desc_hash': 'char', 'create_time': 'varchar'},
+                     'indexes': ['PRIMARY']},
+        DESC_STORE_TABLE: {'columns': {'desc_hash': 'char', 'content': 'mediumtext'},
+                           'indexes': ['PRIMARY', 'ft_content']},
+    }
+
+
+def test_new_database_needs_no_migration():
+    handler = CatalogHandler({})
+    assert handler.pending_migrations() == []
+
+
+def test_legacy_table_is_refused_untouched():
+    handler = CatalogHandler(legacy_tables())
+    assert handler.pending_migrations() == ['partitioning', 'skills_store']
+    with pytest.raises(RuntimeError, match='database.migrate'):
+        handler.create_database_and_table()
+    assert not [sql for sql in handler.cursor.statements if not sql.startswith(('CREATE DATABASE', 'USE'))]
+
+
+def test_migrate_applies_pending_steps_in_order():
+    handler = CatalogHandler(legacy_tables())
+    assert handler.migrate(backup=True) == ['partitioning', 'skills_store', 'fulltext_indexes']
+    assert handler.steps == ['backup', 'partitioning', 'skills_store', 'fulltext_indexes']
+    assert handler.pending_migrations() == []
+    assert handler.migrate(backup=True) == []
+    handler.ensure_partitions = lambda: []
+    handler.create_database_and_table()
+    assert any(sql.startswith('CREATE TABLE IF NOT EXISTS job_info') for sql in handler.cursor.statements)
+
+
+def test_inline_descriptions_migrate_first():
+    tables = legacy_tables()
+    tables['job_info']['columns']['job_desc'] = 'text'
+    handler = CatalogHandler(tables)
+    assert handler.pending_migrations()[0] == 'inline_descriptions'
+    with pytest.raises(RuntimeError):
+        handler.create_database_and_table()
+
+
+def test_job_desc_kept_when_rows_lack_a_hash():
+    tables = legacy_tables()
+    tables['job_info']['columns']['job_desc'] = 'text'
+    handler = CatalogHandler(tables)
+    handler.cursor.one = {'unhashed': 3, 'unstored': None}
+    with pytest.raises(RuntimeError, match='3 job_info rows'):
+        handler._migrate_inline_descriptions()
+    assert not [sql for sql in handler.cursor.statements if 'DROP COLUMN' in sql]
+    handler.cursor.one = {'unhashed': 0, 'unstored': 0}
+    handler._migrate_inline_descriptions()
+    assert handler.cursor.statements[-1] == 'ALTER TABLE job_info DROP COLUMN job_desc'
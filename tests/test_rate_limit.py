@@ -0,0 +1,79 @@
+#!/usr/bin/python3
+# encoding: utf-8
+# @author: sunhao
+# @contact: smartadpole@163.com
+# @file: test_rate_limit.py
+# @time: 2026/10/20 20:00
+# @function: Shared token bucket on SQLite, timed by a fake clock.
+
+import pytest
+from database.sqlite_handler import SQLiteHandler
+from database.task_queue import DEFAULT_TASK_DB_FILE
+from database.rate_limit import RateLimiter
+
+HOST = 'www.zhipin.com'
+
+
+class FakeClock:
+    def __init__(self, now=1_800_000_000.0):
+        self.now = now
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def open_limiter(tmp_path, clock):
+    limiters = []
+
+    def open_limiter(rate=0.5, burst=3):
+        # Each limiter has its own connection, as crawler processes would
+        limiter = RateLimiter(SQLiteHandler(str(tmp_path), db_file=DEFAULT_TASK_DB_FILE), 'sqlite', rate, burst,
+                              clock=clock, sleep=clock.sleep)
+        limiter.create_table()
+        limiters.append(limiter)
+        return limiter
+
+    yield open_limiter
+    for limiter in limiters:
+        limiter.close()
+
+
+def test_burst_then_rate(open_limiter, clock):
+    limiter = open_limiter()
+    assert [limiter.acquire(HOST) for _ in range(3)] == [0, 0, 0]
+    assert limiter.acquire(HOST) == pytest.approx(2.0)
+    assert limiter.acquire(HOST) == pytest.approx(2.0)
+    assert clock.slept == pytest.approx([2.0, 2.0])
+
+
+def test_bucket_refills_up_to_burst(open_limiter, clock):
+    limiter = open_limiter()
+    for _ in range(3):
+        limiter.acquire(HOST)
+    clock.now += 3.0
+    # 1.5 tokens came back: one request goes through, the next waits for the missing half token
+    assert limiter.reserve(HOST) == 0
+    assert limiter.reserve(HOST) == pytest.approx(1.0)
+    clock.now += 60.0
+    assert [limiter.reserve(HOST) for _ in range(3)] == [0, 0, 0]
+    assert limiter.reserve(HOST) == pytest.approx(2.0)
+
+
+def test_limiters_share_one_bucket(open_limiter, clock):
+    first, second = open_limiter(), open_limiter()
+    assert [first.reserve(HOST), second.reserve(HOST), first.reserve(HOST)] == [0, 0, 0]
+    # Reservations queue up behind each other across connections
+    assert second.reserve(HOST) == pytest.approx(2.0)
+    assert first.reserve(HOST) == pytest.approx(4.0)
+    assert first.reserve('other.example.com') == 0
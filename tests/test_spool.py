@@ -0,0 +1,124 @@
+#!/usr/bin/python3
+# encoding: utf-8
+# @author: sunhao
+# @contact: smartadpole@163.com
+# @file: test_spool.py
+# @time: 2026/10/20 18:00
+# @function: Spooling of failed MySQL batches and their replay.
+
+import time
+import pytest
+from database import data_storage
+from database.data_storage import DataStorage
+from database.spool import WriteAheadSpool, SpoolReplayer
+from database.schema import COLUMN_NAMES
+
+
+class FakeServer:
+    """Database shared by every FakeMySQL connection, can be taken down and brought back"""
+
+    def __init__(self):
+        self.up = True
+        self.titles = []
+        self.ledger = set()
+
+
+class FakeMySQL:
+    server = None
+
+    def __init__(self, **config):
+        self.check()
+
+    def check(self):
+        if not self.server.up:
+            raise ConnectionError('MySQL server has gone away')
+
+    def create_database_and_table(self):
+        self.check()
+
+    def ping(self):
+        self.check()
+
+    def save_data(self, data_rows, batch_id=None):
+        self.check()
+        if batch_id is not None:
+            if batch_id in self.server.ledger:
+                return
+            self.server.ledger.add(batch_id)
+        self.server.titles.extend(row['job_title'] for row in data_rows)
+
+    def close(self):
+        pass
+
+
+def job(title):
+    row = dict.fromkeys(COLUMN_NAMES, '')
+    row.update(category='后端开发', job_title=title, create_time='2026-10-20')
+    return row
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = FakeServer()
+    monkeypatch.setattr(FakeMySQL, 'server', server)
+    monkeypatch.setattr(data_storage, 'MySQLHandler', FakeMySQL)
+    return server
+
+
+def test_failed_batches_are_spooled_and_replayed_in_order(server, tmp_path):
+    storage = DataStorage(str(tmp_path), 'mysql', {'host': 'localhost'})
+    storage.save_data([job('a')])
+    server.up = False
+    storage.save_data([job('b'), job('c')])
+    assert storage.spool.has_pending()
+    server.up = True
+    # Later batches follow the pending ones into the spool instead of overtaking them
+    storage.save_data([job('d')])
+    storage.close()
+    assert server.titles == ['a', 'b', 'c', 'd']
+    assert not storage.spool.has_pending()
+
+
+def test_direct_writes_resume_after_replay(server, tmp_path):
+    storage = DataStorage(str(tmp_path), 'mysql', {'host': 'localhost'})
+    server.up = False
+    storage.save_data([job('a')])
+    server.up = True
+    storage.replayer.wake()
+    deadline = time.monotonic() + 5
+    while storage.spool.has_pending() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert server.titles == ['a']
+    storage.save_data([job('b')])
+    assert not storage.spool.has_pending()
+    storage.close()
+    assert server.titles == ['a', 'b']
+
+
+def test_segment_stored_before_a_crash_is_not_stored_again(server, tmp_path, monkeypatch):
+    spool = WriteAheadSpool(str(tmp_path))
+    spool.append([job('a'), job('b')])
+    replayer = SpoolReplayer(spool, FakeMySQL)
+
+    def crash(path):
+        raise OSError('killed before the segment was removed')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(spool, 'remove', crash)
+        assert not replayer.replay_once()
+    assert server.titles == ['a', 'b'] and spool.has_pending()
+    assert replayer.replay_once()
+    assert server.titles == ['a', 'b']
+    assert not spool.has_pending()
+
+
+def test_segment_ids_stay_unique_in_an_emptied_directory(tmp_path):
+    ids = set()
+    for _ in range(2):
+        spool = WriteAheadSpool(str(tmp_path))
+        spool.append([job('a')])
+        spool.seal()
+        for segment in spool.segments():
+            ids.add(spool.segment_id(segment))
+            spool.remove(segment)
+    assert len(ids) == 2
@@ -0,0 +1,61 @@
+#!/usr/bin/python3
+# encoding: utf-8
+# @author: sunhao
+# @contact: smartadpole@163.com
+# @file: test_sqlite_handler.py
+# @time: 2026/10/20 10:30
+# @function: SQL handling of the SQLite backend.
+
+import pytest
+from database.schema import COLUMN_NAMES
+from database.sqlite_handler import SQLiteHandler
+
+
+def job(title, desc='', **fields):
+    row = dict.fromkeys(COLUMN_NAMES, '')
+    row.update(category='后端开发', sub_category='Java', job_title=title, job_company='ACME', job_desc=desc,
+               create_time='2026-10-19')
+    row.update(fields)
+    return row
+
+
+@pytest.fixture
+def handler(tmp_path):
+    db = SQLiteHandler(str(tmp_path))
+    db.create_database_and_table()
+    yield db
+    db.close()
+
+
+def test_placeholder_inside_literal_is_kept(handler):
+    handler.save_data([job('100%s'), job('Python')])
+    rows = handler.select_all("SELECT job_title FROM job_info WHERE job_title LIKE '%s%' OR job_title = %s",
+                              ('Python',))
+    assert sorted(row['job_title'] for row in rows) == ['100%s', 'Python']
+    assert SQLiteHandler._convert_sql("SELECT '%s', \"%s\", %s -- %s") == "SELECT '%s', \"%s\", ? -- %s"
+
+
+def test_job_desc_selectable_by_name(handler):
+    handler.save_data([job('Java', 'Spring and Redis'), job('Go', 'gRPC services'), job('Rust', '')])
+    rows = list(handler.iter_rows("SELECT id, job_desc, desc_hash FROM job_info ORDER BY id"))
+    assert [row['job_desc'] for row in rows] == ['Spring and Redis', 'gRPC services', '']
+    rows = handler.select_all("SELECT job_title FROM job_info WHERE job_desc LIKE %s ORDER BY job_desc",
+                              ('%Redis%',))
+    assert rows == [{'job_title': 'Java'}]
+    row = handler.select_one("SELECT j.job_desc FROM job_info j WHERE j.job_title = %s", ('Go',))
+    assert row['job_desc'] == 'gRPC services'
+
+
+def test_select_star_keeps_job_info_columns(handler):
+    handler.save_data([job('Java', 'Spring and Redis')])
+    row = handler.select_one("SELECT * FROM job_info")
+    assert row['job_desc'] == 'Spring and Redis'
+    assert 'desc_hash' not in row
+
+
+def test_search_reports_the_page_it_served(handler):
+    handler.save_data([job('Java', 'Spring and Redis'), job('Go', 'Redis cache')])
+    result = handler.search('Redis', page=0, page_size=1)
+    assert (result['page'], result['page_size'], result['total']) == (1, 1, 2)
+    assert len(result['rows']) == 1
+    assert handler.search('', page=-3)['page'] == 1
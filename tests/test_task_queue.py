@@ -0,0 +1,105 @@
+#!/usr/bin/python3
+# encoding: utf-8
+# @author: sunhao
+# @contact: smartadpole@163.com
+# @file: test_task_queue.py
+# @time: 2026/10/20 19:00
+# @function: Lease claims of the shared crawl task queue on SQLite.
+
+import threading
+import pytest
+from database.sqlite_handler import SQLiteHandler
+from database.task_queue import TASK_TABLE, DEFAULT_TASK_DB_FILE, TaskQueue
+
+
+def new_queue(directory, node_id, **kwargs):
+    # One connection per node, as separate crawler processes would have
+    queue = TaskQueue(SQLiteHandler(directory, db_file=DEFAULT_TASK_DB_FILE), 'sqlite', run_id='2026-10-20',
+                      node_id=node_id, **kwargs)
+    queue.create_table()
+    return queue
+
+
+@pytest.fixture
+def open_queue(tmp_path):
+    queues = []
+
+    def open_queue(node_id, **kwargs):
+        queues.append(new_queue(str(tmp_path), node_id, **kwargs))
+        return queues[-1]
+
+    yield open_queue
+    for queue in queues:
+        queue.close()
+
+
+def expire(queue, task):
+    """Let the lease of a task run out, as if its holder stopped sending heartbeats"""
+    queue.handler.update_data(f"UPDATE {TASK_TABLE} SET lease_until = 0 WHERE id = %s", (task['id'],))
+
+
+def state(queue, task):
+    return queue.handler.select_one(f"SELECT status, owner, attempts FROM {TASK_TABLE} WHERE id = %s", (task['id'],))
+
+
+def test_concurrent_claimers_get_disjoint_tasks(open_queue, tmp_path):
+    open_queue('seed').add_tasks([('技术', f'sub-{n}') for n in range(40)])
+    claimed = {}
+
+    def drain(node_id):
+        # SQLite connections belong to the thread that opened them
+        queue = new_queue(str(tmp_path), node_id)
+        claimed[node_id] = []
+        try:
+            while True:
+                task = queue.claim()
+                if task is None:
+                    return
+                claimed[node_id].append(task['id'])
+        finally:
+            queue.close()
+
+    threads = [threading.Thread(target=drain, args=(f'node-{n}',)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    ids = [task_id for tasks in claimed.values() for task_id in tasks]
+    assert len(ids) == len(set(ids)) == 40
+
+
+def test_expired_lease_is_reclaimed(open_queue):
+    first, second = open_queue('node-a'), open_queue('node-b')
+    first.add_tasks([('技术', 'Java')])
+    task = first.claim()
+    assert second.claim() is None
+    expire(first, task)
+    taken = second.claim()
+    assert taken['id'] == task['id'] and taken['owner'] == 'node-b' and taken['attempts'] == 2
+
+
+def test_node_that_lost_its_lease_is_rejected(open_queue):
+    first, second = open_queue('node-a'), open_queue('node-b')
+    first.add_tasks([('技术', 'Java')])
+    task = first.claim()
+    expire(first, task)
+    taken = second.claim()
+    assert not first.heartbeat(task)
+    assert not first.complete(task, jobs=10)
+    first.fail(task, 'timeout')
+    first.release(task)
+    assert dict(state(first, task)) == {'status': 'running', 'owner': 'node-b', 'attempts': 2}
+    assert second.heartbeat(taken)
+    assert second.complete(taken, jobs=5)
+    assert dict(state(first, task)) == {'status': 'done', 'owner': 'node-b', 'attempts': 2}
+
+
+def test_failed_task_is_retried_until_max_attempts(open_queue):
+    queue = open_queue('node-a', max_attempts=2)
+    queue.add_tasks([('技术', 'Java')])
+    queue.fail(queue.claim(), 'boom')
+    task = queue.claim()
+    assert task['attempts'] == 2
+    queue.fail(task, 'boom again')
+    assert queue.claim() is None
+    assert queue.progress()['failed'] == 1
@@ -0,0 +1,51 @@
+#!/usr/bin/python3
+# encoding: utf-8
+# @author: sunhao
+# @contact: smartadpole@163.com
+# @file: test_verification.py
+# @time: 2026/10/20 22:00
+# @function: Verification page detection on URLs and widget markers.
+
+import pytest
+from selenium.common.exceptions import StaleElementReferenceException
+from verification import VERIFICATION_MARKER_XPATH, VerificationGuard
+
+PAGE = """<html><body>
+<div class="job-list captcha-tips">Listings</div>
+<div class="geetest_logo"></div>
+<div class=" geetest
+  geetest_popup">slider</div>
+</body></html>"""
+
+
+class FakeElement:
+    def __init__(self, displayed):
+        self.displayed = displayed
+
+    def is_displayed(self):
+        if self.displayed is None:
+            raise StaleElementReferenceException()
+        return self.displayed
+
+
+class FakeBrowser:
+    def __init__(self, url='https://www.zhipin.com/web/geek/job', elements=()):
+        self.current_url = url
+        self.elements = list(elements)
+
+    def find_elements(self, by=None, value=None):
+        return self.elements
+
+
+def test_marker_xpath_matches_whole_class_tokens():
+    html = pytest.importorskip('lxml.html')
+    matches = html.fromstring(PAGE).xpath(VERIFICATION_MARKER_XPATH)
+    assert [element.text for element in matches] == ['slider']
+
+
+def test_only_displayed_markers_count():
+    guard = VerificationGuard()
+    assert not guard.detect(FakeBrowser(elements=[FakeElement(False), FakeElement(None)]))
+    assert guard.detect(FakeBrowser(elements=[FakeElement(False), FakeElement(True)]))
+    assert guard.detect(FakeBrowser(url='https://www.zhipin.com/web/user/safe/verify-slider'))
+    assert not guard.detect(FakeBrowser())
@@ -0,0 +1,171 @@
+#!/usr/bin/python3
+# encoding: utf-8
+# @author: sunhao
+# @contact: smartadpole@163.com
+# @file: verification.py
+# @time: 2026/10/19 21:30
+# @function: Detect verification pages after navigation and back off the affected browser.
+
+import time
+import random
+from contextlib import nullcontext
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.common.by import By
+import loger
+from metrics import REGISTRY
+
+# Verification and security check pages are served under these URL fragments
+VERIFICATION_URL_PATTERNS = ('security-check', 'verify-slider', '/web/passport/zp/verify', 'captcha')
+# Class names of slider and captcha widgets embedded into a normal page
+VERIFICATION_MARKER_CLASSES = ('geetest', 'verify-wrap', 'captcha', 'nc-container')
+
+def class_token_xpath(class_names):
+    """
+    XPath of elements carrying any of the class names as a whole token
+
+    A plain contains(@class, ...) would also match names such as
+    'captcha-tips' or 'geetest_logo' that regular pages use.
+
+    Args:
+        class_names (tuple): Class names
+
+    Returns:
+        str: XPath expression
+    """
+    tests = [f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')" for name in class_names]
+    return f"//*[{' or '.join(tests)}]"
+
+VERIFICATION_MARKER_XPATH = class_token_xpath(VERIFICATION_MARKER_CLASSES)
+# Quarantine of a browser: base seconds, doubled per consecutive hit up to the maximum
+BACKOFF_BASE = 30
+BACKOFF_MAX = 960
+# Seconds between checks during the quarantine, a page solved by hand ends it early
+BACKOFF_POLL = 5
+# Consecutive hits before giving up
+MAX_CONSECUTIVE_HITS = 6
+
+class VerificationRequired(Exception):
+    """The browser landed on a verification page"""
+
+class VerificationGuard:
+    def __init__(self, stats=None, backoff_base=BACKOFF_BASE, backoff_max=BACKOFF_MAX, poll_interval=BACKOFF_POLL,
+                 max_hits=MAX_CONSECUTIVE_HITS, url_patterns=VERIFICATION_URL_PATTERNS,
+                 marker_xpath=VERIFICATION_MARKER_XPATH):
+        """
+        Verification detection and backoff for one browser
+
+        check() runs after each navigation: a URL test and one find_elements
+        call, so a clean page costs a single driver round trip. Widgets are
+        only counted when displayed, hidden templates are ignored. A hit
+        quarantines only this browser: it waits with exponential backoff
+        (polling, so a page solved by hand ends the wait), then drops the
+        session cookies. Other workers have their own guard and keep crawling.
+
+        Args:
+            stats (CrawlStats): Receives hit counts and backoff timings, global metrics if None
+            backoff_base (float): Seconds of the first quarantine
+            backoff_max (float): Upper bound of a quarantine
+            poll_interval (float): Seconds between checks during a quarantine
+            max_hits (int): Consecutive hits before quarantine() gives up by raising
+            url_patterns (tuple): URL fragments of verification pages
+            marker_xpath (str): XPath of verification widgets
+        """
+        self.stats = stats
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.poll_interval = poll_interval
+        self.max_hits = max_hits
+        self.url_patterns = url_patterns
+        self.marker_xpath = marker_xpath
+        self.consecutive = 0
+        self.hits = 0
+
+    def _count(self, name):
+        if self.stats is not None:
+            self.stats.count(name)
+        else:
+            REGISTRY.inc(f'{name}_total')
+
+    def detect(self, browser):
+        """
+        Whether the current page is a verification page
+
+        Args:
+            browser (webdriver): Browser instance
+
+        Returns:
+            bool: True on a verification page
+        """
+        url = browser.current_url or ''
+        if any(pattern in url for pattern in self.url_patterns):
+            return True
+        return any(self._displayed(element) for element in browser.find_elements(by=By.XPATH, value=self.marker_xpath))
+
+    @staticmethod
+    def _displayed(element):
+        try:
+            return element.is_displayed()
+        except WebDriverException:
+            # Removed from the page while it was checked
+            return False
+
+    def check(self, browser, reset=True):
+        """
+        Raise VerificationRequired on a verification page, otherwise reset the backoff
+
+        Args:
+            browser (webdriver): Browser after a navigation
+            reset (bool): Whether a clean page ends the run of hits; False for pages
+                such as the homepage that load fine while the listings are still blocked
+        """
+        if not self.detect(browser):
+            if reset:
+                self.consecutive = 0
+            return
+        self.consecutive += 1
+        self.hits += 1
+        self._count('verification_hits')
+        raise VerificationRequired(f"Verification page at {browser.current_url}")
+
+    def backoff(self):
+        """Seconds of the next quarantine, with jitter so workers do not return in step"""
+        delay = min(self.backoff_max, self.backoff_base * 2 ** max(self.consecutive - 1, 0))
+        return delay * random.uniform(1.0, 1.25)
+
+    def quarantine(self, browser):
+        """
+        Keep this browser off the site after a hit
+
+        Args:
+            browser (webdriver): Browser showing the verification page
+
+        Returns:
+            float: Seconds waited
+        """
+        if self.consecutive > self.max_hits:
+            raise VerificationRequired(f"Still verifying after {self.consecutive - 1} backoffs, giving up")
+        delay = self.backoff()
+        print(f"Verification page detected (hit {self.consecutive} in a row), backing off {delay:.0f}s; "
+              f"complete it in the browser to resume earlier", level="WARNING")
+        start = time.monotonic()
+        with self._timer('verification_backoff'):
+            while time.monotonic() - start < delay:
+                time.sleep(min(self.poll_interval, max(delay - (time.monotonic() - start), 0)))
+                try:
+                    if not self.detect(browser):
+                        print("Verification cleared, resuming")
+                        return time.monotonic() - start
+                except Exception:
+                    break
+        # Still blocked: start over with a fresh session
+        try:
+            browser.delete_all_cookies()
+            self._count('session_refreshes')
+        except Exception as e:
+            print(f"Error refreshing the browser session: {str(e)}", level="WARNING")
+        return time.monotonic() - start
+
+    def _timer(self, stage):
+        if self.stats is not None:
+            return self.stats.timer(stage)
+        return nullcontext()